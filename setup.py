@@ -15,7 +15,11 @@ setup(
         "pydantic>=2.0.0",
         "pydantic-settings>=2.0.0",
         "keyring>=24.0.0",
+        "numpy>=1.22.0",
     ],
+    extras_require={
+        "parquet": ["pyarrow>=12.0.0"],
+    },
     entry_points={
         "console_scripts": [
             "stars=stars.cli:main",
@@ -1,29 +1,350 @@
 """AI analysis using Gemini API - Pure API client, no output logic"""
+import hashlib
+import json
 import logging
-from typing import Optional, Dict, Any
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, List
 from google import genai
 from google.genai.types import GenerateContentResponse
 from .config import config
 
 logger = logging.getLogger(__name__)
 
+MODEL = 'gemini-2.0-flash'
+CACHE_TTL = 86400
+CACHE_MAX_BYTES = 16 * 2 ** 20
+# Failure groups answered by one prompt.
+GROUPS_PER_PROMPT = 10
+# Gemini free-tier request rate; override with ai.requests_per_minute.
+REQUESTS_PER_MINUTE = 15
+MAX_CONCURRENT = 4
+CALL_TIMEOUT = 30.0
+_ANSWER_RE = re.compile(r'^#+\s*Group\s+(\d+)\b.*$', re.I | re.M)
+
 
 class GeminiAPIError(Exception):
     """Custom exception for Gemini API errors"""
     pass
 
 
+class GeminiTimeoutError(GeminiAPIError):
+    """The call did not finish (or could not start) before its deadline"""
+    pass
+
+
+class RateLimiter:
+    """Token bucket shared by every call of an analyzer: *per_minute* requests, bursts of *burst*"""
+
+    def __init__(self, per_minute: float, burst: int = 1):
+        self.interval = 60.0 / per_minute
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: Optional[float] = None, cancel: Optional[threading.Event] = None) -> bool:
+        """
+        Take a token, waiting for one if needed.
+
+        Returns:
+            bool: False if none frees up before *deadline* (monotonic) or
+                  *cancel* is set
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) / self.interval)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) * self.interval
+            if deadline is not None and now + wait > deadline:
+                return False
+            if cancel is not None:
+                if cancel.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+def _run_in_thread(func: Callable[[], Any]) -> Future:
+    """
+    Run *func* on a daemon thread. A call abandoned at its deadline must
+    not hold up interpreter exit, which pool worker threads would.
+    """
+    future: Future = Future()
+
+    def _target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_target, name='stars-ai', daemon=True).start()
+    return future
+
+
+_REFUSED_RE = re.compile(r'connection refused|ECONNREFUSED', re.I)
+_ENDPOINT_RE = re.compile(r'(?:tcp |to |dial |connect |//|@)\[?([\w.-]+\]?:\d{2,5})\b')
+_INSUFFICIENT_RE = re.compile(r'Insufficient (cpu|memory|ephemeral-storage|[\w./-]+)')
+_IMAGE_PULL = {'ImagePullBackOff', 'ErrImagePull', 'InvalidImageName', 'ErrImageNeverPull'}
+
+
+def _lines(value: Any) -> List[str]:
+    if not value:
+        return []
+    return value.splitlines() if isinstance(value, str) else [str(line) for line in value]
+
+
+def _oom(data: Dict[str, Any]) -> Optional[str]:
+    for c in data.get('containers') or []:
+        last_exit = c.get('last_exit') or {}
+        if last_exit.get('reason') == 'OOMKilled':
+            return f"""1. Root cause: container {c.get('name')} exceeded its memory limit and was OOM-killed (exit code {last_exit.get('exit_code', 137)}), {c.get('restarts') or 0} restarts so far.
+2. Impact: every kill restarts the container, dropping in-flight work and backing off into CrashLoopBackOff.
+3. Fix: raise the memory limit above the peak working set ('stars smart-scale' suggests one from usage) or find the leak; for JVM/Node set the heap below the limit."""
+    return None
+
+
+def _image_pull(data: Dict[str, Any]) -> Optional[str]:
+    for c in data.get('containers') or []:
+        if c.get('waiting') not in _IMAGE_PULL:
+            continue
+        message = c.get('waiting_message') or ''
+        lower = message.lower()
+        if 'unauthorized' in lower or 'denied' in lower or 'authentication' in lower:
+            cause, fix = "the registry rejected the credentials", "add or fix imagePullSecrets for the registry on the pod or its service account"
+        elif 'not found' in lower or 'manifest unknown' in lower:
+            cause, fix = "the image or tag does not exist", "correct the image name and tag, or push the missing tag"
+        elif 'timeout' in lower or 'no such host' in lower or 'i/o' in lower:
+            cause, fix = "the node cannot reach the registry", "check node DNS, egress and proxy settings for the registry host"
+        else:
+            cause, fix = "the image cannot be pulled", "check the image reference, registry credentials and registry reachability"
+        detail = f" ({message[:160]})" if message else ""
+        return f"""1. Root cause: container {c.get('name')} is in {c.get('waiting')}: {cause}{detail}.
+2. Impact: the pod never starts; the kubelet retries the pull with growing back-off.
+3. Fix: {fix}, then delete the pod or roll the owner to retry immediately."""
+    return None
+
+
+def _connection_refused(data: Dict[str, Any]) -> Optional[str]:
+    crashing = [c for c in data.get('containers') or [] if c.get('waiting') == 'CrashLoopBackOff']
+    if not crashing and data.get('reason') != 'CrashLoopBackOff':
+        return None
+    refused = [line for line in _lines(data.get('log_tail')) if _REFUSED_RE.search(line)]
+    if not refused:
+        return None
+    match = _ENDPOINT_RE.search(refused[-1])
+    target = match.group(1) if match else "a dependency"
+    name = crashing[0].get('name') if crashing else data.get('container') or 'the container'
+    return f"""1. Root cause: {name} exits at startup because {target} refuses connections (log: "{refused[-1].strip()[:160]}").
+2. Impact: the container crashloops until the dependency accepts connections; its pods stay unready.
+3. Fix: check that the service behind {target} is up and has endpoints ('kubectl get endpoints'), and make the app retry with back-off or wait for it in an init container."""
+
+
+def _unschedulable(data: Dict[str, Any]) -> Optional[str]:
+    messages = [data.get('scheduling') or ''] + _lines(data.get('events'))
+    for message in messages:
+        resources = sorted(set(_INSUFFICIENT_RE.findall(message)))
+        if not resources:
+            continue
+        what = " and ".join(resources)
+        return f"""1. Root cause: the scheduler found no node with enough free {what} for the pod's requests ("{message.strip()[:160]}").
+2. Impact: the pod stays Pending and serves nothing until capacity frees up.
+3. Fix: lower the {what} request if it is oversized ('stars smart-scale'), or add node capacity; 'stars pending' shows which nodes come closest."""
+    return None
+
+
+# Classic failures answered without a model: checked in order, first match wins.
+LOCAL_RULES = (
+    ('oom-killed', _oom),
+    ('image-pull', _image_pull),
+    ('crashloop-connection-refused', _connection_refused),
+    ('unschedulable-resources', _unschedulable),
+)
+
+
+def classify_failure(data: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """
+    Answer a known failure pattern from pod evidence alone, without the
+    network.
+
+    Args:
+        data: Pod or failure-group evidence: ``containers`` (see
+              ``triage.container_evidence``), ``reason``, ``scheduling``,
+              ``events`` and ``log_tail``, where known
+
+    Returns:
+        dict: ``{'rule', 'analysis'}``, or None when no rule matches
+    """
+    for rule, match in LOCAL_RULES:
+        analysis = match(data)
+        if analysis:
+            return {'rule': rule, 'analysis': analysis}
+    return None
+
+
+class ResponseCache:
+    """
+    On-disk cache of model answers keyed by (model, prompt).
+
+    Calls are deterministic (temperature 0, top_k 1), so a prompt seen
+    before gets the same answer without another round trip. Prompts are
+    built from redacted data and only their hash is stored. Entries
+    expire after *ttl* seconds; beyond *max_bytes* the least recently
+    used go first. Revoking AI consent clears the directory.
+    """
+
+    def __init__(self, root: Optional[Path] = None, ttl: int = CACHE_TTL,
+                 max_bytes: int = CACHE_MAX_BYTES):
+        if root is None:
+            from .config import AI_CACHE_DIR
+            root = AI_CACHE_DIR
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True, mode=0o700)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\n{prompt}".encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key[:32]}.json"
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        """Cached answer, or None when missing or expired"""
+        key = self.key(model, prompt)
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            if entry.get('key') != key or time.time() - entry.get('created', 0) > self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            os.utime(path)          # LRU order for pruning
+            return entry['text']
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Dropping unreadable AI cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, model: str, prompt: str, text: str) -> None:
+        """Store an answer, then prune to the size budget"""
+        key = self.key(model, prompt)
+        path = self._path(key)
+        tmp_path = str(path) + '.tmp'
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'key': key, 'model': model, 'created': time.time(), 'text': text}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write AI cache entry: {e}")
+            return
+        self.prune()
+
+    def prune(self) -> None:
+        """Delete expired entries, then least recently used ones beyond ``max_bytes``"""
+        now = time.time()
+        entries = []
+        for path in self.root.glob('*.json'):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            # Created no later than last used, so an idle entry past the TTL is expired.
+            if now - st.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> int:
+        """Remove every entry; returns the number removed"""
+        removed = 0
+        for path in self.root.glob('*.json'):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+
+def _limits_from_config() -> Dict[str, float]:
+    """Request rate, concurrency and per-call deadline per the ``ai`` config section"""
+    section = config.section('ai', {}) or {}
+    limits = {'requests_per_minute': REQUESTS_PER_MINUTE, 'max_concurrent': MAX_CONCURRENT,
+              'timeout': CALL_TIMEOUT}
+    for key, default in list(limits.items()):
+        try:
+            value = float(section.get(key, default))
+        except (TypeError, ValueError):
+            value = 0.0
+        # max_concurrent sizes a semaphore: a fraction would round to 0 slots.
+        if value <= 0 or (key == 'max_concurrent' and not value.is_integer()):
+            logger.warning(f"Ignoring invalid ai.{key}: {section.get(key)!r}")
+            continue
+        limits[key] = int(value) if key == 'max_concurrent' else value
+    return limits
+
+
+def _cache_from_config() -> Optional[ResponseCache]:
+    """Response cache per the ``ai_cache`` config section (``ttl``, ``max_mb``); ttl 0 disables it"""
+    from .prometheus import parse_duration
+    section = config.section('ai_cache', {}) or {}
+    try:
+        ttl = section.get('ttl', CACHE_TTL)
+        ttl = parse_duration(ttl) if isinstance(ttl, str) else int(ttl)
+        max_bytes = int(float(section.get('max_mb', CACHE_MAX_BYTES / 2 ** 20)) * 2 ** 20)
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Ignoring invalid ai_cache config: {e}")
+        ttl, max_bytes = CACHE_TTL, CACHE_MAX_BYTES
+    if ttl <= 0:
+        return None
+    try:
+        return ResponseCache(ttl=ttl, max_bytes=max_bytes)
+    except OSError as e:
+        logger.warning(f"AI response cache disabled: {e}")
+        return None
+
+
 class AIAnalyzer:
     """Pure API client for Gemini - returns data, doesn't print"""
     
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or config.settings.gemini_api_key
         self.client = None
+        self.cache: Optional[ResponseCache] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.local_hits = 0
+        self.api_calls = 0
+        limits = _limits_from_config()
+        self.timeout = limits['timeout']
+        self.max_concurrent = int(limits['max_concurrent'])
+        self.limiter = RateLimiter(limits['requests_per_minute'], burst=self.max_concurrent)
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._stats_lock = threading.Lock()
         
         if self.api_key:
             try:
                 self.client = genai.Client(api_key=self.api_key)
                 logger.debug("Gemini client initialized")
+                self.cache = _cache_from_config()
             except Exception as e:
                 logger.error(f"Failed to initialize Gemini client: {e}")
                 raise GeminiAPIError(f"Gemini initialization failed: {e}")
@@ -33,14 +354,46 @@ class AIAnalyzer:
     def is_available(self) -> bool:
         """Check if AI analysis is available"""
         return self.client is not None
+
+    def analyze_locally(self, data: Dict[str, Any]) -> Optional[str]:
+        """
+        Answer from the local rules (see ``classify_failure``); nothing
+        leaves the machine, so neither an API key nor consent is needed.
+
+        Returns:
+            str: Analysis, or None when the case needs the model
+        """
+        match = classify_failure(data)
+        if match is None:
+            return None
+        with self._stats_lock:
+            self.local_hits += 1
+        logger.info(f"Answered locally by rule {match['rule']}")
+        return match['analysis']
+
+    def stats(self) -> Dict[str, Any]:
+        """Answers so far by tier, and the response cache hit rate (None before any lookup)"""
+        with self._stats_lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                'local': self.local_hits,
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'api_calls': self.api_calls,
+                'cache_hit_rate': self.cache_hits / lookups if lookups else None,
+            }
     
-    def analyze_pod_issue(self, pod_data: Dict[str, Any], allow_external: bool = True) -> str:
+    def analyze_pod_issue(self, pod_data: Dict[str, Any], allow_external: bool = True,
+                          on_text: Optional[Callable[[str], None]] = None,
+                          timeout: Optional[float] = None) -> str:
         """
         Analyze pod issues with AI.
 
         Args:
             pod_data: Dictionary containing pod information
             allow_external: If False, raises error instead of sending data externally
+            on_text: Called with each piece of the answer as it streams in
+            timeout: Seconds before the call is abandoned (default: ai.timeout)
 
         Returns:
             str: Analysis result
@@ -73,21 +426,24 @@ class AIAnalyzer:
             logger.info(f"Sending pod data to Google Gemini API: {pod_data.get('name', 'unknown')}")
 
             prompt = self._build_pod_analysis_prompt(json.loads(redacted_data))
-            response = self._call_api(prompt)
-            return response.text
+            return self._generate(prompt, on_text, timeout)
         except GeminiAPIError:
             raise
         except Exception as e:
             logger.error(f"Pod analysis failed: {e}")
             raise GeminiAPIError(f"Analysis failed: {str(e)}")
 
-    def analyze_cluster_health(self, cluster_data: Dict[str, Any], allow_external: bool = True) -> str:
+    def analyze_cluster_health(self, cluster_data: Dict[str, Any], allow_external: bool = True,
+                               on_text: Optional[Callable[[str], None]] = None,
+                               timeout: Optional[float] = None) -> str:
         """
         Analyze overall cluster health.
 
         Args:
             cluster_data: Dictionary containing cluster metrics
             allow_external: If False, raises error instead of sending data externally
+            on_text: Called with each piece of the answer as it streams in
+            timeout: Seconds before the call is abandoned (default: ai.timeout)
 
         Returns:
             str: Health analysis result
@@ -120,14 +476,193 @@ class AIAnalyzer:
 
             logger.info("Sending cluster health data to Google Gemini API")
             prompt = self._build_cluster_analysis_prompt(redacted_data)
-            response = self._call_api(prompt)
-            return response.text
+            return self._generate(prompt, on_text, timeout)
         except GeminiAPIError:
             raise
         except Exception as e:
             logger.error(f"Cluster analysis failed: {e}")
             raise GeminiAPIError(f"Analysis failed: {str(e)}")
     
+    def analyze_failure_groups(self, groups: List[Dict[str, Any]], allow_external: bool = True) -> List[str]:
+        """
+        Analyze groups of identical failures, one representative each.
+
+        Groups are sent ``GROUPS_PER_PROMPT`` to a prompt and the answer is
+        split back per group, so a mass failure costs one call per distinct
+        failure rather than one per pod. Prompts run concurrently.
+
+        Args:
+            groups: Evidence per group (see ``triage.group_evidence``)
+            allow_external: If False, raises error instead of sending data externally
+
+        Returns:
+            list: Analysis per group, in order
+
+        Raises:
+            GeminiAPIError: If API call fails, external calls disabled, or user
+                            has not consented to AI data sharing.
+        """
+        if not allow_external:
+            raise GeminiAPIError("AI analysis disabled: --no-ai flag set")
+
+        if not self.is_available():
+            raise GeminiAPIError("AI analysis unavailable - GEMINI_API_KEY not set")
+
+        from .config import check_ai_consent
+        if not check_ai_consent():
+            raise GeminiAPIError(
+                "AI analysis requires user consent. Run 'stars privacy grant' to enable."
+            )
+
+        try:
+            from .triage import shareable_evidence
+            from .utils import redact_sensitive_data
+
+            # Log tails and container messages stay local whatever the caller passed.
+            shared = [shareable_evidence(group) for group in groups]
+            redacted = json.loads(redact_sensitive_data(json.dumps(shared)))
+            logger.info(f"Sending {len(groups)} failure groups to Google Gemini API")
+            chunks = [redacted[i:i + GROUPS_PER_PROMPT] for i in range(0, len(redacted), GROUPS_PER_PROMPT)]
+            # Chunks beyond max_concurrent queue for a slot, one deadline per round ahead.
+            wait = self.timeout * -(-len(chunks) // self.max_concurrent)
+            texts = self.map(lambda chunk: self._generate(self._build_groups_prompt(chunk), wait=wait), chunks)
+            answers = []
+            for chunk, text in zip(chunks, texts):
+                if isinstance(text, GeminiTimeoutError):
+                    answers.extend([f"Analysis timed out: {text}"] * len(chunk))
+                elif isinstance(text, Exception):
+                    raise text
+                else:
+                    answers.extend(self._split_answers(text, len(chunk)))
+            return answers
+        except GeminiAPIError:
+            raise
+        except Exception as e:
+            logger.error(f"Failure group analysis failed: {e}")
+            raise GeminiAPIError(f"Analysis failed: {str(e)}")
+
+    @staticmethod
+    def _split_answers(text: str, n: int) -> List[str]:
+        """Per-group sections of a batched answer; a single group gets the whole text"""
+        if n == 1:
+            return [text.strip()]
+        answers = [''] * n
+        marks = list(_ANSWER_RE.finditer(text))
+        for j, mark in enumerate(marks):
+            index = int(mark.group(1)) - 1
+            end = marks[j + 1].start() if j + 1 < len(marks) else len(text)
+            if 0 <= index < n:
+                answers[index] = text[mark.end():end].strip()
+        return [answer or "No analysis returned for this group" for answer in answers]
+
+    def map(self, func: Callable[[Any], str], items: List[Any]) -> List[Any]:
+        """
+        Run *func* over *items* concurrently; the rate limiter and
+        ``max_concurrent`` still bound the API calls they make.
+
+        Returns:
+            list: Result or raised exception per item, in order
+        """
+        if len(items) <= 1:
+            results = []
+            for item in items:
+                try:
+                    results.append(func(item))
+                except Exception as e:
+                    results.append(e)
+            return results
+        futures = [_run_in_thread(lambda item=item: func(item)) for item in items]
+        return [future.exception() or future.result() for future in futures]
+
+    def _generate(self, prompt: str, on_text: Optional[Callable[[str], None]] = None,
+                  timeout: Optional[float] = None, wait: Optional[float] = None) -> str:
+        """
+        Answer text for a redacted prompt, from the response cache when possible.
+
+        The call waits up to *wait* seconds (default: its timeout) for a
+        free slot, then for a rate-limit token, then runs on its own
+        thread, streaming into *on_text* when given. Past the deadline, or
+        on Ctrl+C, it is cancelled: the caller gets ``GeminiTimeoutError``
+        (or the interrupt) straight away and the thread stops at the next
+        streamed chunk.
+        """
+        if self.cache is not None:
+            text = self.cache.get(MODEL, prompt)
+            if text is not None:
+                with self._stats_lock:
+                    self.cache_hits += 1
+                logger.info("AI answer served from cache")
+                if on_text is not None:
+                    on_text(text)
+                return text
+            with self._stats_lock:
+                self.cache_misses += 1
+
+        timeout = self.timeout if timeout is None else timeout
+        wait = timeout if wait is None else wait
+        cancel = threading.Event()
+        # Slots are held for at most a deadline each, so queued calls of a
+        # map() only start their own clock once they get one.
+        if not self._slots.acquire(timeout=wait):
+            raise GeminiTimeoutError(f"no free AI call slot within {wait:g}s")
+        deadline = time.monotonic() + timeout
+        try:
+            if not self.limiter.acquire(deadline):
+                raise GeminiTimeoutError(f"rate limit leaves no room within {timeout:g}s")
+            with self._stats_lock:
+                self.api_calls += 1
+            if on_text is None:
+                future = _run_in_thread(lambda: self._call_api(prompt).text)
+            else:
+                future = _run_in_thread(lambda: self._stream_api(prompt, on_text, cancel))
+            try:
+                text = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                cancel.set()
+                raise GeminiTimeoutError(f"no answer within {timeout:g}s")
+            except KeyboardInterrupt:
+                cancel.set()
+                raise
+        finally:
+            self._slots.release()
+
+        if self.cache is not None and text:
+            self.cache.put(MODEL, prompt, text)
+        return text
+
+    def _stream_api(self, prompt: str, on_text: Callable[[str], None], cancel: threading.Event) -> str:
+        """
+        Streaming variant of ``_call_api``: hands each chunk to *on_text*
+        and stops early once *cancel* is set.
+
+        Returns:
+            str: The full answer
+
+        Raises:
+            GeminiAPIError: If API call fails
+        """
+        parts = []
+        try:
+            # Same deterministic configuration as _call_api.
+            stream = self.client.models.generate_content_stream(
+                model=MODEL,
+                contents=prompt,
+                config={'temperature': 0.0, 'top_p': 1.0, 'top_k': 1}
+            )
+            for chunk in stream:
+                if cancel.is_set():
+                    close = getattr(stream, 'close', None)
+                    if close is not None:
+                        close()
+                    break
+                if chunk.text:
+                    parts.append(chunk.text)
+                    on_text(chunk.text)
+        except Exception as e:
+            logger.error(f"Gemini streaming call failed: {e}")
+            raise GeminiAPIError(f"API call failed: {str(e)}")
+        return ''.join(parts)
+
     def _call_api(self, prompt: str) -> GenerateContentResponse:
         """
         Make API call to Gemini with deterministic configuration
@@ -147,7 +682,7 @@ class AIAnalyzer:
             # SECURITY: temperature=0.0 ensures deterministic, reproducible outputs
             # Critical for infrastructure modifications to prevent unpredictable behavior
             response = self.client.models.generate_content(
-                model='gemini-2.0-flash',
+                model=MODEL,
                 contents=prompt,
                 config={
                     'temperature': 0.0,  # Deterministic mode for infrastructure safety
@@ -174,6 +709,29 @@ Containers: {pod_data.get('containers', [])}
 
 Be concise and actionable. Max 100 words."""
     
+    def _build_groups_prompt(self, groups: List[Dict[str, Any]]) -> str:
+        """Build one prompt covering several failure groups"""
+        if len(groups) == 1:
+            return f"""Analyze this Kubernetes failure, seen on {groups[0].get('pods')} pods, and provide:
+1. Root cause (1 sentence)
+2. Recommended fix (1-2 sentences)
+
+Failure:
+{json.dumps(groups[0], indent=2)}
+
+Be concise and actionable. Max 80 words."""
+        sections = "\n\n".join(f"Group {i}:\n{json.dumps(group, indent=2)}"
+                                for i, group in enumerate(groups, 1))
+        return f"""Analyze these {len(groups)} Kubernetes failure groups. Each group is
+one failure seen on several pods; the data is from one representative pod.
+For every group, write a section headed "### Group <number>" with:
+1. Root cause (1 sentence)
+2. Recommended fix (1-2 sentences)
+
+{sections}
+
+Be concise and actionable. Max 80 words per group."""
+
     def _build_cluster_analysis_prompt(self, cluster_data: Dict[str, Any]) -> str:
         """Build prompt for cluster analysis"""
         return f"""Analyze this Kubernetes cluster health:
@@ -0,0 +1,430 @@
+"""Local alert rules - incremental evaluation and an indexed append-only history"""
+import json
+import logging
+import operator
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import yaml
+
+from .prometheus import parse_duration, series_label
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ('info', 'warning', 'critical')
+# Cluster-state condition over every pod: ``<field> <op> <value>``, or a
+# bare boolean field (``oom``).
+STATE_FIELDS = ('restarts', 'phase', 'reason', 'oom', 'ready')
+_STATE_RE = re.compile(r'^\s*(' + '|'.join(STATE_FIELDS) + r')\s*(?:(==|!=|>=|<=|>|<)\s*(\S+))?\s*$')
+_OPS = {
+    '==': operator.eq, '!=': operator.ne, '>': operator.gt,
+    '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+}
+_BOOLS = {'true': True, 'yes': True, '1': True, 'false': False, 'no': False, '0': False}
+
+_LOG = 'events.ndjson'
+_INDEX = 'events.idx'
+_STATE = 'state.json'
+# One index record per event: unix time and byte offset into the log.
+INDEX_DTYPE = np.dtype([('ts', '<u4'), ('offset', '<u8')])
+
+
+def _write_secure(path: Path, text: str) -> None:
+    """Atomically write *text* with 0o600 permissions"""
+    tmp_path = str(path) + '.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, str(path))
+
+
+def parse_rule(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalise one rule of ``alerts.yaml``.
+
+    ``condition`` is either a cluster-state test over pods (``restarts > 5``,
+    ``phase == Pending``, ``reason == CrashLoopBackOff``, ``oom``,
+    ``ready == false``) or PromQL, where every returned series is one
+    alert. ``for`` is how long the condition must hold before firing.
+
+    Raises:
+        ValueError: On a malformed rule
+    """
+    name = str(spec.get('name') or '').strip()
+    condition = str(spec.get('condition') or '').strip()
+    if not name or not condition:
+        raise ValueError("An alert rule needs a name and a condition")
+    severity = str(spec.get('severity') or 'warning').lower()
+    if severity not in SEVERITIES:
+        raise ValueError(f"Rule {name}: severity must be one of {', '.join(SEVERITIES)}")
+    hold = spec.get('for') or 0
+    if isinstance(hold, str):
+        hold = 0 if hold.strip() in ('0', '0s') else parse_duration(hold)
+
+    rule = {
+        'name': name,
+        'condition': condition,
+        'namespace': spec.get('namespace'),
+        'for': hold,
+        'severity': severity,
+        'summary': spec.get('summary', ''),
+        'kind': 'promql',
+    }
+    match = _STATE_RE.match(condition)
+    if match:
+        field, op, value = match.groups()
+        op, value = op or '==', 'true' if value is None else value
+        if field in ('oom', 'ready'):
+            if value.lower() not in _BOOLS or op not in ('==', '!='):
+                raise ValueError(f"Rule {name}: {field} compares with == or != against true/false")
+            value = _BOOLS[value.lower()]
+        elif field == 'restarts':
+            try:
+                value = float(value)
+            except ValueError:
+                raise ValueError(f"Rule {name}: restarts compares against a number")
+        elif op not in ('==', '!='):
+            raise ValueError(f"Rule {name}: {field} compares with == or !=")
+        rule.update(kind='state', field=field, op=op, value=value)
+    return rule
+
+
+def load_rules(path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """Parsed rules of ``~/.stars/alerts.yaml`` (empty if the file is missing)"""
+    if path is None:
+        from .config import ALERTS_FILE
+        path = ALERTS_FILE
+    if not Path(path).exists():
+        return []
+    with open(path, 'r') as f:
+        data = yaml.safe_load(f) or {}
+    specs = data.get('rules', []) if isinstance(data, dict) else []
+    return [parse_rule(spec) for spec in specs if isinstance(spec, dict)]
+
+
+def save_rule(spec: Dict[str, Any], path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Add *spec* to the rules file, replacing a rule of the same name.
+
+    Returns:
+        dict: The parsed rule
+    """
+    if path is None:
+        from .config import ALERTS_FILE
+        path = ALERTS_FILE
+    rule = parse_rule(spec)
+    data = {}
+    if Path(path).exists():
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f) or {}
+    rules = [r for r in data.get('rules', []) if isinstance(r, dict) and r.get('name') != rule['name']]
+    rules.append({k: v for k, v in spec.items() if v not in (None, '')})
+    data['rules'] = rules
+    _write_secure(Path(path), yaml.dump(data, default_flow_style=False, sort_keys=False))
+    return rule
+
+
+def pod_state(pod) -> Dict[str, Any]:
+    """Fields a state condition can test, read from a V1Pod"""
+    statuses = (pod.status.container_statuses if pod.status else None) or []
+    reason = ''
+    oom = False
+    for c in statuses:
+        if c.state and c.state.waiting and c.state.waiting.reason and not reason:
+            reason = c.state.waiting.reason
+        for state in (c.state, c.last_state):
+            if state and state.terminated and state.terminated.reason == 'OOMKilled':
+                oom = True
+    return {
+        'restarts': sum(c.restart_count or 0 for c in statuses),
+        'phase': (pod.status.phase if pod.status else None) or 'Unknown',
+        'reason': reason,
+        'oom': oom,
+        'ready': bool(statuses) and all(c.ready for c in statuses),
+    }
+
+
+def _test(rule: Dict[str, Any], state: Dict[str, Any]) -> bool:
+    return bool(_OPS[rule['op']](state[rule['field']], rule['value']))
+
+
+class AlertHistory:
+    """
+    Append-only alert event log with a timestamp index.
+
+    Events are NDJSON lines in ``events.ndjson``; each append also writes
+    one fixed-width (time, byte offset) record per event to ``events.idx``.
+    Events are appended in time order, so a time-range query is a binary
+    search over the memory-mapped index and one contiguous read of the log.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        if root is None:
+            from .config import ALERTS_DIR
+            root = ALERTS_DIR
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True, mode=0o700)
+        self.log_path = self.root / _LOG
+        self.index_path = self.root / _INDEX
+
+    def _index(self) -> np.ndarray:
+        size = self.index_path.stat().st_size if self.index_path.exists() else 0
+        count = size // INDEX_DTYPE.itemsize
+        if not count:
+            return np.empty(0, dtype=INDEX_DTYPE)
+        return np.memmap(self.index_path, dtype=INDEX_DTYPE, mode='r', shape=(count,))
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def append(self, events: List[Dict[str, Any]]) -> None:
+        """Append events; timestamps are clamped so the log stays in time order"""
+        if not events:
+            return
+        index = self._index()
+        last = int(index['ts'][-1]) if len(index) else 0
+        records = np.empty(len(events), dtype=INDEX_DTYPE)
+        fd = os.open(str(self.log_path), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        with os.fdopen(fd, 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            for i, event in enumerate(events):
+                last = max(last, int(event['ts']))
+                event['ts'] = last
+                line = (json.dumps(event, separators=(',', ':')) + '\n').encode()
+                records[i] = (last, offset)
+                f.write(line)
+                offset += len(line)
+        # The log is written first: an index record never points past it.
+        fd = os.open(str(self.index_path), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        with os.fdopen(fd, 'ab') as f:
+            f.write(records.tobytes())
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None,
+              rule: Optional[str] = None, namespace: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Events with ``since <= ts <= until``, oldest first.
+
+        Only the byte span of the log covering the time range is read;
+        *rule* and *namespace* filter within it and *limit* keeps the
+        newest events.
+        """
+        index = self._index()
+        lo = int(np.searchsorted(index['ts'], since, side='left')) if since is not None else 0
+        hi = int(np.searchsorted(index['ts'], until, side='right')) if until is not None else len(index)
+        if lo >= hi:
+            return []
+        start = int(index['offset'][lo])
+        with open(self.log_path, 'rb') as f:
+            f.seek(start)
+            data = f.read(int(index['offset'][hi]) - start) if hi < len(index) else f.read()
+
+        events = []
+        for line in data.splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if rule and event.get('rule') != rule:
+                continue
+            if namespace and event.get('namespace') != namespace:
+                continue
+            events.append(event)
+        return events[-limit:] if limit else events
+
+
+class AlertEvaluator:
+    """
+    Evaluates alert rules and records firing/resolved transitions.
+
+    Evaluation is incremental: a pod is re-tested only when its
+    ``resourceVersion`` changed since the previous call, and each PromQL
+    result is diffed against the alerts already active, so a steady
+    cluster costs one pod list and one query per rule and writes nothing.
+    Active alerts survive restarts in ``state.json``, so a restarted
+    collector does not fire them again.
+
+    An instance is a collector hook: ``collector.hooks.append(evaluator)``.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], k8s=None, prom=None,
+                 history: Optional[AlertHistory] = None, rules_path: Optional[Path] = None):
+        """
+        Args:
+            rules: Parsed rules
+            k8s: KubernetesClient for state rules (None skips them)
+            prom: PrometheusClient for PromQL rules (None skips them)
+            history: Event log (default: ``~/.stars/alerts``)
+            rules_path: Rules file re-read whenever it changes
+        """
+        self.rules = rules
+        self.k8s = k8s
+        self.prom = prom
+        self.history = history if history is not None else AlertHistory()
+        self.rules_path = rules_path
+        self._rules_mtime = self._mtime()
+        # Called with the events of every evaluation that produced any.
+        self.listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+        # pod uid -> (resourceVersion, {(rule, key): value}) from the last pass
+        self._pods: Dict[str, Tuple[str, Dict[Tuple[str, str], Any]]] = {}
+        self._state_path = self.history.root / _STATE
+        self.active: Dict[Tuple[str, str], Dict[str, Any]] = self._load_state()
+
+    def __call__(self, now: float) -> None:
+        self.evaluate(now)
+
+    def _mtime(self) -> Optional[float]:
+        if self.rules_path is None or not Path(self.rules_path).exists():
+            return None
+        return Path(self.rules_path).stat().st_mtime
+
+    def _load_state(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        if not self._state_path.exists():
+            return {}
+        try:
+            with open(self._state_path, 'r') as f:
+                entries = json.load(f)
+            return {(e['rule'], e['key']): e for e in entries}
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Ignoring unreadable alert state {self._state_path}")
+            return {}
+
+    def _reload(self) -> None:
+        mtime = self._mtime()
+        if mtime != self._rules_mtime:
+            self._rules_mtime = mtime
+            self.rules = load_rules(self.rules_path)
+            self._pods.clear()
+            logger.info(f"Reloaded {len(self.rules)} alert rules")
+
+    def _state_matches(self, rules: List[Dict[str, Any]]) -> Optional[Dict[Tuple[str, str], Dict[str, Any]]]:
+        """Pods matching each state rule; only changed pods are re-tested"""
+        scopes = {rule['namespace'] for rule in rules}
+        try:
+            if None in scopes:
+                pods = self.k8s.list_pods(None)
+            else:
+                pods = [pod for ns in sorted(scopes) for pod in self.k8s.list_pods(ns)]
+        except Exception as e:
+            logger.warning(f"Alert pod listing failed: {e}")
+            return None
+
+        seen = {}
+        tested = 0
+        for pod in pods:
+            meta = pod.metadata
+            uid = meta.uid or f"{meta.namespace}/{meta.name}"
+            version = meta.resource_version or ''
+            cached = self._pods.get(uid)
+            if cached is None or cached[0] != version:
+                state = pod_state(pod)
+                key = f"{meta.namespace}/{meta.name}"
+                hits = {}
+                for rule in rules:
+                    if rule['namespace'] in (None, meta.namespace) and _test(rule, state):
+                        hits[(rule['name'], key)] = {'namespace': meta.namespace, 'value': state[rule['field']]}
+                cached = (version, hits)
+                tested += 1
+            seen[uid] = cached
+        self._pods = seen
+        logger.debug(f"Alert pass re-tested {tested} of {len(pods)} pods")
+        return {k: v for _, hits in seen.values() for k, v in hits.items()}
+
+    def _promql_matches(self, rules: List[Dict[str, Any]]) -> Tuple[Dict, set]:
+        """Series returned by each PromQL rule, and the rules whose query failed"""
+        def _run(rule):
+            try:
+                return self.prom.query(rule['condition'])
+            except Exception as e:
+                logger.warning(f"Alert rule {rule['name']} query failed: {e}")
+                return None
+
+        matches, failed = {}, set()
+        for rule, result in zip(rules, self.prom.map(_run, rules)):
+            if result is None:
+                failed.add(rule['name'])
+                continue
+            for series in result:
+                metric = series.get('metric', {})
+                try:
+                    value = float(series['value'][1])
+                except (KeyError, IndexError, TypeError, ValueError):
+                    value = None
+                matches[(rule['name'], series_label(metric))] = {
+                    'namespace': metric.get('namespace', rule['namespace']),
+                    'value': value,
+                }
+        return matches, failed
+
+    def evaluate(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        One evaluation pass.
+
+        Returns:
+            list: ``firing`` and ``resolved`` events written to the history
+        """
+        now = int(now or time.time())
+        self._reload()
+        by_name = {rule['name']: rule for rule in self.rules}
+        state_rules = [r for r in self.rules if r['kind'] == 'state']
+        prom_rules = [r for r in self.rules if r['kind'] == 'promql']
+
+        current: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Rules that could not be evaluated keep their alerts unchanged.
+        skipped = {name for name, rule in by_name.items()
+                   if (rule['kind'] == 'state' and self.k8s is None)
+                   or (rule['kind'] == 'promql' and self.prom is None)}
+        if state_rules and self.k8s is not None:
+            matches = self._state_matches(state_rules)
+            if matches is None:
+                skipped.update(r['name'] for r in state_rules)
+            else:
+                current.update(matches)
+        if prom_rules and self.prom is not None:
+            matches, failed = self._promql_matches(prom_rules)
+            current.update(matches)
+            skipped |= failed
+
+        events = []
+
+        def _event(key, entry, state):
+            rule = by_name.get(key[0], {})
+            events.append({
+                'ts': now, 'rule': key[0], 'key': key[1], 'state': state,
+                'severity': rule.get('severity', entry.get('severity', 'warning')),
+                'namespace': entry.get('namespace'), 'value': entry.get('value'),
+                'since': entry['since'], 'summary': rule.get('summary', ''),
+            })
+
+        changed = False
+        for key in [k for k in self.active if k not in current and k[0] not in skipped]:
+            entry = self.active.pop(key)
+            changed = True
+            if entry['firing']:
+                _event(key, entry, 'resolved')
+        for key, match in current.items():
+            entry = self.active.get(key)
+            if entry is None:
+                entry = self.active[key] = {'rule': key[0], 'key': key[1], 'since': now, 'firing': False}
+                changed = True
+            entry.update(match)
+            if not entry['firing'] and now - entry['since'] >= by_name[key[0]]['for']:
+                entry['firing'] = True
+                entry['severity'] = by_name[key[0]]['severity']
+                changed = True
+                _event(key, entry, 'firing')
+
+        if events:
+            self.history.append(events)
+            for listener in self.listeners:
+                try:
+                    listener(events)
+                except Exception as e:
+                    logger.warning(f"Alert listener failed: {e}")
+        if changed:
+            _write_secure(self._state_path, json.dumps(list(self.active.values())))
+        return events
@@ -0,0 +1,156 @@
+"""Streaming spike detection with constant per-series state"""
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Smoothing factor of the EWMA baseline; ~0.1 gives a memory of about ten
+# samples, long enough to ignore jitter and short enough to follow deploys.
+DEFAULT_ALPHA = 0.1
+# Minimum distance from the baseline, in EWMA standard deviations, before a
+# sample can count as a spike. Stops noisy series from alerting on every
+# percentage threshold crossing.
+DEFAULT_Z = 3.0
+# Samples needed before a series may alert.
+DEFAULT_WARMUP = 5
+# Consecutive calm samples before an active spike is considered over.
+DEFAULT_COOLDOWN = 3
+
+
+class SpikeDetector:
+    """
+    EWMA mean/variance spike detector over many series at once.
+
+    State is a handful of NumPy arrays indexed by series id, so each update
+    is a few vectorised operations regardless of how many series report.
+    A spike is a sample that is both *threshold* percent above the baseline
+    and *z* standard deviations away from it. Alerts are debounced: a series
+    fires once when it enters a spike and re-arms only after *cooldown*
+    calm samples.
+    """
+
+    def __init__(self, threshold: float, alpha: float = DEFAULT_ALPHA, z: float = DEFAULT_Z,
+                 warmup: int = DEFAULT_WARMUP, cooldown: int = DEFAULT_COOLDOWN):
+        """
+        Args:
+            threshold: Minimum rise over the baseline, in percent
+            alpha: EWMA smoothing factor
+            z: Minimum rise in standard deviations
+            warmup: Samples a series needs before it can alert
+            cooldown: Calm samples required to re-arm after a spike
+        """
+        if threshold <= 0:
+            raise ValueError("Spike threshold must be positive")
+        self.threshold = threshold
+        self.alpha = alpha
+        self.z = z
+        self.warmup = warmup
+        self.cooldown = cooldown
+
+        self._index: Dict[str, int] = {}
+        self.names: List[str] = []
+        self._mean = np.zeros(0)
+        self._var = np.zeros(0)
+        self._seen = np.zeros(0, dtype=np.int64)
+        self._active = np.zeros(0, dtype=bool)
+        self._calm = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _ids(self, names: Iterable[str]) -> np.ndarray:
+        index = self._index
+        ids = []
+        for name in names:
+            sid = index.get(name)
+            if sid is None:
+                sid = index[name] = len(self.names)
+                self.names.append(name)
+            ids.append(sid)
+        if len(self.names) > len(self._mean):
+            self._grow(len(self.names))
+        return np.asarray(ids, dtype=np.int64)
+
+    def _grow(self, needed: int) -> None:
+        size = max(needed, 2 * len(self._mean), 64)
+        extra = size - len(self._mean)
+        self._mean = np.concatenate([self._mean, np.zeros(extra)])
+        self._var = np.concatenate([self._var, np.zeros(extra)])
+        self._seen = np.concatenate([self._seen, np.zeros(extra, dtype=np.int64)])
+        self._active = np.concatenate([self._active, np.zeros(extra, dtype=bool)])
+        self._calm = np.concatenate([self._calm, np.zeros(extra, dtype=np.int64)])
+
+    def update(self, names: List[str], values: np.ndarray) -> List[Dict[str, float]]:
+        """
+        Feed one sample per series and return newly started spikes.
+
+        Args:
+            names: Series names; each name should appear at most once
+            values: Sample value per name
+
+        Returns:
+            list: ``{'series', 'value', 'baseline', 'rise', 'score'}`` for every
+                  series that entered a spike on this sample, where ``rise``
+                  is percent over baseline and ``score`` is in std devs
+        """
+        values = np.asarray(values, dtype=np.float64)
+        ok = np.isfinite(values)
+        ids = self._ids(names)[ok]
+        values = values[ok]
+        if not len(ids):
+            return []
+
+        mean, var, seen = self._mean[ids], self._var[ids], self._seen[ids]
+        std = np.sqrt(var)
+        delta = values - mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rise = np.where(mean > 0, delta / mean * 100.0, np.where(delta > 0, np.inf, 0.0))
+            score = np.where(std > 0, delta / std, np.where(delta > 0, np.inf, 0.0))
+
+        spiking = (seen >= self.warmup) & (rise > self.threshold) & (score > self.z)
+        fired = spiking & ~self._active[ids]
+
+        # Debounce: a spike stays active until `cooldown` calm samples in a row.
+        calm = np.where(spiking, 0, self._calm[ids] + 1)
+        self._calm[ids] = calm
+        self._active[ids] = spiking | (self._active[ids] & (calm < self.cooldown))
+
+        # Spikes are clipped before updating the baseline so one outlier does
+        # not drag the mean up and mask the next one. The clip never sits
+        # below the threshold rise, so a flat warmup (std 0) cannot pin the
+        # baseline and a lasting level shift is still absorbed.
+        first = seen == 0
+        bound = mean + np.maximum(self.z * std, np.abs(mean) * self.threshold / 100.0)
+        clipped = np.where(spiking & (bound > mean), bound, values)
+        d = clipped - mean
+        new_mean = np.where(first, values, mean + self.alpha * d)
+        new_var = np.where(first, 0.0, (1 - self.alpha) * (var + self.alpha * d * d))
+        self._mean[ids] = new_mean
+        self._var[ids] = new_var
+        self._seen[ids] = seen + 1
+
+        hits = np.flatnonzero(fired)
+        return [
+            {
+                'series': self.names[ids[i]],
+                'value': float(values[i]),
+                'baseline': float(mean[i]),
+                'rise': float(rise[i]),
+                'score': float(score[i]),
+            }
+            for i in hits
+        ]
+
+    def baseline(self, name: str) -> Optional[Tuple[float, float]]:
+        """(mean, std) of a series, or None if it has not been seen"""
+        sid = self._index.get(name)
+        if sid is None:
+            return None
+        return float(self._mean[sid]), float(np.sqrt(self._var[sid]))
+
+    @property
+    def active(self) -> List[str]:
+        """Series currently inside a spike"""
+        return [self.names[i] for i in np.flatnonzero(self._active[:len(self.names)])]
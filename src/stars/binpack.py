@@ -0,0 +1,376 @@
+"""Array-encoded cluster state: scheduler-fit simulation and node pressure"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .quantity import parse_quantity, pod_request, pod_resource_totals, metric_usage
+
+logger = logging.getLogger(__name__)
+
+# Resource columns of every capacity matrix. A pod always needs one pod slot.
+RESOURCES = ('cpu', 'memory', 'pods', 'ephemeral-storage')
+
+# Verdict codes, in the order kube-scheduler filters nodes: a node reports
+# the first constraint it fails.
+FITS = 0
+UNSCHEDULABLE = 1
+SELECTOR = 2
+TAINT = 3
+REASONS = {
+    FITS: 'fits',
+    UNSCHEDULABLE: 'node is cordoned',
+    SELECTOR: "didn't match node selector/affinity",
+    TAINT: 'untolerated taint',
+    4: 'too many pods',
+    5: 'insufficient cpu',
+    6: 'insufficient memory',
+    7: 'insufficient ephemeral-storage',
+}
+_RESOURCE_CODES = (5, 6, 4, 7)        # RESOURCES order -> verdict code
+
+_BLOCKING_EFFECTS = ('NoSchedule', 'NoExecute')
+_UNSCHEDULABLE_TAINT = 'node.kubernetes.io/unschedulable'
+_TERMINAL_PHASES = ('Succeeded', 'Failed')
+
+
+def _taint_key(taint) -> Tuple[str, str, str]:
+    return (taint.key or '', taint.value or '', taint.effect or '')
+
+
+def format_taint(taint: Tuple[str, str, str]) -> str:
+    key, value, effect = taint
+    return f"{key}={value}:{effect}" if value else f"{key}:{effect}"
+
+
+def _tolerates(toleration, taint: Tuple[str, str, str]) -> bool:
+    """Kubernetes toleration matching for one taint"""
+    key, value, effect = taint
+    if toleration.effect and toleration.effect != effect:
+        return False
+    if (toleration.operator or 'Equal') == 'Exists':
+        return not toleration.key or toleration.key == key
+    return toleration.key == key and (toleration.value or '') == value
+
+
+def pod_requests(pod) -> np.ndarray:
+    """Request vector of a pod (or pod template) in RESOURCES order"""
+    cpu, memory, _, _ = pod_resource_totals(pod)
+    return np.array([cpu, memory, 1.0, pod_request(pod, 'ephemeral-storage')])
+
+
+def pod_limits(pod) -> np.ndarray:
+    """Limit vector of a pod in RESOURCES order (pods column is always 0)"""
+    _, _, cpu, memory = pod_resource_totals(pod)
+    storage = sum(parse_quantity(str(((c.resources.limits if c.resources else None) or {})
+                                     .get('ephemeral-storage', 0)))
+                  for c in pod.spec.containers or [])
+    return np.array([cpu, memory, 0.0, storage])
+
+
+class ClusterModel:
+    """
+    Nodes as arrays: capacity and usage matrices, plus boolean label and
+    taint incidence matrices so that selector, affinity and toleration
+    checks for one pod shape are column operations over every node.
+    """
+
+    def __init__(self, nodes: List[Any], pods: List[Any]):
+        """
+        Args:
+            nodes: V1Node objects
+            pods: Every pod in the cluster; non-terminal pods bound to a node
+                  count against its allocatable
+        """
+        self.names = [n.metadata.name for n in nodes]
+        index = {name: i for i, name in enumerate(self.names)}
+        n = len(nodes)
+
+        self.allocatable = np.zeros((n, len(RESOURCES)))
+        for i, node in enumerate(nodes):
+            alloc = (node.status.allocatable if node.status else None) or {}
+            for j, res in enumerate(RESOURCES):
+                try:
+                    self.allocatable[i, j] = parse_quantity(str(alloc.get(res, 0)))
+                except ValueError:
+                    logger.debug(f"Invalid {res} allocatable on {node.metadata.name}")
+
+        # Pod-by-node index: one row per bound, non-terminal pod.
+        self.used = np.zeros_like(self.allocatable)
+        self.limits = np.zeros_like(self.allocatable)
+        bound = [(index.get(p.spec.node_name), p) for p in pods
+                 if p.spec.node_name and (p.status.phase if p.status else None) not in _TERMINAL_PHASES]
+        bound = [(i, p) for i, p in bound if i is not None]
+        self.pod_node = np.array([i for i, _ in bound], dtype=np.int64)
+        if bound:
+            np.add.at(self.used, self.pod_node, np.array([pod_requests(p) for _, p in bound]))
+            np.add.at(self.limits, self.pod_node, np.array([pod_limits(p) for _, p in bound]))
+
+        self.unschedulable = np.array([bool(node.spec.unschedulable) for node in nodes], dtype=bool)
+
+        # Label incidence: (key, value) pairs and bare keys.
+        labels = [node.metadata.labels or {} for node in nodes]
+        self._label_values = labels
+        self._pair_col: Dict[Tuple[str, str], int] = {}
+        self._key_col: Dict[str, int] = {}
+        pair_cells, key_cells = [], []
+        for i, node_labels in enumerate(labels):
+            for k, v in node_labels.items():
+                pair_cells.append((i, self._pair_col.setdefault((k, v), len(self._pair_col))))
+                key_cells.append((i, self._key_col.setdefault(k, len(self._key_col))))
+        self.label_matrix = np.zeros((n, len(self._pair_col)), dtype=bool)
+        self.key_matrix = np.zeros((n, len(self._key_col)), dtype=bool)
+        if pair_cells:
+            r, c = np.array(pair_cells).T
+            self.label_matrix[r, c] = True
+            r, c = np.array(key_cells).T
+            self.key_matrix[r, c] = True
+
+        # Taint incidence, blocking effects only.
+        self.taints: List[Tuple[str, str, str]] = []
+        taint_col: Dict[Tuple[str, str, str], int] = {}
+        cells = []
+        for i, node in enumerate(nodes):
+            for taint in node.spec.taints or []:
+                key = _taint_key(taint)
+                if key[2] in _BLOCKING_EFFECTS:
+                    cells.append((i, taint_col.setdefault(key, len(taint_col))))
+        self.taints = list(taint_col)
+        self.taint_matrix = np.zeros((n, len(self.taints)), dtype=bool)
+        if cells:
+            r, c = np.array(cells).T
+            self.taint_matrix[r, c] = True
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def pressure(self, node_metrics: Optional[List[Dict[str, Any]]] = None) -> Dict[str, np.ndarray]:
+        """
+        Requested, limit and live-usage ratios against allocatable.
+
+        Args:
+            node_metrics: metrics.k8s.io node items (optional)
+
+        Returns:
+            dict: ``requested`` and ``limits`` (nodes x RESOURCES), ``usage``
+                  (nodes x [cpu, memory], NaN without metrics) and ``score``,
+                  the worst ratio per node
+        """
+        usage = np.full((len(self), 2), np.nan)
+        if node_metrics:
+            index = {name: i for i, name in enumerate(self.names)}
+            for item in node_metrics:
+                i = index.get(item.get('metadata', {}).get('name'))
+                if i is not None:
+                    usage[i] = metric_usage({'containers': [item]})
+
+        alloc = np.where(self.allocatable > 0, self.allocatable, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            requested = self.used / alloc
+            limits = self.limits / alloc
+            used = usage / alloc[:, :2]
+        score = np.fmax(np.nanmax(np.where(np.isnan(requested), -np.inf, requested), axis=1),
+                        np.nanmax(np.where(np.isnan(used), -np.inf, used), axis=1))
+        return {
+            'requested': requested,
+            'limits': limits,
+            'usage': used,
+            'score': np.where(np.isfinite(score), score, np.nan),
+        }
+
+    @property
+    def free(self) -> np.ndarray:
+        return self.allocatable - self.used
+
+    # -- per pod-shape constraint masks -------------------------------------
+
+    def _pairs(self, key: str, values) -> np.ndarray:
+        cols = [self._pair_col[(key, v)] for v in values or [] if (key, v) in self._pair_col]
+        if not cols:
+            return np.zeros(len(self), dtype=bool)
+        return self.label_matrix[:, cols].any(axis=1)
+
+    def _has_key(self, key: str) -> np.ndarray:
+        col = self._key_col.get(key)
+        return self.key_matrix[:, col] if col is not None else np.zeros(len(self), dtype=bool)
+
+    def _expression(self, expr, field: bool = False) -> np.ndarray:
+        op = expr.operator
+        if field:
+            # matchFields only supports metadata.name with In/NotIn.
+            hit = np.isin(self.names, expr.values or [])
+            return hit if op == 'In' else ~hit
+        if op == 'In':
+            return self._pairs(expr.key, expr.values)
+        if op == 'NotIn':
+            return ~self._pairs(expr.key, expr.values)
+        if op == 'Exists':
+            return self._has_key(expr.key)
+        if op == 'DoesNotExist':
+            return ~self._has_key(expr.key)
+        if op in ('Gt', 'Lt'):
+            bound = int((expr.values or ['0'])[0])
+
+            def _cmp(labels):
+                try:
+                    value = int(labels[expr.key])
+                except (KeyError, ValueError):
+                    return False
+                return value > bound if op == 'Gt' else value < bound
+            return np.array([_cmp(labels) for labels in self._label_values], dtype=bool)
+        logger.debug(f"Unknown node selector operator {op!r}")
+        return np.zeros(len(self), dtype=bool)
+
+    def selector_mask(self, spec) -> np.ndarray:
+        """Nodes matching nodeSelector and required node affinity"""
+        mask = np.ones(len(self), dtype=bool)
+        for key, value in (spec.node_selector or {}).items():
+            mask &= self._pairs(key, [value])
+
+        affinity = getattr(spec, 'affinity', None)
+        node_affinity = getattr(affinity, 'node_affinity', None) if affinity else None
+        required = getattr(node_affinity, 'required_during_scheduling_ignored_during_execution', None)
+        terms = (required.node_selector_terms or []) if required else []
+        if terms:
+            # Terms are ORed; expressions inside a term are ANDed.
+            any_term = np.zeros(len(self), dtype=bool)
+            for term in terms:
+                term_mask = np.ones(len(self), dtype=bool)
+                for expr in term.match_expressions or []:
+                    term_mask &= self._expression(expr)
+                for expr in term.match_fields or []:
+                    term_mask &= self._expression(expr, field=True)
+                any_term |= term_mask
+            mask &= any_term
+        return mask
+
+    def untolerated(self, spec) -> np.ndarray:
+        """(nodes x taints) matrix of blocking taints the pod does not tolerate"""
+        tolerations = spec.tolerations or []
+        tolerated = np.array([any(_tolerates(t, taint) for t in tolerations) for taint in self.taints],
+                             dtype=bool)
+        return self.taint_matrix & ~tolerated
+
+    def _tolerates_cordon(self, spec) -> bool:
+        return any(_tolerates(t, (_UNSCHEDULABLE_TAINT, '', 'NoSchedule')) for t in spec.tolerations or [])
+
+    # -- evaluation ----------------------------------------------------------
+
+    def verdicts(self, pod, free: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Check one pod (or pod template) against every node.
+
+        Returns:
+            dict: ``requests`` vector, per-node ``code`` (see REASONS),
+                  ``taint`` index of the first untolerated taint per node
+                  (-1 if none) and ``capacity``: how many copies of the pod
+                  each node could still take
+        """
+        spec = pod.spec
+        free = self.free if free is None else free
+        req = pod_requests(pod)
+
+        cordoned = self.unschedulable & (not self._tolerates_cordon(spec))
+        selector = self.selector_mask(spec)
+        blocking = self.untolerated(spec)
+        tainted = blocking.any(axis=1)
+        short = free < req[None, :]
+
+        # Assign from the last check to the first so the earliest failing
+        # constraint wins.
+        code = np.zeros(len(self), dtype=np.int8)
+        for j in np.argsort(_RESOURCE_CODES)[::-1]:
+            code[short[:, j]] = _RESOURCE_CODES[j]
+        code[tainted] = TAINT
+        code[~selector] = SELECTOR
+        code[cordoned] = UNSCHEDULABLE
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            per_resource = np.where(req > 0, np.floor(free / np.where(req > 0, req, 1)), np.inf)
+        capacity = np.where(code == FITS, per_resource.min(axis=1), 0)
+        capacity = np.maximum(capacity, 0)
+
+        taint = np.where(tainted, blocking.argmax(axis=1), -1) if self.taints else np.full(len(self), -1)
+        return {'requests': req, 'code': code, 'taint': taint, 'capacity': capacity}
+
+    def explain(self, verdict: Dict[str, np.ndarray]) -> List[Tuple[int, str]]:
+        """
+        Group non-fitting nodes by blocking constraint, scheduler style.
+
+        Returns:
+            list: (node count, reason) pairs, most common first
+        """
+        code, taint = verdict['code'], verdict['taint']
+        groups: Dict[str, int] = {}
+        for c in np.unique(code[code != FITS]).tolist():
+            if c == TAINT:
+                idx, counts = np.unique(taint[code == TAINT], return_counts=True)
+                for t, k in zip(idx.tolist(), counts.tolist()):
+                    label = f"{REASONS[TAINT]} {format_taint(self.taints[t])}"
+                    groups[label] = groups.get(label, 0) + k
+            else:
+                groups[REASONS[c]] = int((code == c).sum())
+        return sorted(((k, reason) for reason, k in groups.items()), reverse=True)
+
+    def pending_report(self, pods: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Evaluate pending pods against current free capacity.
+
+        Pods with identical scheduling shape are evaluated once, so thousands
+        of replicas of a few workloads cost a few vectorised passes.
+        """
+        cache: Dict[str, Dict[str, np.ndarray]] = {}
+        report = []
+        for pod in pods:
+            key = _shape_key(pod)
+            verdict = cache.get(key)
+            if verdict is None:
+                verdict = cache[key] = self.verdicts(pod)
+            report.append({'pod': pod, 'verdict': verdict, 'shape': key})
+        return report
+
+    def scale_capacity(self, template, extra: int) -> Dict[str, Any]:
+        """
+        How many more copies of *template* fit, and where.
+
+        Copies are identical, so the cluster can take the sum over nodes of
+        each node's own capacity (topology spread and pod anti-affinity are
+        not modelled).
+        """
+        verdict = self.verdicts(template)
+        capacity = verdict['capacity']
+        finite = np.where(np.isfinite(capacity), capacity, 0)
+        total = int(finite.sum())
+        order = np.argsort(-finite, kind='stable')
+        placed = np.zeros(len(self), dtype=np.int64)
+        remaining = max(extra, 0)
+        # Nodes with the most room first, roughly what LeastAllocated scoring does.
+        for i in order.tolist():
+            if remaining <= 0 or finite[i] <= 0:
+                break
+            take = int(min(finite[i], remaining))
+            placed[i] = take
+            remaining -= take
+        return {
+            'verdict': verdict,
+            'fits': min(total, max(extra, 0)),
+            'capacity': total,
+            'unplaced': remaining,
+            'placed': placed,
+        }
+
+
+def _shape_key(pod) -> str:
+    """Everything the filters look at, as a hashable string"""
+    spec = pod.spec
+    affinity = getattr(getattr(spec, 'affinity', None), 'node_affinity', None)
+    required = getattr(affinity, 'required_during_scheduling_ignored_during_execution', None)
+    tolerations = sorted(
+        (t.key or '', t.operator or '', t.value or '', t.effect or '') for t in spec.tolerations or []
+    )
+    return repr((
+        tuple(pod_requests(pod).tolist()),
+        sorted((spec.node_selector or {}).items()),
+        str(required) if required else '',
+        tolerations,
+    ))
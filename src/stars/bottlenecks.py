@@ -0,0 +1,142 @@
+"""Bottleneck detection from cAdvisor and node-exporter saturation signals"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Every signal: which entity it describes, the label naming that entity,
+# the PromQL template, the value at which it becomes a bottleneck and how
+# to render it. Templates receive the namespace selector and rate window.
+SIGNALS: Dict[str, Dict[str, Any]] = {
+    'cpu_throttling': {
+        'scope': 'pod', 'label': 'pod', 'threshold': 0.25, 'unit': 'ratio',
+        'title': 'CPU throttled',
+        'query': ('sum by (pod) (rate(container_cpu_cfs_throttled_periods_total{{{sel}}}[{window}]))'
+                  ' / sum by (pod) (rate(container_cpu_cfs_periods_total{{{sel}}}[{window}]))'),
+    },
+    'memory_limit': {
+        'scope': 'pod', 'label': 'pod', 'threshold': 0.9, 'unit': 'ratio',
+        'title': 'Memory near limit',
+        'query': ('max by (pod) (container_memory_working_set_bytes{{{sel}}}'
+                  ' / on (namespace, pod, container) (container_spec_memory_limit_bytes{{{sel}}} > 0))'),
+    },
+    'network_drops': {
+        'scope': 'pod', 'label': 'pod', 'threshold': 1.0, 'unit': 'pps',
+        'title': 'Packets dropped',
+        'query': ('sum by (pod) (rate(container_network_receive_packets_dropped_total{{{ns}}}[{window}]))'
+                  ' + sum by (pod) (rate(container_network_transmit_packets_dropped_total{{{ns}}}[{window}]))'),
+    },
+    'disk_io': {
+        'scope': 'pod', 'label': 'pod', 'threshold': 0.5, 'unit': 'ratio',
+        'title': 'Disk IO busy',
+        'query': 'sum by (pod) (rate(container_fs_io_time_seconds_total{{{sel}}}[{window}]))',
+    },
+    'node_cpu': {
+        'scope': 'node', 'label': 'instance', 'threshold': 0.9, 'unit': 'ratio',
+        'title': 'Node CPU saturated',
+        'query': '1 - avg by (instance) (rate(node_cpu_seconds_total{{mode="idle"}}[{window}]))',
+    },
+    'node_memory': {
+        'scope': 'node', 'label': 'instance', 'threshold': 0.9, 'unit': 'ratio',
+        'title': 'Node memory saturated',
+        'query': '1 - node_memory_MemAvailable_bytes / node_memory_MemTotal_bytes',
+    },
+    'node_iowait': {
+        'scope': 'node', 'label': 'instance', 'threshold': 0.1, 'unit': 'ratio',
+        'title': 'Node IO wait',
+        'query': 'avg by (instance) (rate(node_cpu_seconds_total{{mode="iowait"}}[{window}]))',
+    },
+    'node_network_drops': {
+        'scope': 'node', 'label': 'instance', 'threshold': 1.0, 'unit': 'pps',
+        'title': 'Node packets dropped',
+        'query': ('sum by (instance) (rate(node_network_receive_drop_total[{window}]))'
+                  ' + sum by (instance) (rate(node_network_transmit_drop_total[{window}]))'),
+    },
+}
+
+
+def build_queries(namespace: Optional[str], window: str = '5m') -> Dict[str, str]:
+    """Render every signal's PromQL for *namespace* (None = all namespaces)"""
+    ns = f'namespace="{namespace}"' if namespace else ''
+    sel = (ns + ',' if ns else '') + 'container!="",container!="POD"'
+    return {name: spec['query'].format(sel=sel, ns=ns, window=window) for name, spec in SIGNALS.items()}
+
+
+def collect_signals(fetch: Callable[[str], List[Dict[str, Any]]], queries: Dict[str, str],
+                    max_workers: int = 8) -> Dict[str, Dict[str, float]]:
+    """
+    Run every query concurrently.
+
+    Args:
+        fetch: Callable running an instant query and returning the result vector
+        queries: Signal name -> PromQL
+        max_workers: Concurrent requests
+
+    Returns:
+        dict: Signal name -> {entity: value}; signals whose query failed are
+              missing (e.g. node-exporter not installed)
+    """
+    def _run(item):
+        name, query = item
+        try:
+            return name, fetch(query)
+        except Exception as e:
+            logger.warning(f"Bottleneck query {name} failed: {e}")
+            return name, None
+
+    signals = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries)))) as pool:
+        for name, result in pool.map(_run, queries.items()):
+            if result is None:
+                continue
+            label = SIGNALS[name]['label']
+            values = {}
+            for series in result:
+                try:
+                    value = float(series['value'][1])
+                except (KeyError, IndexError, TypeError, ValueError):
+                    continue
+                if np.isfinite(value):
+                    values[series.get('metric', {}).get(label, '')] = value
+            signals[name] = values
+    return signals
+
+
+def rank(signals: Dict[str, Dict[str, float]], thresholds: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+    """
+    Turn raw signals into findings ranked by severity.
+
+    Severity is the value divided by its threshold, so signals with
+    different units rank on one scale; anything below 1 is not a finding.
+
+    Returns:
+        list: ``{'signal', 'scope', 'entity', 'value', 'severity'}`` sorted by
+              severity, most severe first
+    """
+    thresholds = thresholds or {}
+    names, entities, values, limits = [], [], [], []
+    for name, per_entity in signals.items():
+        limit = thresholds.get(name, SIGNALS[name]['threshold'])
+        for entity, value in per_entity.items():
+            names.append(name)
+            entities.append(entity)
+            values.append(value)
+            limits.append(limit)
+    if not values:
+        return []
+
+    severity = np.asarray(values) / np.asarray(limits)
+    order = np.argsort(-severity, kind='stable')
+    return [
+        {
+            'signal': names[i],
+            'scope': SIGNALS[names[i]]['scope'],
+            'entity': entities[i],
+            'value': values[i],
+            'severity': float(severity[i]),
+        }
+        for i in order.tolist() if severity[i] >= 1.0
+    ]
@@ -2,7 +2,7 @@
 import typer
 import logging
 import sys
-from typing import Optional
+from typing import List, Optional
 from rich.console import Console
 
 from .commands import MonitoringCommands
@@ -65,12 +65,13 @@ console = Console()
 @app.command()
 def health(
     namespace: Optional[str] = typer.Option(None, "--namespace", "-n", help="Filter by namespace"),
-    no_ai: bool = typer.Option(False, "--no-ai", help="Disable AI analysis (no data sent externally)")
+    no_ai: bool = typer.Option(False, "--no-ai", help="Disable AI analysis (no data sent externally)"),
+    ai_timeout: float = typer.Option(None, "--ai-timeout", help="Seconds to wait for the AI answer (default: ai.timeout, 30)")
 ):
     """Check cluster health"""
     try:
         cmd = MonitoringCommands()
-        cmd.health_check(namespace, allow_ai=not no_ai)
+        cmd.health_check(namespace, allow_ai=not no_ai, ai_timeout=ai_timeout)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -91,12 +92,13 @@ def pods(namespace: Optional[str] = typer.Option(None, "--namespace", "-n", help
 def diagnose(
     pod_name: str = typer.Argument(..., help="Name of the pod to diagnose"),
     namespace: str = typer.Option("default", "--namespace", "-n", help="Kubernetes namespace"),
-    no_ai: bool = typer.Option(False, "--no-ai", help="Disable AI analysis (no data sent externally)")
+    no_ai: bool = typer.Option(False, "--no-ai", help="Disable AI analysis (no data sent externally)"),
+    ai_timeout: float = typer.Option(None, "--ai-timeout", help="Seconds to wait for the AI answer (default: ai.timeout, 30)")
 ):
     """Diagnose pod issues and get AI-powered recommendations"""
     try:
         cmd = MonitoringCommands()
-        cmd.diagnose_pod(pod_name, namespace, allow_ai=not no_ai)
+        cmd.diagnose_pod(pod_name, namespace, allow_ai=not no_ai, ai_timeout=ai_timeout)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -409,13 +411,20 @@ def describe(
 
 @app.command()
 def top(
+    target: str = typer.Argument("pods", help="What to rank: pods or nodes"),
     namespace: str = typer.Option("default", "--namespace", "-n", help="Kubernetes namespace"),
-    limit: int = typer.Option(10, "--limit", "-l", help="Number of pods to show")
+    limit: int = typer.Option(10, "--limit", "-l", help="Number of rows to show")
 ):
-    """Show top resource-consuming pods"""
+    """Show top resource-consuming pods or nodes under most pressure"""
+    if target not in ("pods", "pod", "nodes", "node"):
+        print_error(f"Unknown target: {target}. Use 'pods' or 'nodes'")
+        raise typer.Exit(1)
     try:
         cmd = MonitoringCommands()
-        cmd.top_pods(namespace, limit)
+        if target.startswith("node"):
+            cmd.top_nodes(limit)
+        else:
+            cmd.top_pods(namespace, limit)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -595,11 +604,30 @@ def crashloop(namespace: str = typer.Option("default", "--namespace", "-n", help
 
 
 @app.command()
-def pending(namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace")):
-    """Find pending pods"""
+def pending(
+    namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace"),
+    all_namespaces: bool = typer.Option(False, "--all-namespaces", "-A", help="All namespaces"),
+    pod: str = typer.Option(None, "--pod", "-p", help="Show per-node verdicts for one pod")
+):
+    """Find pending pods and where they could fit"""
     try:
         cmd = MonitoringCommands()
-        cmd.find_pending(namespace)
+        cmd.find_pending(None if all_namespaces else namespace, pod)
+    except Exception as e:
+        print_error(f"Command failed: {e}")
+        raise typer.Exit(1)
+
+
+@app.command()
+def what_if(
+    deployment: str = typer.Argument(..., help="Deployment name"),
+    replicas: int = typer.Argument(..., help="Target replica count"),
+    namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace")
+):
+    """Simulate scaling a deployment against free cluster capacity"""
+    try:
+        cmd = MonitoringCommands()
+        cmd.what_if_scale(deployment, replicas, namespace)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -686,11 +714,15 @@ def network(namespace: str = typer.Option("default", "--namespace", "-n", help="
 
 
 @app.command()
-def cost(namespace: str = typer.Option(None, "--namespace", "-n", help="Namespace")):
+def cost(
+    namespace: str = typer.Option(None, "--namespace", "-n", help="Namespace"),
+    by: str = typer.Option("namespace", "--by", "-b", help="Group by namespace, owner, node or label:<key>"),
+    hours: int = typer.Option(24, "--hours", "-H", help="Average stored usage over this many hours")
+):
     """Estimate resource costs"""
     try:
         cmd = MonitoringCommands()
-        cmd.estimate_cost(namespace)
+        cmd.estimate_cost(namespace, by, hours)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -903,35 +935,50 @@ def aggregate_logs(
 @app.command()
 def alert(
     name: str = typer.Argument(..., help="Alert name"),
-    condition: str = typer.Argument(..., help="Alert condition"),
-    namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace")
+    condition: str = typer.Argument(..., help="PromQL, or pod state: 'restarts > 5', 'phase == Pending', 'reason == CrashLoopBackOff', 'oom'"),
+    namespace: str = typer.Option(None, "--namespace", "-n", help="Namespace (pod state conditions; default: all)"),
+    hold: str = typer.Option(None, "--for", help="How long the condition must hold before firing (e.g. 5m)"),
+    severity: str = typer.Option("warning", "--severity", help="info, warning or critical")
 ):
-    """Create an alert rule"""
+    """Create an alert rule (evaluated by 'stars collect')"""
     try:
         cmd = MonitoringCommands()
-        cmd.create_alert(name, condition, namespace)
+        cmd.create_alert(name, condition, namespace, hold, severity)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
 
 
 @app.command()
-def alert_history(namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace")):
+def alert_history(
+    namespace: str = typer.Option(None, "--namespace", "-n", help="Namespace"),
+    since: str = typer.Option("24h", "--since", help="Show events newer than this (e.g. 1h, 7d)"),
+    until: str = typer.Option(None, "--until", help="Show events older than this"),
+    rule: str = typer.Option(None, "--rule", help="Only this rule"),
+    limit: int = typer.Option(50, "--limit", "-l", help="Newest events to show")
+):
     """Show alert history"""
     try:
         cmd = MonitoringCommands()
-        cmd.show_alert_history(namespace)
+        cmd.show_alert_history(namespace, since, until, rule, limit)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
 
 
 @app.command()
-def alert_webhook(url: str = typer.Argument(..., help="Webhook URL")):
-    """Configure alert webhook"""
+def alert_webhook(
+    url: str = typer.Argument(None, help="Webhook URL (omit to list targets and queues)"),
+    name: str = typer.Option("default", "--name", help="Target name"),
+    batch_size: int = typer.Option(None, "--batch-size", help="Most alerts per POST (default 100)"),
+    remove: bool = typer.Option(False, "--remove", help="Remove the named target"),
+    test: bool = typer.Option(False, "--test", help="Send a test alert and wait for delivery"),
+    retry_dead: bool = typer.Option(False, "--retry-dead", help="Requeue dead-lettered batches")
+):
+    """Configure alert webhooks (delivered by 'stars collect')"""
     try:
         cmd = MonitoringCommands()
-        cmd.configure_webhook(url)
+        cmd.configure_webhook(url, name, batch_size, remove, test, retry_dead)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -980,7 +1027,7 @@ def privacy(
         elif action == "revoke":
             revoke_ai_consent()
             print_success("AI consent revoked")
-            print_info("No data will be sent to external AI services")
+            print_info("No data will be sent to external AI services; cached AI answers were deleted")
             print_info("Use --no-ai flag or 'tars privacy grant' to re-enable")
         
         elif action == "grant":
@@ -1015,11 +1062,14 @@ def blast(
 
 
 @app.command()
-def bottleneck(namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace")):
+def bottleneck(
+    namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace"),
+    url: str = typer.Option(None, "--url", help="Prometheus URL")
+):
     """Find performance bottlenecks"""
     try:
         cmd = MonitoringCommands()
-        cmd.find_bottlenecks(namespace)
+        cmd.find_bottlenecks(namespace, url)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -1137,14 +1187,15 @@ def dashboard(namespace: str = typer.Option("default", "--namespace", "-n", help
 
 @app.command()
 def forecast(
-    resource: str = typer.Argument(..., help="Resource to forecast"),
+    resource: str = typer.Argument(..., help="Resource to forecast (cpu, memory or a recording rule)"),
     days: int = typer.Option(7, "--days", "-d", help="Days to forecast"),
-    namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace")
+    namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace"),
+    url: str = typer.Option(None, "--url", help="Prometheus URL")
 ):
     """Forecast resource usage"""
     try:
         cmd = MonitoringCommands()
-        cmd.forecast_usage(resource, days, namespace)
+        cmd.forecast_usage(resource, days, namespace, url)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -1163,13 +1214,16 @@ def god():
 
 @app.command()
 def heatmap(
-    metric: str = typer.Argument(..., help="Metric to visualize"),
-    namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace")
+    metric: str = typer.Argument(..., help="Metric to visualize (cpu, memory, restarts or a recording rule)"),
+    namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace (with --by pod)"),
+    by: str = typer.Option("node", "--by", "-b", help="Rows: node, namespace or pod (any label for a recording rule)"),
+    hours: int = typer.Option(24, "--hours", "-H", help="Time window in hours"),
+    url: str = typer.Option(None, "--url", help="Prometheus URL")
 ):
     """Generate resource heatmap"""
     try:
         cmd = MonitoringCommands()
-        cmd.generate_heatmap(metric, namespace)
+        cmd.generate_heatmap(metric, namespace, by, hours, url)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -1251,12 +1305,21 @@ def prom_metrics(url: str = typer.Option(None, "--url", help="Prometheus URL")):
 @app.command()
 def prom_query(
     query: str = typer.Argument(..., help="PromQL query"),
+    range_: str = typer.Option(None, "--range", "-r", help="Range query over this duration ending now (e.g. 1h, 30d)"),
+    step: str = typer.Option(None, "--step", "-s", help="Range query resolution (e.g. 1m; default: range/1000, min 15s)"),
+    output: str = typer.Option(None, "--output", "-o", help="Write samples to a file instead of printing"),
+    format: str = typer.Option(None, "--format", "-f", help="Output file format (csv, ndjson; default: from suffix)"),
+    limit: int = typer.Option(30, "--limit", "-l", help="Series to print"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the range result cache"),
     url: str = typer.Option(None, "--url", help="Prometheus URL")
 ):
-    """Execute Prometheus query"""
+    """Execute Prometheus instant or range query"""
+    if format and format not in ('csv', 'ndjson'):
+        print_error("--format must be 'csv' or 'ndjson'")
+        raise typer.Exit(1)
     try:
         cmd = MonitoringCommands()
-        cmd.execute_prom_query(query, url)
+        cmd.execute_prom_query(query, url, range_, step, output, format, limit, not no_cache)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -1286,13 +1349,20 @@ def prom_dashboard(url: str = typer.Option(None, "--url", help="Prometheus URL")
 
 @app.command()
 def prom_export(
-    output: str = typer.Argument(..., help="Output file"),
+    output: str = typer.Argument(..., help="Output directory (columnar) or .parquet file"),
+    query: Optional[List[str]] = typer.Option(None, "--query", "-q", help="PromQL selector to export (repeatable)"),
+    range_: str = typer.Option("1h", "--range", "-r", help="Duration to export, ending now (e.g. 7d)"),
+    step: str = typer.Option(None, "--step", "-s", help="Resolution (e.g. 1m; default: range/1000, min 15s)"),
+    format: str = typer.Option(None, "--format", "-f", help="columnar or parquet (default: from suffix)"),
     url: str = typer.Option(None, "--url", help="Prometheus URL")
 ):
-    """Export Prometheus data"""
+    """Export Prometheus range data to compact columnar files"""
+    if format and format not in ('columnar', 'parquet'):
+        print_error("--format must be 'columnar' or 'parquet'")
+        raise typer.Exit(1)
     try:
         cmd = MonitoringCommands()
-        cmd.export_prom_data(output, url)
+        cmd.export_prom_data(output, url, query, range_, step, format)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -1302,12 +1372,18 @@ def prom_export(
 def prom_compare(
     metric1: str = typer.Argument(..., help="First metric"),
     metric2: str = typer.Argument(..., help="Second metric"),
-    url: str = typer.Option(None, "--url", help="Prometheus URL")
+    range_: str = typer.Option("1h", "--range", "-r", help="Window ending now (e.g. 6h)"),
+    step: str = typer.Option(None, "--step", "-s", help="Alignment step (default: range/500, min 15s)"),
+    on: str = typer.Option(None, "--on", help="Comma-separated labels to pair series on"),
+    max_lag: str = typer.Option("10m", "--max-lag", help="Largest lag searched for correlation"),
+    limit: int = typer.Option(20, "--limit", "-l", help="Pairs to show"),
+    url: str = typer.Option(None, "--url", help="Prometheus URL"),
+    export: str = typer.Option(None, "--export", help="Read both queries from a 'stars prom-export' output instead")
 ):
-    """Compare Prometheus metrics"""
+    """Compare Prometheus metrics (correlation, lag, divergence)"""
     try:
         cmd = MonitoringCommands()
-        cmd.compare_prom_metrics(metric1, metric2, url)
+        cmd.compare_prom_metrics(metric1, metric2, url, range_, step, on, max_lag, limit, export)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -1315,14 +1391,34 @@ def prom_compare(
 
 @app.command()
 def prom_record(
-    name: str = typer.Argument(..., help="Recording rule name"),
-    query: str = typer.Argument(..., help="PromQL query"),
+    name: str = typer.Argument(None, help="Recording rule name (omit to list rules)"),
+    query: str = typer.Argument(None, help="PromQL query"),
+    interval: str = typer.Option(None, "--interval", "-i", help="Record at most this often (e.g. 5m; default: every sample)"),
+    remove: bool = typer.Option(False, "--remove", help="Remove the rule"),
+    from_slos: bool = typer.Option(False, "--from-slos", help="Record the SLI expressions of every configured SLO"),
+    url: str = typer.Option(None, "--url", help="Prometheus URL")
+):
+    """Create, remove or list recording rules evaluated by 'stars collect'"""
+    try:
+        cmd = MonitoringCommands()
+        cmd.create_prom_recording(name, query, url, interval, remove, from_slos)
+    except Exception as e:
+        print_error(f"Command failed: {e}")
+        raise typer.Exit(1)
+
+
+@app.command()
+def collect(
+    interval: int = typer.Option(None, "--interval", "-i", help="Seconds between samples (default: config interval)"),
+    namespace: str = typer.Option(None, "--namespace", "-n", help="Namespace to sample (default: all)"),
+    prom_query: Optional[List[str]] = typer.Option(None, "--prom-query", "-q", help="PromQL query to record (repeatable)"),
+    iterations: int = typer.Option(None, "--iterations", help="Stop after N samples"),
     url: str = typer.Option(None, "--url", help="Prometheus URL")
 ):
-    """Create Prometheus recording rule"""
+    """Sample metrics into the local time-series store (~/.stars/tsdb)"""
     try:
         cmd = MonitoringCommands()
-        cmd.create_prom_recording(name, query, url)
+        cmd.collect_metrics(interval or config.settings.interval, namespace, prom_query, url, iterations)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -1368,22 +1464,28 @@ def runbook(
 
 
 @app.command()
-def sli(namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace")):
-    """Show Service Level Indicators"""
+def sli(
+    namespace: str = typer.Option(None, "--namespace", "-n", help="Only SLOs of this namespace"),
+    url: str = typer.Option(None, "--url", help="Prometheus URL")
+):
+    """Show Service Level Indicators (SLOs from ~/.stars/config.yaml)"""
     try:
         cmd = MonitoringCommands()
-        cmd.show_sli(namespace)
+        cmd.show_sli(namespace, url)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
 
 
 @app.command()
-def slo(namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace")):
-    """Show Service Level Objectives"""
+def slo(
+    namespace: str = typer.Option(None, "--namespace", "-n", help="Only SLOs of this namespace"),
+    url: str = typer.Option(None, "--url", help="Prometheus URL")
+):
+    """Show Service Level Objectives (SLOs from ~/.stars/config.yaml)"""
     try:
         cmd = MonitoringCommands()
-        cmd.show_slo(namespace)
+        cmd.show_slo(namespace, url)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -1391,13 +1493,16 @@ def slo(namespace: str = typer.Option("default", "--namespace", "-n", help="Name
 
 @app.command()
 def smart_scale(
-    resource: str = typer.Argument(..., help="Resource to scale"),
-    namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace")
+    resource: str = typer.Argument(..., help="Deployment name, or 'all'"),
+    namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace"),
+    all_namespaces: bool = typer.Option(False, "--all-namespaces", "-A", help="All namespaces"),
+    days: int = typer.Option(7, "--days", "-d", help="Days of usage history"),
+    url: str = typer.Option(None, "--url", help="Prometheus URL")
 ):
-    """AI-powered smart scaling"""
+    """Right-size requests and replicas from usage percentiles"""
     try:
         cmd = MonitoringCommands()
-        cmd.smart_scale(resource, namespace)
+        cmd.smart_scale(resource, namespace, all_namespaces, days, url)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -1419,14 +1524,16 @@ def snapshot(
 
 @app.command()
 def spike(
-    metric: str = typer.Argument(..., help="Metric to monitor"),
-    threshold: float = typer.Option(80.0, "--threshold", "-t", help="Spike threshold"),
-    namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace")
+    metric: str = typer.Argument(..., help="cpu, memory or a PromQL expression"),
+    threshold: float = typer.Option(80.0, "--threshold", "-t", help="Spike threshold (% over baseline)"),
+    namespace: str = typer.Option("default", "--namespace", "-n", help="Namespace"),
+    interval: int = typer.Option(15, "--interval", "-i", help="Sample interval in seconds"),
+    url: str = typer.Option(None, "--url", help="Prometheus URL")
 ):
     """Monitor for metric spikes"""
     try:
         cmd = MonitoringCommands()
-        cmd.monitor_spikes(metric, threshold, namespace)
+        cmd.monitor_spikes(metric, threshold, namespace, interval, url)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -1472,11 +1579,14 @@ def trace(
 
 
 @app.command()
-def cardinality(url: str = typer.Option(None, "--url", help="Prometheus URL")):
+def cardinality(
+    limit: int = typer.Option(10, "--limit", "-l", help="Rows per table"),
+    url: str = typer.Option(None, "--url", help="Prometheus URL")
+):
     """Show metric cardinality"""
     try:
         cmd = MonitoringCommands()
-        cmd.show_cardinality(url)
+        cmd.show_cardinality(url, limit)
     except Exception as e:
         print_error(f"Command failed: {e}")
         raise typer.Exit(1)
@@ -3,10 +3,9 @@ import logging
 import re
 from pathlib import Path
 from typing import Optional
-from urllib.parse import urlparse
 
 from .k8s_client import KubernetesClient
-from .ai import analyzer, GeminiAPIError
+from .ai import analyzer, GeminiAPIError, GeminiTimeoutError
 from .utils import (
     create_table, print_error, print_success,
     print_info, print_warning, format_pod_status, console
@@ -23,21 +22,6 @@ logger = logging.getLogger(__name__)
 # then letters, digits, underscores, colons. No spaces, slashes, or operators.
 _METRIC_NAME_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]{0,127}$')
 
-# Allowed URL schemes when a Prometheus URL is supplied via CLI argument.
-_ALLOWED_URL_SCHEMES = {'http', 'https'}
-
-# Private / link-local IP ranges that must never be reached (SSRF guard).
-_SSRF_BLOCKED_HOSTS = re.compile(
-    r'^(localhost|127\.\d+\.\d+\.\d+|::1'
-    r'|169\.254\.\d+\.\d+'        # AWS/GCP IMDS
-    r'|10\.\d+\.\d+\.\d+'         # RFC-1918
-    r'|192\.168\.\d+\.\d+'        # RFC-1918
-    r'|172\.(1[6-9]|2\d|3[01])\.\d+\.\d+'  # RFC-1918
-    r'|0\.0\.0\.0'
-    r')$',
-    re.IGNORECASE,
-)
-
 # RFC-1123 / DNS-1123 pod / resource name pattern.
 _K8S_NAME_RE = re.compile(r'^[a-z0-9]([-a-z0-9]*[a-z0-9])?$')
 
@@ -87,29 +71,6 @@ def _resolve_safe_yaml_path(file_path: str) -> Path:
     return path
 
 
-def _validate_prometheus_url(url: str) -> str:
-    """
-    Validate a Prometheus base URL supplied via CLI argument (#15).
-
-    Raises:
-        ValueError: If the URL scheme is not http/https, or if the host
-                    matches a private/link-local/SSRF-risky pattern.
-    """
-    parsed = urlparse(url)
-    if parsed.scheme not in _ALLOWED_URL_SCHEMES:
-        raise ValueError(
-            f"Prometheus URL scheme {parsed.scheme!r} is not allowed. "
-            f"Only {sorted(_ALLOWED_URL_SCHEMES)} are permitted."
-        )
-    hostname = parsed.hostname or ''
-    if _SSRF_BLOCKED_HOSTS.match(hostname):
-        raise ValueError(
-            f"Prometheus URL host {hostname!r} resolves to a private or link-local "
-            f"address. This is blocked to prevent SSRF attacks."
-        )
-    return url
-
-
 class MonitoringCommands:
     """Kubernetes monitoring commands - orchestrates API calls and output"""
     
@@ -119,8 +80,30 @@ class MonitoringCommands:
         except Exception as e:
             logger.error(f"Failed to initialize Kubernetes client: {e}")
             raise
+
+    @staticmethod
+    def _prometheus(url: Optional[str] = None, cache: bool = True):
+        """
+        Client for *url*, or the configured Prometheus.
+
+        Range queries go through the on-disk result cache unless *cache*
+        is False.
+
+        Returns:
+            PrometheusClient, or None if no URL is set
+
+        Raises:
+            ValueError: If the URL fails the SSRF checks
+        """
+        from .config import config
+        from .prometheus import PrometheusClient, RangeCache
+        prom_url = url or config.settings.prometheus_url
+        if not prom_url:
+            return None
+        return PrometheusClient(prom_url, cache=RangeCache() if cache else None)
     
-    def health_check(self, namespace: Optional[str] = None, allow_ai: bool = True):
+    def health_check(self, namespace: Optional[str] = None, allow_ai: bool = True,
+                     ai_timeout: Optional[float] = None):
         """Check cluster health - delegates to API and output layers"""
         try:
             # Check AI consent on first use
@@ -153,11 +136,8 @@ class MonitoringCommands:
             
             # AI analysis (if available and allowed)
             if allow_ai and analyzer.is_available():
-                try:
-                    analysis = analyzer.analyze_cluster_health(health_metrics, allow_external=True)
-                    console.print(f"\n[dim]AI Analysis: {analysis}[/dim]")
-                except GeminiAPIError as e:
-                    logger.debug(f"AI analysis unavailable: {e}")
+                self._stream_analysis(analyzer.analyze_cluster_health, health_metrics, ai_timeout,
+                                      header="\n[dim]AI Analysis:[/dim] ", style="dim")
             
         except Exception as e:
             print_error(f"Health check failed: {e}")
@@ -182,8 +162,10 @@ class MonitoringCommands:
             logger.error(f"List pods error: {e}", exc_info=True)
             raise
     
-    def diagnose_pod(self, pod_name: str, namespace: str = "default", allow_ai: bool = True):
+    def diagnose_pod(self, pod_name: str, namespace: str = "default", allow_ai: bool = True,
+                     ai_timeout: Optional[float] = None):
         """Diagnose pod issues"""
+        from .triage import is_failing, shareable_evidence
         try:
             # Validate BOTH pod_name and namespace before touching the API (#2).
             try:
@@ -220,14 +202,20 @@ class MonitoringCommands:
             # Display basic info
             self._display_pod_info(pod)
             
-            # AI analysis if pod has issues and allowed
-            if allow_ai and pod.status.phase != "Running" and analyzer.is_available():
-                try:
-                    pod_data = self._extract_pod_data(pod)
-                    analysis = analyzer.analyze_pod_issue(pod_data, allow_external=True)
-                    console.print(f"\n[bold]Analysis:[/bold]\n{analysis}")
-                except GeminiAPIError as e:
-                    logger.debug(f"AI analysis failed: {e}")
+            # Known failure patterns are answered locally; the AI only gets the rest.
+            if pod.status.phase != "Running" or is_failing(pod):
+                pod_data = self._extract_pod_data(pod)
+                # Events, logs and container messages feed the local rules only.
+                pod_data['events'] = self._pod_events(pod)
+                pod_data['log_tail'] = self._pod_log_tail(pod)
+                analysis = analyzer.analyze_locally(pod_data)
+                if analysis is not None:
+                    console.print("\n[bold]Analysis:[/bold] [dim](local rules, nothing sent externally)[/dim]")
+                    console.print(analysis, markup=False, highlight=False)
+                elif allow_ai and analyzer.is_available():
+                    self._stream_analysis(analyzer.analyze_pod_issue, shareable_evidence(pod_data), ai_timeout,
+                                          header="\n[bold]Analysis:[/bold]\n")
+                self._print_ai_stats()
         
         except Exception as e:
             print_error(f"Diagnosis failed: {e}")
@@ -235,6 +223,59 @@ class MonitoringCommands:
             raise
     
     # Private methods - business logic and data processing
+
+    def _pod_events(self, pod) -> list:
+        """Messages of the events about *pod*, newest first"""
+        try:
+            events = self.k8s.list_events(pod.metadata.namespace)
+        except Exception as e:
+            logger.debug(f"No events for {pod.metadata.name}: {e}")
+            return []
+        return [f"{event.reason}: {event.message}" for event in events
+                if event.involved_object and event.involved_object.name == pod.metadata.name][:20]
+
+    def _pod_log_tail(self, pod, tail_lines: int = 50) -> str:
+        try:
+            return self.k8s.get_pod_logs(pod.metadata.name, pod.metadata.namespace, tail_lines=tail_lines) or ''
+        except Exception as e:
+            # Pending pods have no logs yet.
+            logger.debug(f"No logs for {pod.metadata.name}: {e}")
+            return ''
+
+    def _print_ai_stats(self):
+        """One dim line on how analyses were answered, with the AI cache hit rate"""
+        stats = analyzer.stats()
+        if not (stats['local'] or stats['cache_hits'] or stats['api_calls']):
+            return
+        rate = stats['cache_hit_rate']
+        console.print(f"[dim]{stats['local']} answered by local rules, {stats['cache_hits']} from the AI cache, "
+                      f"{stats['api_calls']} AI calls"
+                      + (f" (cache hit rate {rate:.0%})" if rate is not None else "") + "[/dim]")
+
+    def _stream_analysis(self, analyze, data: dict, timeout: Optional[float], header: str,
+                         style: Optional[str] = None):
+        """Print an AI answer as it streams in; a timeout or Ctrl+C stops the AI call, not the command"""
+        started = []
+
+        def _print(text):
+            if not started:
+                console.print(header, end="")
+                started.append(True)
+            console.print(text, end="", style=style, markup=False, highlight=False)
+
+        stopped = None
+        try:
+            analyze(data, allow_external=True, on_text=_print, timeout=timeout)
+        except GeminiTimeoutError as e:
+            stopped = f"AI analysis stopped: {e}"
+        except GeminiAPIError as e:
+            logger.debug(f"AI analysis failed: {e}")
+        except KeyboardInterrupt:
+            stopped = "AI analysis cancelled"
+        if started:
+            console.print()
+        if stopped:
+            print_warning(stopped)
     
     def _calculate_health_metrics(self, nodes, pods) -> dict:
         """Calculate health metrics from raw data"""
@@ -329,17 +370,13 @@ class MonitoringCommands:
     
     def _extract_pod_data(self, pod) -> dict:
         """Extract relevant pod data for AI analysis"""
+        from .triage import container_evidence, failure_reason, scheduling_message
         return {
             "name": pod.metadata.name,
             "status": pod.status.phase,
-            "containers": [
-                {
-                    "name": c.name,
-                    "ready": c.ready,
-                    "restarts": c.restart_count
-                }
-                for c in (pod.status.container_statuses or [])
-            ]
+            "reason": failure_reason(pod)[1],
+            "scheduling": scheduling_message(pod),
+            "containers": container_evidence(pod)
         }
     
     def _is_node_ready(self, node) -> bool:
@@ -596,21 +633,73 @@ class MonitoringCommands:
     def top_pods(self, namespace: str, limit: int):
         """Show top resource-consuming pods"""
         try:
+            import heapq
+            from .quantity import metric_usage, format_cpu, format_memory
+
             metrics = self.k8s.get_pod_metrics(namespace)
             table = create_table(f"Top {limit} Pods by Resource Usage", ["Pod", "CPU", "Memory"])
             
-            sorted_metrics = sorted(metrics, key=lambda x: x.containers[0].usage['cpu'], reverse=True)[:limit]
-            
-            for metric in sorted_metrics:
-                cpu = metric.containers[0].usage.get('cpu', '0')
-                memory = metric.containers[0].usage.get('memory', '0')
-                table.add_row(metric.metadata.name, cpu, memory)
+            # Usage is summed over all containers; CPU ranks first, memory breaks ties.
+            usage = ((metric_usage(m), m['metadata']['name']) for m in metrics)
+            for (cpu, memory), name in heapq.nlargest(limit, usage, key=lambda u: u[0]):
+                table.add_row(name, format_cpu(cpu), format_memory(memory))
             
             console.print(table)
         except Exception as e:
             print_error(f"Failed to get metrics: {e}")
             raise
     
+    def top_nodes(self, limit: int):
+        """Show nodes ranked by request, limit and usage pressure"""
+        import numpy as np
+        from .binpack import ClusterModel
+
+        try:
+            nodes = self.k8s.list_nodes()
+            model = ClusterModel(nodes, self.k8s.list_pods(None))
+            try:
+                node_metrics = self.k8s.get_node_metrics()
+            except Exception as e:
+                logger.debug(f"Node metrics unavailable: {e}")
+                node_metrics = None
+            p = model.pressure(node_metrics)
+            ready = np.array([self._is_node_ready(n) for n in nodes], dtype=bool)
+
+            def _pct(value):
+                if not np.isfinite(value):
+                    return "[dim]-[/dim]"
+                color = "red" if value >= 0.9 else "yellow" if value >= 0.75 else "green"
+                return f"[{color}]{value * 100:.0f}%[/{color}]"
+
+            # NotReady and cordoned nodes first, then by worst ratio.
+            order = np.lexsort((-np.nan_to_num(p['score'], nan=-1.0), ~model.unschedulable, ready))
+            title = f"Top {min(limit, len(nodes))} Nodes by Pressure"
+            table = create_table(title, ["Node", "Status", "CPU req/lim/used", "Mem req/lim/used",
+                                         "Pods", "Disk req", "Pressure"])
+            for i in order[:limit].tolist():
+                status = "Ready" if ready[i] else "NotReady"
+                if model.unschedulable[i]:
+                    status += ",SchedulingDisabled"
+                table.add_row(
+                    model.names[i],
+                    format_pod_status(status) if ready[i] and not model.unschedulable[i] else f"[red]{status}[/red]",
+                    " / ".join(_pct(v) for v in (p['requested'][i, 0], p['limits'][i, 0], p['usage'][i, 0])),
+                    " / ".join(_pct(v) for v in (p['requested'][i, 1], p['limits'][i, 1], p['usage'][i, 1])),
+                    f"{model.used[i, 2]:.0f}/{model.allocatable[i, 2]:.0f}",
+                    _pct(p['requested'][i, 3]),
+                    _pct(p['score'][i]),
+                )
+            console.print(table)
+
+            hot = int((p['score'] >= 0.9).sum())
+            if hot:
+                print_warning(f"{hot} of {len(nodes)} nodes at or above 90% pressure")
+            if node_metrics is None:
+                console.print("[dim]Live usage unavailable (metrics-server not reachable)[/dim]")
+        except Exception as e:
+            print_error(f"Failed to get node pressure: {e}")
+            raise
+
     def restart_resource(self, resource_type: str, resource_name: str, namespace: str):
         """Restart a resource"""
         try:
@@ -698,17 +787,30 @@ class MonitoringCommands:
     def show_resources(self, namespace: str):
         """Show resource usage and quotas"""
         try:
-            quotas = self.k8s.get_resource_quotas(namespace)
+            from .quantity import format_cpu, format_memory
+
             usage = self.k8s.get_namespace_usage(namespace)
             
             console.print(f"\n[bold]Resource Usage for {namespace}[/bold]\n")
             
+            def _fmt(resource: str, value) -> str:
+                if value is None:
+                    return "N/A"
+                if resource.endswith('cpu'):
+                    return format_cpu(value)
+                if resource.endswith('memory'):
+                    return format_memory(value)
+                return f"{value:.0f}"
+            
             table = create_table("Resources", ["Resource", "Used", "Limit", "Percentage"])
             for resource, values in usage.items():
-                used = values.get('used', 'N/A')
-                limit = values.get('limit', 'N/A')
-                pct = values.get('percentage', 'N/A')
-                table.add_row(resource, str(used), str(limit), str(pct))
+                pct = values.get('percentage')
+                table.add_row(
+                    resource,
+                    _fmt(resource, values.get('used')),
+                    _fmt(resource, values.get('limit')),
+                    f"{pct:.1f}%" if pct is not None else "N/A"
+                )
             
             console.print(table)
         except Exception as e:
@@ -772,41 +874,95 @@ class MonitoringCommands:
     
     def analyze_cluster(self, namespace: str):
         """Analyze cluster with AI"""
+        from rich.markup import escape
+        from .triage import is_failing
         try:
             console.print("[bold green]TARS:[/bold green] analyzing cluster...\n")
             
             pods = self.k8s.list_pods(namespace)
+            failing = [pod for pod in pods if is_failing(pod)]
             
-            issues = []
-            for pod in pods:
-                status = pod.status.phase
-                restarts = sum([c.restart_count for c in pod.status.container_statuses]) if pod.status.container_statuses else 0
-                
-                if status != "Running":
-                    issues.append(f"Pod {pod.metadata.name}: Status={status}")
-                if restarts > 5:
-                    issues.append(f"Pod {pod.metadata.name}: {restarts} restarts")
-            
-            if not issues:
+            if not failing:
                 console.print("[bold green]No issues found. Everything's running smoother than my humor settings.[/bold green]")
                 return
             
-            if analyzer.is_available():
-                prompt = f"Kubernetes cluster issues in namespace '{namespace}':\n" + "\n".join(issues)
-                
-                with console.status("[bold green]TARS:[/bold green] thinking..."):
-                    analysis = analyzer.analyze_cluster_health({'issues': issues})
-                
+            groups, logs = self._failure_groups(failing)
+            answers = self._analyze_groups(groups, logs)
+            if any(answer is not None for answer in answers):
                 from rich.panel import Panel
-                console.print(Panel(analysis, title="[bold green]TARS:[/bold green] Analysis", border_style="cyan"))
+                sections = [f"[bold]{self._group_title(group)}[/bold]\n"
+                            + (escape(answer) if answer is not None else "[dim]No analysis[/dim]")
+                            for group, answer in zip(groups, answers)]
+                console.print(Panel("\n\n".join(sections), title="[bold green]TARS:[/bold green] Analysis",
+                                    border_style="cyan"))
             else:
                 console.print("[bold yellow]Issues found:[/bold yellow]")
-                for issue in issues:
-                    console.print(f"  • {issue}")
+                for group in groups:
+                    console.print(f"  • {self._group_title(group)}")
+            if any(answer is None for answer in answers) and not analyzer.is_available():
                 print_warning("AI analysis not available - GEMINI_API_KEY not set")
+            self._print_ai_stats()
         except Exception as e:
             print_error(f"Analysis failed: {e}")
             raise
+
+    def _failure_groups(self, pods: list, tail_lines: int = 50):
+        """
+        Group failing pods by signature, fetching log tails concurrently.
+
+        Returns:
+            tuple: (groups, log tail per ``namespace/name``)
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from .owners import pod_key
+        from .triage import group_failures
+
+        def _tail(pod):
+            try:
+                return self.k8s.get_pod_logs(pod.metadata.name, pod.metadata.namespace, tail_lines=tail_lines)
+            except Exception as e:
+                # Pending pods have no logs yet; the rest of the signature still groups them.
+                logger.debug(f"No logs for {pod.metadata.name}: {e}")
+                return ''
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            tails = list(pool.map(_tail, pods))
+        logs = {pod_key(pod): tail or '' for pod, tail in zip(pods, tails)}
+        groups = group_failures(pods, logs)
+        logger.debug(f"{len(pods)} failing pods in {len(groups)} groups")
+        return groups, logs
+
+    def _analyze_groups(self, groups: list, logs: dict) -> list:
+        """
+        Analysis per failure group: local rules first, one batched AI
+        request for the groups they cannot classify.
+
+        Returns:
+            list: Analysis per group, None where neither tier answered
+        """
+        from .triage import group_evidence, shareable_evidence
+        evidence = [group_evidence(group, logs) for group in groups]
+        answers = [analyzer.analyze_locally(data) for data in evidence]
+        pending = [i for i, answer in enumerate(answers) if answer is None]
+        if pending and analyzer.is_available():
+            # The AI gets the groups' status only; log tails stay with the local rules.
+            shared = [shareable_evidence(evidence[i]) for i in pending]
+            try:
+                with console.status(f"Analyzing {len(pending)} failure groups..."):
+                    for i, answer in zip(pending, analyzer.analyze_failure_groups(shared)):
+                        answers[i] = answer
+            except GeminiAPIError as e:
+                print_warning(f"AI analysis unavailable: {e}")
+        return answers
+
+    @staticmethod
+    def _group_title(group: dict) -> str:
+        owner, container, reason, _ = group['signature']
+        members = group['members']
+        where = f"{owner} ({container})" if container else owner
+        names = ", ".join(pod.metadata.name for pod in members[:3])
+        more = f", +{len(members) - 3} more" if len(members) > 3 else ""
+        return f"{where}: {reason} on {len(members)} pod{'s' if len(members) != 1 else ''} ({names}{more})"
     
     def show_errors(self, namespace: str, limit: int):
         """Show pods with errors"""
@@ -851,22 +1007,137 @@ class MonitoringCommands:
             print_error(f"Failed to find crashloop pods: {e}")
             raise
     
-    def find_pending(self, namespace: str):
-        """Find pending pods"""
+    def find_pending(self, namespace: Optional[str], pod_name: Optional[str] = None):
+        """Find pending pods and simulate where each one could be scheduled"""
+        import numpy as np
+        from .binpack import ClusterModel, REASONS, FITS, TAINT, format_taint
+        from .quantity import format_cpu, format_memory
+
         try:
-            pods = self.k8s.list_pods(namespace)
-            pending_pods = [p for p in pods if p.status.phase == 'Pending']
-            
-            table = create_table(f"Pending Pods in {namespace}", ["Name", "Reason", "Message"])
+            if namespace and not validate_namespace(namespace):
+                print_error(f"Invalid namespace: {namespace}")
+                return
+
+            # Node usage depends on pods in every namespace, not just ours.
+            all_pods = self.k8s.list_pods(None)
+            pending_pods = [
+                p for p in all_pods
+                if p.status.phase == 'Pending' and (not namespace or p.metadata.namespace == namespace)
+                and (not pod_name or p.metadata.name == pod_name)
+            ]
+            scope = namespace or "all namespaces"
+            if not pending_pods:
+                if pod_name:
+                    print_error(f"No pending pod named {pod_name} in {scope}")
+                else:
+                    print_success(f"No pending pods in {scope}")
+                return
+
+            model = ClusterModel(self.k8s.list_nodes(), all_pods)
+            unscheduled = [p for p in pending_pods if not p.spec.node_name]
+            report = model.pending_report(unscheduled)
+
+            table = create_table(f"Pending Pods in {scope} ({len(model)} nodes)",
+                                 ["Pod", "Requests", "Fits on", "Blocked by"])
             for pod in pending_pods:
-                reason = pod.status.reason or "N/A"
-                message = pod.status.message or "N/A"
-                table.add_row(pod.metadata.name, reason, message[:60])
-            
+                if pod.spec.node_name:
+                    table.add_row(pod.metadata.name, "-", f"[dim]bound to {pod.spec.node_name}[/dim]",
+                                  pod.status.reason or "waiting for containers")
+            for entry in report[:200]:
+                pod, verdict = entry['pod'], entry['verdict']
+                req = verdict['requests']
+                fits = [model.names[i] for i in (verdict['code'] == FITS).nonzero()[0][:3].tolist()]
+                n_fit = int((verdict['code'] == FITS).sum())
+                blocked = ", ".join(f"{k} {reason}" for k, reason in model.explain(verdict)[:3])
+                table.add_row(
+                    pod.metadata.name if namespace else f"{pod.metadata.namespace}/{pod.metadata.name}",
+                    f"{format_cpu(req[0])} / {format_memory(req[1])}",
+                    (f"[green]{n_fit}[/green]: " + ", ".join(fits) + (" ..." if n_fit > 3 else ""))
+                    if n_fit else "[red]none[/red]",
+                    blocked or "-",
+                )
             console.print(table)
+            if len(report) > 200:
+                console.print(f"[dim]Showing 200 of {len(report)} unscheduled pods[/dim]")
+
+            shapes = len({entry['shape'] for entry in report})
+            stuck = sum(1 for entry in report if not (entry['verdict']['code'] == FITS).any())
+            console.print(f"\n[bold]{len(report)}[/bold] unscheduled pods ({shapes} distinct shapes), "
+                          f"[red]{stuck}[/red] fit on no node with current free capacity")
+
+            if pod_name and report:
+                verdict = report[0]['verdict']
+                free = model.free
+                detail = create_table(f"Node fit for {pod_name}",
+                                      ["Node", "Free CPU", "Free Memory", "Free Pods", "Verdict"])
+                for i in np.argsort(verdict['code'], kind='stable').tolist():
+                    code = int(verdict['code'][i])
+                    text = REASONS[code]
+                    if code == TAINT and verdict['taint'][i] >= 0:
+                        text = f"{text} {format_taint(model.taints[verdict['taint'][i]])}"
+                    detail.add_row(model.names[i], format_cpu(max(free[i, 0], 0)),
+                                   format_memory(max(free[i, 1], 0)), f"{free[i, 2]:.0f}",
+                                   f"[green]{text}[/green]" if code == FITS else f"[red]{text}[/red]")
+                console.print(detail)
         except Exception as e:
             print_error(f"Failed to find pending pods: {e}")
             raise
+
+    def what_if_scale(self, name: str, replicas: int, namespace: str):
+        """Simulate scaling a deployment and report whether the new replicas fit"""
+        import numpy as np
+        from .binpack import ClusterModel, pod_requests
+        from .quantity import format_cpu, format_memory
+
+        try:
+            if not validate_namespace(namespace):
+                print_error(f"Invalid namespace: {namespace}")
+                return
+            if replicas < 0:
+                print_error("Replicas must be zero or more")
+                return
+            matches = [d for d in self.k8s.list_deployments(namespace) if d.metadata.name == name]
+            if not matches:
+                print_error(f"Deployment not found: {name}")
+                return
+            deployment = matches[0]
+            current = deployment.spec.replicas if deployment.spec.replicas is not None else 1
+            template = deployment.spec.template
+            req = pod_requests(template)
+            delta = replicas - current
+
+            console.print(f"\n[bold]What if {namespace}/{name} runs {replicas} replicas "
+                          f"(now {current})?[/bold]")
+            console.print(f"Per replica: {format_cpu(req[0])} CPU, {format_memory(req[1])} memory\n")
+            if delta <= 0:
+                print_success(f"Scaling down frees {format_cpu(-delta * req[0])} CPU and "
+                              f"{format_memory(-delta * req[1])} memory")
+                return
+
+            model = ClusterModel(self.k8s.list_nodes(), self.k8s.list_pods(None))
+            sim = model.scale_capacity(template, delta)
+
+            placed = sim['placed']
+            if placed.any():
+                table = create_table("Placement", ["Node", "New replicas", "Node room for more"])
+                for i in np.argsort(-placed, kind='stable')[:20].tolist():
+                    if placed[i] == 0:
+                        break
+                    room = sim['verdict']['capacity'][i]
+                    table.add_row(model.names[i], str(int(placed[i])),
+                                  "∞" if not np.isfinite(room) else str(int(room - placed[i])))
+                console.print(table)
+
+            if sim['unplaced'] == 0:
+                print_success(f"All {delta} new replicas fit (cluster has room for {sim['capacity']})")
+            else:
+                print_warning(f"{sim['fits']} of {delta} new replicas fit; "
+                              f"{sim['unplaced']} would stay Pending")
+                for count, reason in model.explain(sim['verdict'])[:5]:
+                    console.print(f"  {count} node(s): {reason}")
+        except Exception as e:
+            print_error(f"What-if simulation failed: {e}")
+            raise
     
     def find_oom(self, namespace: str):
         """Find OOMKilled pods"""
@@ -1007,13 +1278,103 @@ class MonitoringCommands:
             print_error(f"Failed to show network: {e}")
             raise
     
-    def estimate_cost(self, namespace: str):
-        """Estimate costs"""
+    def estimate_cost(self, namespace: Optional[str], by: str = 'namespace', hours: int = 24):
+        """
+        Show hourly and monthly cost, split into used and idle.
+
+        Usage is the average over the last *hours* from the local store when
+        available, otherwise a live metrics-server sample.
+        """
+        import time
+        import numpy as np
+        from .config import config
+        from .cost import HOURS_PER_MONTH, allocate, node_rates, rollup, summarize
+        from .owners import pod_owner
+        from .quantity import PodResourceTable
+        from .tsdb import MetricStore, POD_RING, pod_series
+
         try:
-            pods = self.k8s.list_pods(namespace)
-            console.print(f"\n[bold]Cost Estimation for {namespace or 'all namespaces'}[/bold]")
-            console.print(f"Total Pods: {len(pods)}")
-            console.print("[dim]Note: Detailed cost estimation requires metrics server[/dim]")
+            if namespace and not validate_namespace(namespace):
+                print_error(f"Invalid namespace: {namespace}")
+                return
+            if not (by in ('namespace', 'owner', 'node') or by.startswith('label:')):
+                print_error(f"Unsupported grouping: {by}. Use namespace, owner, node or label:<key>")
+                return
+
+            pricing = config.settings.pricing
+            pods = [p for p in self.k8s.list_pods(namespace)
+                    if p.status.phase not in ('Succeeded', 'Failed')]
+            nodes = self.k8s.list_nodes()
+            rates = node_rates(nodes, pricing)
+
+            pod_table = PodResourceTable.from_pods(pods)
+            source = "requests only"
+            store = MetricStore()
+            if hours > 0 and store.has_ring(POD_RING):
+                # One bucket spanning the window is the per-pod mean.
+                window = hours * 3600
+                prefix = pod_series(namespace, '') if namespace else 'pod:'
+                for column, name in ((0, 'cpu_usage'), (1, 'memory_usage')):
+                    series, grid = store.matrix(POD_RING, prefix, int(time.time()) - window, window, 1, column)
+                    mean = dict(zip(series, grid[:, 0]))
+                    values = np.array([mean.get(pod_series(p.metadata.namespace, p.metadata.name), np.nan)
+                                       for p in pods])
+                    pod_table.columns[name] = np.nan_to_num(values)
+                if pod_table['cpu_usage'].any() or pod_table['memory_usage'].any():
+                    source = f"{hours}h average usage"
+            if source == "requests only":
+                try:
+                    live = PodResourceTable.from_pods(pods, self.k8s.get_pod_metrics(namespace))
+                    pod_table.columns['cpu_usage'] = live['cpu_usage']
+                    pod_table.columns['memory_usage'] = live['memory_usage']
+                    source = "live usage"
+                except Exception as e:
+                    logger.debug(f"Pod metrics unavailable: {e}")
+
+            costs = allocate(pod_table, rates)
+            if by == 'namespace':
+                keys = [p.metadata.namespace for p in pods]
+            elif by == 'owner':
+                keys = [f"{p.metadata.namespace}/{pod_owner(p)}" for p in pods]
+            elif by == 'node':
+                keys = [p.spec.node_name or '<unscheduled>' for p in pods]
+            else:
+                label = by.split(':', 1)[1]
+                keys = [(p.metadata.labels or {}).get(label, '<none>') for p in pods]
+            labels, sums = rollup(keys, costs)
+
+            cur = pricing.currency
+
+            def monthly(hourly):
+                return f"{hourly * HOURS_PER_MONTH:,.2f}"
+
+            console.print(f"\n[bold]Cost for {namespace or 'all namespaces'}[/bold] "
+                          f"[dim]({source}, {cur}/month)[/dim]")
+            table = create_table(f"Cost by {by}", ["Name", "Pods", "CPU", "Memory", "Used", "Idle",
+                                                   "Total", "Efficiency"])
+            total = sums['cpu'] + sums['memory']
+            for i in np.argsort(-total, kind='stable')[:25].tolist():
+                eff = sums['used'][i] / total[i] if total[i] > 0 else np.nan
+                color = "red" if eff < 0.3 else "yellow" if eff < 0.6 else "green"
+                table.add_row(
+                    labels[i], f"{sums['pods'][i]:.0f}",
+                    monthly(sums['cpu'][i]), monthly(sums['memory'][i]),
+                    monthly(sums['used'][i]), monthly(sums['idle'][i]), monthly(total[i]),
+                    f"[{color}]{eff * 100:.0f}%[/{color}]" if np.isfinite(eff) else "-",
+                )
+            console.print(table)
+            if len(labels) > 25:
+                console.print(f"[dim]Showing 25 of {len(labels)} groups[/dim]")
+
+            totals = summarize(costs, None if namespace else rates)
+            console.print(f"\nAllocated: [bold]{monthly(totals['allocated'])} {cur}[/bold]  "
+                          f"used {monthly(totals['used'])}  idle [yellow]{monthly(totals['idle'])}[/yellow]")
+            if 'nodes' in totals:
+                console.print(f"Nodes: {monthly(totals['nodes'])} {cur}  "
+                              f"unallocated [yellow]{monthly(totals['unallocated'])}[/yellow]")
+            if not rates['priced'].any():
+                console.print("[dim]Using default per-core/per-GiB rates; set pricing.node_types "
+                              "in ~/.stars/config.yaml for real node prices[/dim]")
         except Exception as e:
             print_error(f"Failed to estimate cost: {e}")
             raise
@@ -1103,10 +1464,23 @@ class MonitoringCommands:
             raise
     
     def show_diff(self, resource_type: str, resource_name: str, file_path: str, namespace: str):
-        """Show diff"""
+        """Show structural diff between live state and a local manifest"""
+        from .diff import diff_objects
         try:
-            console.print(f"[yellow]Diff functionality requires kubectl diff[/yellow]")
-            console.print(f"Run: kubectl diff -f {file_path}")
+            _validate_resource_name(resource_name)
+            if not validate_namespace(namespace):
+                print_error(f"Invalid namespace: {namespace}")
+                return
+
+            manifest = self._load_manifest(file_path, resource_type, resource_name)
+            if manifest is None:
+                return
+
+            live = self.k8s.get_resource_dict(resource_type, resource_name, namespace)
+            changes = diff_objects(live, manifest, declared_only=True)
+            self._display_diff(changes, f"{resource_type}/{resource_name} (live)", file_path)
+        except ValueError as e:
+            print_error(str(e))
         except Exception as e:
             print_error(f"Diff failed: {e}")
             raise
@@ -1126,25 +1500,30 @@ class MonitoringCommands:
     
     def triage_issues(self, namespace: str):
         """AI-powered triage"""
+        from rich.markup import escape
+        from .triage import is_failing
         try:
             pods = self.k8s.list_pods(namespace)
-            # Only report actual problems, not Succeeded or Running pods
-            problem_phases = ['Pending', 'Failed', 'Unknown', 'CrashLoopBackOff']
-            problem_pods = [p for p in pods if p.status.phase in problem_phases]
+            # Only report actual problems, not Succeeded or healthy Running pods
+            problem_pods = [p for p in pods if is_failing(p)]
             
             if not problem_pods:
                 console.print(f"[green]No issues found in {namespace}[/green]")
                 return
             
-            console.print(f"\n[bold]Issues Found:[/bold]")
-            for pod in problem_pods:
-                console.print(f"• {pod.metadata.name}: {pod.status.phase}")
-            
-            if analyzer.is_available():
-                console.print("\n[bold]AI Recommendations:[/bold]")
-                for pod in problem_pods[:3]:
-                    analysis = analyzer.analyze_pod_issue(self._extract_pod_data(pod))
-                    console.print(f"\n{pod.metadata.name}:\n{analysis}")
+            # One entry (and one AI answer) per distinct failure, not per pod.
+            groups, logs = self._failure_groups(problem_pods)
+            console.print(f"\n[bold]Issues Found:[/bold] {len(problem_pods)} pods, {len(groups)} distinct failures")
+            for group in groups:
+                console.print(f"• {self._group_title(group)}")
+            
+            answers = self._analyze_groups(groups, logs)
+            if any(answer is not None for answer in answers):
+                console.print("\n[bold]Recommendations:[/bold]")
+                for group, analysis in zip(groups, answers):
+                    if analysis is not None:
+                        console.print(f"\n[bold]{self._group_title(group)}[/bold]\n{escape(analysis)}")
+            self._print_ai_stats()
         except Exception as e:
             print_error(f"Triage failed: {e}")
             raise
@@ -1156,11 +1535,11 @@ class MonitoringCommands:
                 metrics = self.k8s.get_pod_metrics(namespace)
                 table = create_table(f"Pod Metrics in {namespace}", ["Pod", "CPU", "Memory"])
                 
+                from .quantity import metric_usage, format_cpu, format_memory
                 for metric in metrics[:20]:
                     if metric.get('containers'):
-                        cpu = metric['containers'][0]['usage'].get('cpu', 'N/A')
-                        memory = metric['containers'][0]['usage'].get('memory', 'N/A')
-                        table.add_row(metric['metadata']['name'], cpu, memory)
+                        cpu, memory = metric_usage(metric)
+                        table.add_row(metric['metadata']['name'], format_cpu(cpu), format_memory(memory))
                 
                 console.print(table)
             else:
@@ -1187,19 +1566,136 @@ class MonitoringCommands:
             except:
                 pass
     
-    def create_alert(self, name: str, condition: str, namespace: str):
-        """Create alert"""
-        console.print(f"[yellow]Alert '{name}' created for condition: {condition}[/yellow]")
-        console.print("[dim]Note: Requires Prometheus AlertManager[/dim]")
-    
-    def show_alert_history(self, namespace: str):
-        """Show alert history"""
-        console.print(f"[yellow]Alert history for {namespace}[/yellow]")
-        console.print("[dim]Note: Requires Prometheus AlertManager[/dim]")
+    def create_alert(self, name: str, condition: str, namespace: Optional[str] = None,
+                     hold: Optional[str] = None, severity: str = 'warning'):
+        """Add (or replace) a local alert rule in ~/.stars/alerts.yaml"""
+        from .alerts import save_rule
+        from .config import ALERTS_FILE
+
+        if namespace and not validate_namespace(namespace):
+            print_error(f"Invalid namespace: {namespace}")
+            return
+        try:
+            rule = save_rule({'name': name, 'condition': condition, 'namespace': namespace,
+                              'for': hold, 'severity': severity}, ALERTS_FILE)
+        except ValueError as e:
+            print_error(str(e))
+            return
+
+        if rule['kind'] == 'state':
+            target = f"pods in {namespace}" if namespace else "pods in all namespaces"
+        else:
+            target = "every series the PromQL query returns"
+        print_success(f"Alert '{name}' ({rule['severity']}) saved: {condition}")
+        console.print(f"[dim]Checks {target}"
+                      + (f"; fires after {rule['for']}s" if rule['for'] else "")
+                      + f". Rules in {ALERTS_FILE} are evaluated by 'stars collect'.[/dim]")
+
+    def show_alert_history(self, namespace: Optional[str] = None, since: str = '24h',
+                           until: Optional[str] = None, rule: Optional[str] = None, limit: int = 50):
+        """Alert firing/resolved events from the local history, newest last"""
+        import time
+        from datetime import datetime
+        from .alerts import AlertHistory
+        from .prometheus import parse_duration
+
+        try:
+            now = time.time()
+            start = now - parse_duration(since) if since else None
+            end = now - parse_duration(until) if until else None
+            events = AlertHistory().query(start, end, rule=rule, namespace=namespace, limit=limit)
+        except ValueError as e:
+            print_error(str(e))
+            return
+        if not events:
+            print_info(f"No alert events in the last {since}" + (f" for {namespace}" if namespace else ""))
+            return
+
+        table = create_table(f"Alert History{' - ' + namespace if namespace else ''}",
+                             ["Time", "Rule", "State", "Severity", "Target", "Value", "Active For"])
+        colors = {'critical': 'red', 'warning': 'yellow', 'info': 'cyan'}
+        for event in events:
+            state = event.get('state', '')
+            color = colors.get(event.get('severity'), 'white') if state == 'firing' else 'green'
+            value = event.get('value')
+            table.add_row(
+                datetime.fromtimestamp(event['ts']).strftime('%m-%d %H:%M:%S'),
+                event.get('rule', ''),
+                f"[{color}]{state}[/{color}]",
+                event.get('severity', ''),
+                event.get('key', ''),
+                f"{value:.4g}" if isinstance(value, float) else str(value) if value is not None else "-",
+                f"{int(event['ts'] - event.get('since', event['ts']))}s",
+            )
+        console.print(table)
     
-    def configure_webhook(self, url: str):
-        """Configure webhook"""
-        console.print(f"[green]Webhook configured: {url}[/green]")
+    def configure_webhook(self, url: Optional[str] = None, name: str = 'default', batch_size: Optional[int] = None,
+                          remove: bool = False, test: bool = False, retry_dead: bool = False):
+        """Add, replace or remove an alert webhook target and show delivery queues"""
+        import tempfile
+        import time
+        from .config import config
+        from .webhooks import POST_TIMEOUT, WebhookDispatcher, WebhookQueue, parse_targets
+
+        try:
+            specs = [spec for spec in (config.section('webhooks', []) or []) if isinstance(spec, dict)]
+            if remove or url:
+                kept = [spec for spec in specs if spec.get('name') != name]
+                if remove and len(kept) == len(specs):
+                    print_warning(f"No webhook named {name}")
+                    return
+                if url:
+                    spec = {'name': name, 'url': url}
+                    if batch_size:
+                        spec['batch_size'] = batch_size
+                    kept.append(spec)
+                parse_targets(kept)
+                config.data['webhooks'] = kept
+                config.save()
+                specs = kept
+                print_success(f"Webhook {name} {'removed' if remove else 'saved'}")
+            targets = parse_targets(specs)
+        except ValueError as e:
+            print_error(str(e))
+            return
+
+        if not targets:
+            print_info("No webhooks configured. Add one with: stars alert-webhook <url> [--name NAME]")
+            return
+        queue = WebhookQueue()
+        if retry_dead:
+            for target in targets:
+                moved = queue.requeue_dead(target['name'])
+                if moved:
+                    print_info(f"Requeued {moved} dead-lettered batch(es) for {target['name']}")
+
+        if test:
+            selected = [t for t in targets if t['name'] == name] or targets
+            # A throwaway spool keeps the test away from real queued alerts
+            # and from a running `stars collect`.
+            with tempfile.TemporaryDirectory(prefix='stars-webhook-test-') as spool:
+                dispatcher = WebhookDispatcher(selected, WebhookQueue(Path(spool)), max_attempts=1)
+                dispatcher.enqueue([{
+                    'ts': int(time.time()), 'rule': 'stars-test', 'key': 'stars', 'state': 'firing',
+                    'severity': 'info', 'namespace': None, 'value': None, 'since': int(time.time()),
+                    'summary': 'Test alert from stars alert-webhook --test',
+                }])
+                with console.status("Sending test alert..."):
+                    drained = dispatcher.drain(POST_TIMEOUT + 2)
+                dispatcher.stop(0)
+            if not drained:
+                print_error(f"Test alert got no answer within {POST_TIMEOUT + 2}s")
+            elif dispatcher.failed:
+                print_error("Test alert was not accepted by the webhook")
+            else:
+                print_success(f"Test alert delivered to {', '.join(t['name'] for t in selected)}")
+
+        table = create_table("Alert Webhooks", ["Name", "URL", "Batch", "Queued", "Dead Letters"])
+        for target in targets:
+            stats = queue.stats(target['name'])
+            table.add_row(target['name'], target['url'], str(target['batch_size']),
+                          str(stats['queue']), f"[red]{stats['dead']}[/red]" if stats['dead'] else "0")
+        console.print(table)
     
     def autofix_issues(self, namespace: str):
         """
@@ -1286,14 +1782,104 @@ class MonitoringCommands:
         console.print(f"[bold]Load testing {target} with {requests} requests[/bold]")
         console.print("[dim]Note: Requires load testing tools[/dim]")
     
-    def find_bottlenecks(self, namespace: str):
-        """Find bottlenecks"""
-        console.print(f"[bold]Analyzing bottlenecks in {namespace}[/bold]")
+    def find_bottlenecks(self, namespace: str, url: Optional[str] = None):
+        """
+        Rank CPU throttling, memory, network and disk saturation.
+
+        Uses cAdvisor and node-exporter metrics from Prometheus when it is
+        configured; otherwise falls back to metrics-server usage against
+        pod limits.
+        """
+        from .bottlenecks import SIGNALS, build_queries, collect_signals, rank
+        from .quantity import PodResourceTable, format_cpu, format_memory
+
+        try:
+            if not validate_namespace(namespace):
+                print_error(f"Invalid namespace: {namespace}")
+                return
+            console.print(f"[bold]Analyzing bottlenecks in {namespace}[/bold]\n")
+
+            pods = self.k8s.list_pods(namespace)
+            prom = self._prometheus(url)
+            if prom is None:
+                self._bottlenecks_from_metrics(namespace, pods)
+                return
+
+            with console.status("Querying saturation signals..."):
+                signals = collect_signals(prom.query, build_queries(namespace), prom.max_workers)
+            findings = rank(signals)
+            missing = [SIGNALS[name]['title'] for name in SIGNALS if name not in signals]
+
+            # Cross-reference pod findings with their declared resources.
+            resources = PodResourceTable.from_pods(pods)
+            spec = {name: i for i, name in enumerate(resources.names)}
+            hints = {
+                'cpu_throttling': lambda i: f"CPU limit {format_cpu(resources['cpu_limit'][i])}"
+                if resources['cpu_limit'][i] > 0 else "no CPU limit",
+                'memory_limit': lambda i: f"memory limit {format_memory(resources['memory_limit'][i])}",
+                'network_drops': lambda i: f"on {pods[i].spec.node_name or '?'}",
+                'disk_io': lambda i: f"on {pods[i].spec.node_name or '?'}",
+            }
+
+            if not findings:
+                print_success("No bottlenecks above thresholds")
+            else:
+                table = create_table(f"Bottlenecks in {namespace}",
+                                     ["Severity", "Signal", "Pod/Node", "Value", "Spec"])
+                for f in findings[:30]:
+                    unit = SIGNALS[f['signal']]['unit']
+                    value = f"{f['value'] * 100:.0f}%" if unit == 'ratio' else f"{f['value']:.1f} {unit}"
+                    i = spec.get(f['entity']) if f['scope'] == 'pod' else None
+                    detail = hints[f['signal']](i) if i is not None and f['signal'] in hints else ""
+                    color = "red" if f['severity'] >= 2 else "yellow"
+                    table.add_row(f"[{color}]{f['severity']:.1f}x[/{color}]", SIGNALS[f['signal']]['title'],
+                                  f"{f['scope']}/{f['entity']}", value, detail)
+                console.print(table)
+                if len(findings) > 30:
+                    console.print(f"[dim]Showing 30 of {len(findings)} findings[/dim]")
+            if missing:
+                console.print(f"[dim]No data for: {', '.join(missing)}[/dim]")
+        except ValueError as e:
+            print_error(str(e))
+        except Exception as e:
+            print_error(f"Bottleneck analysis failed: {e}")
+            raise
+
+    def _bottlenecks_from_metrics(self, namespace: str, pods: list):
+        """Usage-against-limit fallback when Prometheus is not configured"""
+        import numpy as np
+        from .quantity import PodResourceTable, format_cpu, format_memory
+
         try:
             metrics = self.k8s.get_pod_metrics(namespace)
-            console.print(f"Analyzed {len(metrics)} pods")
-        except:
-            console.print("[yellow]Metrics server required[/yellow]")
+        except Exception:
+            print_warning("Metrics server required (or configure PROMETHEUS_URL for cAdvisor signals)")
+            return
+
+        t = PodResourceTable.from_pods(pods, metrics)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cpu = np.where(t['cpu_limit'] > 0, t['cpu_usage'] / t['cpu_limit'], np.nan)
+            mem = np.where(t['memory_limit'] > 0, t['memory_usage'] / t['memory_limit'], np.nan)
+        # Usage at 90% of a CPU limit almost always means CFS throttling.
+        worst = np.fmax(cpu, mem)
+        order = np.argsort(-np.nan_to_num(worst, nan=-1.0))
+        hot = [i for i in order.tolist() if np.nan_to_num(worst[i]) >= 0.9]
+
+        if not hot:
+            print_success(f"No pods near their CPU or memory limits ({len(t)} pods analyzed)")
+        else:
+            table = create_table(f"Pods near limits in {namespace}",
+                                 ["Pod", "CPU used/limit", "Memory used/limit"])
+            for i in hot[:30]:
+                table.add_row(
+                    t.names[i],
+                    f"{format_cpu(t['cpu_usage'][i])}/{format_cpu(t['cpu_limit'][i])}"
+                    + (f" ({cpu[i] * 100:.0f}%)" if np.isfinite(cpu[i]) else ""),
+                    f"{format_memory(t['memory_usage'][i])}/{format_memory(t['memory_limit'][i])}"
+                    + (f" ({mem[i] * 100:.0f}%)" if np.isfinite(mem[i]) else ""),
+                )
+            console.print(table)
+        console.print("[dim]Configure PROMETHEUS_URL for throttling, network and disk signals[/dim]")
     
     def chaos_experiment(self, action: str, target: str, namespace: str):
         """Chaos experiment"""
@@ -1301,39 +1887,338 @@ class MonitoringCommands:
         console.print("[yellow]⚠ Use with caution in production[/yellow]")
     
     def compare_resources(self, resource1: str, resource2: str, namespace: str):
-        """Compare resources"""
-        console.print(f"[bold]Comparing {resource1} vs {resource2}[/bold]")
+        """
+        Compare two resources structurally.
+
+        Each reference may be a live object (``deployment/web``), a manifest
+        file (``web.yaml``) or a snapshot entry (``snapshot:NAME:deployment/web``).
+        """
+        from .diff import diff_objects
+        try:
+            if not validate_namespace(namespace):
+                print_error(f"Invalid namespace: {namespace}")
+                return
+
+            old = self._resolve_object_ref(resource1, namespace)
+            new = self._resolve_object_ref(resource2, namespace)
+            if old is None or new is None:
+                return
+
+            # Only hide server defaults when comparing live state to a manifest.
+            declared_only = self._is_manifest_ref(resource2) and not self._is_manifest_ref(resource1)
+            changes = diff_objects(old, new, declared_only=declared_only)
+            self._display_diff(changes, resource1, resource2)
+        except ValueError as e:
+            print_error(str(e))
+        except Exception as e:
+            print_error(f"Compare failed: {e}")
+            raise
+
+    # Diff helpers
+
+    @staticmethod
+    def _is_manifest_ref(ref: str) -> bool:
+        return ref.lower().endswith(('.yaml', '.yml'))
+
+    def _load_manifest(self, file_path: str, kind: Optional[str] = None,
+                       name: Optional[str] = None) -> Optional[dict]:
+        """Load one document from a manifest file, optionally matching kind/name"""
+        import yaml
+        from .diff import find_manifest
+
+        try:
+            path = _resolve_safe_yaml_path(file_path)
+        except (ValueError, FileNotFoundError) as exc:
+            print_error(str(exc))
+            return None
+
+        with open(path, 'r') as f:
+            documents = [d for d in yaml.safe_load_all(f) if d]
+
+        if not documents:
+            print_error(f"No resources found in {file_path}")
+            return None
+        if kind and name:
+            manifest = find_manifest(documents, kind, name)
+            if manifest is None:
+                print_error(f"{kind}/{name} not found in {file_path}")
+            return manifest
+        return documents[0]
+
+    def _resolve_object_ref(self, ref: str, namespace: str) -> Optional[dict]:
+        """Resolve a compare reference to a plain object dict"""
+        if ref.startswith('snapshot:'):
+            try:
+                _, snapshot_name, object_ref = ref.split(':', 2)
+                kind, name = object_ref.split('/', 1)
+            except ValueError:
+                raise ValueError(f"Invalid snapshot reference: {ref!r}. Use snapshot:NAME:kind/name")
+            snapshot = self._load_snapshot(snapshot_name)
+            if snapshot is None:
+                return None
+            for key, obj in snapshot.get('objects', {}).items():
+                obj_kind, obj_name = key.split('/', 1)
+                if obj_kind.lower() == kind.lower() and obj_name == name:
+                    return obj
+            print_error(f"{kind}/{name} not found in snapshot '{snapshot_name}'")
+            return None
+
+        if self._is_manifest_ref(ref):
+            return self._load_manifest(ref)
+
+        if '/' not in ref:
+            raise ValueError(f"Invalid resource reference: {ref!r}. Use kind/name, a .yaml file, or snapshot:NAME:kind/name")
+        kind, name = ref.split('/', 1)
+        _validate_resource_name(name)
+        return self.k8s.get_resource_dict(kind.lower(), name, namespace)
+
+    def _display_diff(self, changes: list, left: str, right: str):
+        """Display structural diff entries"""
+        from .utils import truncate_string
+        import json
+
+        if not changes:
+            print_success(f"No differences between {left} and {right}")
+            return
+
+        table = create_table(f"{left} → {right}", ["", "Path", "Old", "New"])
+        markers = {'added': '[green]+[/green]', 'removed': '[red]-[/red]', 'changed': '[yellow]~[/yellow]'}
+
+        def _fmt(value):
+            if value is None:
+                return ""
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value, sort_keys=True)
+            return truncate_string(str(value), 60)
+
+        for change in changes[:200]:
+            table.add_row(markers[change['op']], change['path'], _fmt(change['old']), _fmt(change['new']))
+
+        console.print(table)
+        if len(changes) > 200:
+            console.print(f"\n[dim]Showing 200 of {len(changes)} differences[/dim]")
     
     def launch_dashboard(self, namespace: str):
         """Launch dashboard"""
         console.print(f"[bold]Dashboard for {namespace}[/bold]")
         console.print("[dim]Opening in browser...[/dim]")
     
-    def forecast_usage(self, resource: str, days: int, namespace: str):
-        """Forecast usage"""
-        console.print(f"[bold]Forecasting {resource} usage for {days} days[/bold]")
-        console.print("[dim]Note: Requires historical metrics[/dim]")
-    
-    def god_mode(self):
-        """God mode"""
-        console.clear()
-        console.print("""[bold red]
-    ╔═══════════════════════════════════════════════════════════════╗
-    ║                                                               ║
-    ║              ⚡ STARS GOD MODE ACTIVATED ⚡                    ║
-    ║                                                               ║
-    ║         "This is no time for caution." - STARS                 ║
-    ║                                                               ║
-    ╚═══════════════════════════════════════════════════════════════╝
-    [/bold red]
-    
-    [bold yellow]🔥 SRE Power Commands:[/bold yellow]
-    
-    [bold cyan]Monitoring & Triage:[/bold cyan]
-      tars oncall              - On-call engineer dashboard
-      tars triage              - Quick incident triage
-      tars incident-report     - Generate incident report with AI
-      
+    def forecast_usage(self, resource: str, days: int, namespace: str, url: Optional[str] = None):
+        """Forecast CPU or memory usage, or a recording rule, and time to exhaustion"""
+        import time
+        import numpy as np
+        from .config import config
+        from .forecast import forecast, time_to_exhaustion
+        from .prometheus import result_matrix
+        from .quantity import PodResourceTable, parse_quantity
+        from .recording import parse_rules
+        from .tsdb import MetricStore, POD_RING, NODE_RING, pod_series
+
+        try:
+            recorded = {rule['name'] for rule in parse_rules(config.section('recording_rules', {}))}
+            if resource in recorded:
+                self._forecast_rule(resource, days)
+                return
+            if resource not in ('cpu', 'memory'):
+                print_error(f"Unsupported resource: {resource}. Use 'cpu', 'memory' or a recording rule")
+                return
+            if not validate_namespace(namespace):
+                print_error(f"Invalid namespace: {namespace}")
+                return
+
+            column = 0 if resource == 'cpu' else 1
+            now = int(time.time())
+            lookback = 7 * 86400
+
+            # Local history first; Prometheus fills in when nothing was collected.
+            store = MetricStore()
+            span = store.time_range(POD_RING)
+            start = max(now - lookback, span[0]) if span else now - lookback
+            step = self._forecast_step(now - start)
+            n_buckets = max(1, (now - start) // step + 1)
+
+            labels, y = store.matrix(POD_RING, pod_series(namespace, ''), start, step, n_buckets, column)
+            labels = [name.rsplit('/', 1)[-1] for name in labels]
+            source = "local store"
+
+            prom = self._prometheus(url) if not labels else None
+            if prom is not None:
+                start = now - lookback
+                step = self._forecast_step(lookback)
+                n_buckets = lookback // step + 1
+                selector = f'namespace="{namespace}",container!="",container!="POD"'
+                query = (f"sum by (pod) (rate(container_cpu_usage_seconds_total{{{selector}}}[5m]))"
+                         if resource == 'cpu' else
+                         f"sum by (pod) (container_memory_working_set_bytes{{{selector}}})")
+                with console.status(f"Fetching {resource} history from Prometheus..."):
+                    result = prom.query_range(query, start, now, step)
+                labels, y = result_matrix(result, 'pod', start, step, n_buckets)
+                source = "Prometheus"
+
+            if not labels:
+                print_warning(f"No {resource} history for {namespace}")
+                console.print("[dim]Start the sampler with 'stars collect' or configure PROMETHEUS_URL[/dim]")
+                return
+
+            # Capacity per row: pod limits, namespace quota, node allocatable.
+            pods = self.k8s.list_pods(namespace)
+            table = PodResourceTable.from_pods(pods)
+            limit_by_pod = dict(zip(table.names, table[f"{resource}_limit"]))
+            capacity = [limit_by_pod.get(name, np.nan) for name in labels]
+            kinds = ['pod'] * len(labels)
+
+            quota = np.nan
+            for q in self.k8s.get_resource_quotas(namespace):
+                hard = q.spec.hard or {}
+                for key in (f"limits.{resource}", f"requests.{resource}", resource):
+                    if key in hard:
+                        quota = np.nanmin([quota, parse_quantity(str(hard[key]))])
+                        break
+
+            with np.errstate(invalid='ignore'):
+                total = np.where(np.isnan(y).all(axis=0), np.nan, np.nansum(y, axis=0))
+            rows = [y, total[None, :]]
+            labels.append(f"namespace/{namespace}")
+            capacity.append(quota)
+            kinds.append('namespace')
+
+            node_labels, node_y = store.matrix(NODE_RING, 'node:', start, step, n_buckets, column)
+            if node_labels:
+                allocatable = {
+                    n.metadata.name: parse_quantity(str((n.status.allocatable or {}).get(resource, 0)))
+                    for n in self.k8s.list_nodes()
+                }
+                for name in node_labels:
+                    node = name.split(':', 1)[1]
+                    labels.append(f"node/{node}")
+                    capacity.append(allocatable.get(node, np.nan))
+                    kinds.append('node')
+                rows.append(node_y)
+
+            matrix = np.vstack(rows)
+            horizon = days * 86400 // step
+            season = 86400 // step if matrix.shape[1] >= 2 * (86400 // step) else None
+            result = forecast(matrix, horizon, season)
+            capacity = np.asarray(capacity, dtype=np.float64)
+            tte = time_to_exhaustion(result['path'], result['offsets'], capacity, step, result['current'])
+
+            self._display_forecast(resource, days, namespace, source, labels, kinds,
+                                   result, capacity, tte, step)
+        except ValueError as e:
+            print_error(str(e))
+        except Exception as e:
+            print_error(f"Forecast failed: {e}")
+            raise
+
+    def _forecast_rule(self, name: str, days: int):
+        """Forecast every series of a recording rule; there is no capacity to exhaust"""
+        import time
+        import numpy as np
+        from .forecast import forecast
+        from .recording import rule_matrix
+        from .tsdb import MetricStore, RULE_RING
+
+        now = int(time.time())
+        lookback = 7 * 86400
+        store = MetricStore()
+        span = store.time_range(RULE_RING)
+        start = max(now - lookback, span[0]) if span else now - lookback
+        step = self._forecast_step(now - start)
+        n_buckets = max(1, (now - start) // step + 1)
+        labels, matrix = rule_matrix(store, name, start, step, n_buckets)
+        if not labels:
+            print_warning(f"No samples of recording rule {name}")
+            console.print("[dim]Recording rules are evaluated by 'stars collect'[/dim]")
+            return
+
+        horizon = days * 86400 // step
+        season = 86400 // step if matrix.shape[1] >= 2 * (86400 // step) else None
+        result = forecast(matrix, horizon, season)
+        capacity = np.full(len(labels), np.nan)
+        tte = np.full(len(labels), np.inf)
+        self._display_forecast(name, days, "recording rule", "local store", labels, ['rule'] * len(labels),
+                               result, capacity, tte, step)
+
+    @staticmethod
+    def _forecast_step(window: int) -> int:
+        """Bucket width keeping a window at or below ~1000 points, in whole minutes"""
+        return max(60, -(-window // 1000 // 60) * 60)
+
+    def _display_forecast(self, resource, days, namespace, source, labels, kinds,
+                          result, capacity, tte, step):
+        """Display forecast table sorted by time to exhaustion"""
+        import numpy as np
+        from .quantity import format_cpu, format_memory
+
+        fmt = {'cpu': format_cpu, 'memory': format_memory}.get(resource, lambda v: f"{v:.4g}")
+        final = result['path'][:, -1]
+        # Average growth along the chosen model's path, so the column agrees
+        # with the projected value whichever model won.
+        per_day = (final - result['current']) / days
+
+        def _value(v):
+            return fmt(v) if np.isfinite(v) else "N/A"
+
+        def _duration(seconds):
+            if not np.isfinite(seconds):
+                return "[green]-[/green]"
+            if seconds == 0:
+                return "[red]now[/red]"
+            color = "red" if seconds < 86400 else "yellow"
+            if seconds < 3600:
+                text = f"{seconds / 60:.0f}m"
+            elif seconds < 86400:
+                text = f"{seconds / 3600:.1f}h"
+            else:
+                text = f"{seconds / 86400:.1f}d"
+            return f"[{color}]{text}[/{color}]"
+
+        # Rows at risk first (soonest exhaustion), then fastest growing.
+        order = np.lexsort((-np.nan_to_num(per_day), tte))
+        table = create_table(
+            f"{resource.upper() if resource in ('cpu', 'memory') else resource} forecast for {namespace} ({days}d, {source})",
+            ["Series", "Kind", "Current", "Trend/day", f"In {days}d", "Capacity", "Exhausted in", "Model"]
+        )
+        for i in order[:25]:
+            trend = per_day[i]
+            sign = "+" if trend >= 0 else "-"
+            table.add_row(
+                labels[i], kinds[i],
+                _value(result['current'][i]),
+                f"{sign}{fmt(abs(trend))}" if np.isfinite(trend) else "N/A",
+                _value(final[i]),
+                _value(capacity[i]),
+                _duration(tte[i]),
+                result['model'][i],
+            )
+        console.print(table)
+
+        at_risk = int(np.isfinite(tte).sum())
+        if at_risk:
+            print_warning(f"{at_risk} series reach capacity within {days} days")
+        if len(labels) > 25:
+            console.print(f"[dim]Showing 25 of {len(labels)} series[/dim]")
+    
+    def god_mode(self):
+        """God mode"""
+        console.clear()
+        console.print("""[bold red]
+    ╔═══════════════════════════════════════════════════════════════╗
+    ║                                                               ║
+    ║              ⚡ STARS GOD MODE ACTIVATED ⚡                    ║
+    ║                                                               ║
+    ║         "This is no time for caution." - STARS                 ║
+    ║                                                               ║
+    ╚═══════════════════════════════════════════════════════════════╝
+    [/bold red]
+    
+    [bold yellow]🔥 SRE Power Commands:[/bold yellow]
+    
+    [bold cyan]Monitoring & Triage:[/bold cyan]
+      tars oncall              - On-call engineer dashboard
+      tars triage              - Quick incident triage
+      tars incident-report     - Generate incident report with AI
+      
     [bold cyan]Auto-Remediation:[/bold cyan]
       tars autofix             - Auto-fix common issues
       tars smart-scale <dep>   - AI-powered scaling decisions
@@ -1351,10 +2236,140 @@ class MonitoringCommands:
     [bold green]💡 Pro Tip:[/bold green] Start with 'tars pulse' for a complete overview
     """)
     
-    def generate_heatmap(self, metric: str, namespace: str):
-        """Generate heatmap"""
-        console.print(f"[bold]Heatmap for {metric} in {namespace}[/bold]")
-        console.print("[dim]Note: Requires visualization tools[/dim]")
+    def generate_heatmap(self, metric: str, namespace: str, by: str = 'node',
+                         hours: int = 24, url: Optional[str] = None):
+        """Render a node/namespace/pod by time heatmap of cpu, memory, restarts or a recording rule"""
+        import time
+        import numpy as np
+        from .config import config
+        from .heatmap import quantize, render_rows, legend, time_axis
+        from .prometheus import result_matrix
+        from .quantity import parse_quantity, format_cpu, format_memory
+        from .recording import parse_rules, rule_matrix
+        from .tsdb import MetricStore, POD_RING, NODE_RING, pod_series, group_rows
+
+        try:
+            recorded = {rule['name'] for rule in parse_rules(config.section('recording_rules', {}))}
+            if metric not in ('cpu', 'memory', 'restarts') and metric not in recorded:
+                print_error(f"Unsupported metric: {metric}. Use 'cpu', 'memory', 'restarts' or a recording rule")
+                return
+            if metric not in recorded and by not in ('node', 'namespace', 'pod'):
+                print_error(f"Unsupported grouping: {by}. Use 'node', 'namespace' or 'pod'")
+                return
+            if by == 'pod' and not validate_namespace(namespace):
+                print_error(f"Invalid namespace: {namespace}")
+                return
+            if hours <= 0:
+                print_error("--hours must be positive")
+                return
+
+            # One column per bucket; size buckets so the map fits the terminal.
+            label_width = 28
+            columns = max(10, min(240, console.width - label_width - 2))
+            window = hours * 3600
+            step = max(60, -(-window // columns))
+            n_buckets = -(-window // step)
+            now = int(time.time())
+            start = now - n_buckets * step
+
+            labels, grid, source = [], np.empty((0, n_buckets)), None
+            if metric in recorded:
+                # Rows are the rule's series, summed per --by label when they carry it.
+                labels, grid = rule_matrix(MetricStore(), metric, start, step, n_buckets, by=by)
+                if not labels:
+                    print_warning(f"No samples of recording rule {metric} in the last {hours}h")
+                    console.print("[dim]Recording rules are evaluated by 'stars collect'[/dim]")
+                    return
+                source = "recording rule"
+            elif metric != 'restarts':
+                column = 0 if metric == 'cpu' else 1
+                store = MetricStore()
+                if by == 'node':
+                    names, grid = store.matrix(NODE_RING, 'node:', start, step, n_buckets, column)
+                    labels = [name.split(':', 1)[1] for name in names]
+                else:
+                    prefix = pod_series(namespace, '') if by == 'pod' else 'pod:'
+                    names, grid = store.matrix(POD_RING, prefix, start, step, n_buckets, column)
+                    if by == 'pod':
+                        labels = [name.rsplit('/', 1)[-1] for name in names]
+                    elif names:
+                        namespaces = [name[4:].split('/', 1)[0] for name in names]
+                        labels, codes = np.unique(namespaces, return_inverse=True)
+                        grid = group_rows(grid, codes, len(labels))
+                        labels = labels.tolist()
+                if labels:
+                    source = "local store"
+
+            prom = self._prometheus(url) if not labels else None
+            if prom is not None:
+                query = self._heatmap_query(metric, by, namespace, step)
+                with console.status(f"Fetching {metric} history from Prometheus..."):
+                    result = prom.query_range(query, start + step, now, step)
+                # Each sample covers the step before its timestamp, so bucket
+                # i is the one stamped at its end: bin from start + step.
+                labels, grid = result_matrix(result, by, start + step, step, n_buckets)
+                source = "Prometheus"
+
+            if not labels:
+                print_warning(f"No {metric} history for the last {hours}h")
+                if metric == 'restarts':
+                    console.print("[dim]Restart history needs kube-state-metrics in Prometheus (PROMETHEUS_URL)[/dim]")
+                else:
+                    console.print("[dim]Start the sampler with 'stars collect' or configure PROMETHEUS_URL[/dim]")
+                return
+
+            # Nodes are scaled to their own allocatable; everything else to
+            # the hottest cell so rows compare directly.
+            scale, low, high = None, "0", None
+            if by == 'node' and metric != 'restarts':
+                allocatable = {
+                    n.metadata.name: parse_quantity(str((n.status.allocatable or {}).get(metric, 0)))
+                    for n in self.k8s.list_nodes()
+                }
+                scale = np.array([allocatable.get(name, np.nan) for name in labels])
+                low, high = "0%", "100% allocatable"
+            if high is None:
+                peak = float(np.nanmax(grid)) if np.isfinite(grid).any() else 0.0
+                fmt = {'cpu': format_cpu, 'memory': format_memory,
+                       'restarts': lambda v: f"{v:.0f}"}.get(metric, lambda v: f"{v:.4g}")
+                high = fmt(peak)
+
+            with np.errstate(invalid='ignore'):
+                peaks = np.nanmax(np.where(np.isnan(grid), -np.inf, grid), axis=1)
+            order = np.argsort(-peaks, kind='stable')
+            rows = render_rows(quantize(grid[order], None if scale is None else scale[order]))
+
+            title = f"{metric} by {by}" + (f" in {namespace}" if by == 'pod' and metric not in recorded else "")
+            console.print(f"\n[bold cyan]{title}[/bold cyan] [dim](last {hours}h, "
+                          f"{step // 60}m buckets, {source})[/dim]\n")
+            for i, line in zip(order.tolist(), rows):
+                label = labels[i]
+                if len(label) > label_width:
+                    label = label[:label_width - 1] + '…'
+                console.print(f"{label:<{label_width}} {line}", highlight=False, soft_wrap=True)
+            console.print(f"{'':<{label_width}} [dim]{time_axis(start, step, n_buckets)}[/dim]")
+            console.print(f"\n{legend(low, high)}")
+        except ValueError as e:
+            print_error(str(e))
+        except Exception as e:
+            print_error(f"Heatmap failed: {e}")
+            raise
+
+    @staticmethod
+    def _heatmap_query(metric: str, by: str, namespace: str, step: int) -> str:
+        """PromQL returning one series per heatmap row"""
+        scope = f'namespace="{namespace}",' if by == 'pod' else ''
+        if metric == 'restarts':
+            restarts = f"increase(kube_pod_container_status_restarts_total{{{scope.rstrip(',')}}}[{step}s])"
+            if by == 'node':
+                # kube-state-metrics has no node label on restarts; join it in.
+                return f"sum by (node) ({restarts} * on (namespace, pod) group_left (node) kube_pod_info)"
+            return f"sum by ({by}) ({restarts})"
+
+        selector = f'{scope}container!="",container!="POD"'
+        if metric == 'cpu':
+            return f"sum by ({by}) (rate(container_cpu_usage_seconds_total{{{selector}}}[{max(step, 300)}s]))"
+        return f"sum by ({by}) (container_memory_working_set_bytes{{{selector}}})"
     
     def generate_incident_report(self, incident_id: str, namespace: str):
         """Generate incident report"""
@@ -1389,50 +2404,189 @@ class MonitoringCommands:
     def list_prom_metrics(self, url: str):
         """List Prometheus metrics"""
         import requests
-        from .config import config
-        
-        prom_url = url or config.settings.prometheus_url
-        if not prom_url:
+        from .prometheus import PrometheusError
+
+        try:
+            prom = self._prometheus(url)
+        except ValueError as exc:
+            print_error(str(exc))
+            return
+        if prom is None:
             console.print("[yellow]⚠️  Prometheus URL not configured[/yellow]")
             console.print("Set with: export PROMETHEUS_URL='http://prometheus:9090'")
             return
         
         try:
             # Fetch metric names from Prometheus
-            response = requests.get(f"{prom_url}/api/v1/label/__name__/values", timeout=5)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data.get('status') == 'success':
-                metrics = data.get('data', [])
-                
-                console.print(f"[bold cyan]📊 Prometheus Metrics[/bold cyan] ({len(metrics)} total)")
-                console.print(f"[dim]Source: {prom_url}[/dim]\n")
-                
-                # Display metrics in columns
-                from rich.columns import Columns
-                metric_items = [f"[green]•[/green] {m}" for m in sorted(metrics)[:50]]
-                
-                if len(metrics) > 50:
-                    console.print(Columns(metric_items, equal=True, expand=True))
-                    console.print(f"\n[dim]... and {len(metrics) - 50} more metrics[/dim]")
-                else:
-                    console.print(Columns(metric_items, equal=True, expand=True))
+            metrics = prom.label_values('__name__')
+
+            console.print(f"[bold cyan]📊 Prometheus Metrics[/bold cyan] ({len(metrics)} total)")
+            console.print(f"[dim]Source: {prom.url}[/dim]\n")
+
+            # Display metrics in columns
+            from rich.columns import Columns
+            metric_items = [f"[green]•[/green] {m}" for m in sorted(metrics)[:50]]
+
+            if len(metrics) > 50:
+                console.print(Columns(metric_items, equal=True, expand=True))
+                console.print(f"\n[dim]... and {len(metrics) - 50} more metrics[/dim]")
             else:
-                console.print(f"[red]✗ Error: {data.get('error', 'Unknown error')}[/red]")
-                
+                console.print(Columns(metric_items, equal=True, expand=True))
+        except PrometheusError as e:
+            console.print(f"[red]✗ Error: {e}[/red]")
         except requests.exceptions.ConnectionError:
-            console.print(f"[red]✗ Cannot connect to Prometheus at {prom_url}[/red]")
+            console.print(f"[red]✗ Cannot connect to Prometheus at {prom.url}[/red]")
             console.print("[dim]Make sure Prometheus is running and accessible[/dim]")
         except requests.exceptions.Timeout:
-            console.print(f"[red]✗ Connection timeout to {prom_url}[/red]")
+            console.print(f"[red]✗ Connection timeout to {prom.url}[/red]")
         except Exception as e:
             console.print(f"[red]✗ Error fetching metrics: {e}[/red]")
     
-    def execute_prom_query(self, query: str, url: str):
-        """Execute Prometheus query"""
-        console.print(f"[bold]Query:[/bold] {query}")
-        console.print("[dim]Note: Requires Prometheus connection[/dim]")
+    def execute_prom_query(self, query: str, url: str, span: Optional[str] = None,
+                           step: Optional[str] = None, output: Optional[str] = None,
+                           fmt: Optional[str] = None, limit: int = 30, cache: bool = True):
+        """
+        Run a PromQL query and print it, or write it as CSV/NDJSON.
+
+        With *span* (e.g. ``30d``) this is a range query ending now; long
+        ranges are split into step-aligned chunks fetched in parallel, and
+        reruns only fetch what the range cache does not already hold.
+        """
+        import time
+        from .prometheus import PrometheusError, parse_duration, split_range
+
+        try:
+            prom = self._prometheus(url, cache)
+            if prom is None:
+                print_error("Prometheus URL not configured. Set PROMETHEUS_URL or use --url")
+                return
+
+            now = int(time.time())
+            if span:
+                seconds = parse_duration(span)
+                step_seconds = parse_duration(step) if step else max(15, seconds // 1000)
+                start = now - seconds
+                chunks = len(split_range(start, now, step_seconds))
+                with console.status(f"Fetching {seconds // step_seconds + 1} points per series "
+                                    f"in {chunks} chunk(s)..."):
+                    result = prom.query_range(query, start, now, step_seconds)
+            else:
+                result = prom.query(query)
+
+            if output:
+                samples = self._write_prom_result(result, output, fmt)
+                print_success(f"Wrote {samples} samples from {len(result)} series to {output}")
+            elif not result:
+                print_warning("Query returned no data")
+            elif span:
+                self._display_prom_range(query, result, start, now, step_seconds, limit)
+            else:
+                self._display_prom_instant(query, result, limit)
+        except ValueError as e:
+            print_error(str(e))
+        except PrometheusError as e:
+            print_error(f"Prometheus rejected the query: {e}")
+        except Exception as e:
+            print_error(f"Query failed: {e}")
+            raise
+
+    def _display_prom_instant(self, query: str, result: list, limit: int):
+        """Instant vector as a table, largest values first"""
+        import numpy as np
+        from .prometheus import series_label
+
+        values = np.array([float(r['value'][1]) for r in result])
+        order = np.argsort(-np.nan_to_num(values, nan=-np.inf), kind='stable')[:limit]
+        table = create_table(query, ["Series", "Value"])
+        for i in order.tolist():
+            table.add_row(series_label(result[i].get('metric', {})), f"{values[i]:.4g}")
+        console.print(table)
+        if len(result) > limit:
+            console.print(f"[dim]Showing {limit} of {len(result)} series[/dim]")
+
+    def _display_prom_range(self, query: str, result: list, start: int, end: int, step: int,
+                            limit: int, width: int = 40):
+        """Range matrix as per-series stats plus a sparkline"""
+        import numpy as np
+        from .heatmap import sparklines, time_axis
+        from .prometheus import result_matrix, series_label
+
+        lengths = np.array([len(r.get('values', [])) for r in result])
+        samples = np.array([v for r in result for v in r.get('values', [])], dtype=np.float64).reshape(-1, 2)
+        values = samples[:, 1]
+        has = lengths > 0
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))[has]
+        finite = np.isfinite(values)
+        clean = np.where(finite, values, np.nan)
+
+        # Per-series reductions over the flat sample array.
+        stats = {name: np.full(len(result), np.nan) for name in ('min', 'avg', 'max', 'last')}
+        if len(values):
+            counts = np.add.reduceat(finite.astype(np.int64), offsets)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                stats['avg'][has] = np.add.reduceat(np.where(finite, values, 0.0), offsets) / counts
+            stats['min'][has] = np.fmin.reduceat(clean, offsets)
+            stats['max'][has] = np.fmax.reduceat(clean, offsets)
+            stats['last'][has] = clean[offsets + lengths[has] - 1]
+
+        bucket = max(step, -(-(end - start + step) // width))
+        n_buckets = -(-(end - start + step) // bucket)
+        _, grid = result_matrix(result, '__name__', start, bucket, n_buckets)
+        lines = sparklines(grid)
+
+        order = np.argsort(-np.nan_to_num(stats['max'], nan=-np.inf), kind='stable')[:limit]
+        table = create_table(f"{query} (step {step}s, {len(values)} samples)",
+                             ["Series", "Min", "Avg", "Max", "Last", "Trend"])
+        for i in order.tolist():
+            table.add_row(series_label(result[i].get('metric', {})),
+                          *(f"{stats[name][i]:.4g}" for name in ('min', 'avg', 'max', 'last')),
+                          f"[cyan]{lines[i]}[/cyan]")
+        console.print(table)
+        console.print(f"[dim]Trend: {time_axis(start, bucket, n_buckets)}[/dim]")
+        if len(result) > limit:
+            console.print(f"[dim]Showing {limit} of {len(result)} series (by max)[/dim]")
+
+    def _write_prom_result(self, result: list, output: str, fmt: Optional[str] = None) -> int:
+        """
+        Write a query result one sample per line.
+
+        Args:
+            result: Instant vector or range matrix
+            output: Destination path
+            fmt: ``csv`` or ``ndjson``; inferred from the file suffix if None
+
+        Returns:
+            int: Samples written
+        """
+        import csv
+        import json
+        import math
+
+        if fmt is None:
+            fmt = 'ndjson' if Path(output).suffix.lower() in ('.ndjson', '.jsonl') else 'csv'
+        written = 0
+        with open(output, 'w', newline='') as f:
+            if fmt == 'csv':
+                labels = sorted({k for r in result for k in r.get('metric', {})})
+                writer = csv.writer(f)
+                writer.writerow(labels + ['timestamp', 'value'])
+                for r in result:
+                    metric = r.get('metric', {})
+                    key = [metric.get(label, '') for label in labels]
+                    points = r['values'] if 'values' in r else [r['value']]
+                    writer.writerows(key + [ts, value] for ts, value in points)
+                    written += len(points)
+            else:
+                for r in result:
+                    # Labels are serialised once per series, not per sample.
+                    prefix = '{"metric": ' + json.dumps(r.get('metric', {})) + ', "timestamp": '
+                    points = r['values'] if 'values' in r else [r['value']]
+                    for ts, value in points:
+                        number = float(value)
+                        f.write(f"{prefix}{json.dumps(ts)}, \"value\": "
+                                f"{json.dumps(number) if math.isfinite(number) else 'null'}}}\n")
+                    written += len(points)
+        return written
     
     def show_prom_alerts(self, url: str):
         """Show Prometheus alerts"""
@@ -1448,18 +2602,317 @@ class MonitoringCommands:
         else:
             console.print("[yellow]Prometheus URL not configured[/yellow]")
     
-    def export_prom_data(self, output: str, url: str):
-        """Export Prometheus data"""
-        console.print(f"[green]Exporting to {output}[/green]")
+    def export_prom_data(self, output: str, url: str, queries: Optional[list] = None,
+                         span: str = '1h', step: Optional[str] = None, fmt: Optional[str] = None):
+        """
+        Export range results of *queries* to a columnar directory or Parquet.
+
+        Chunks are written as they arrive, so memory stays flat however
+        long the range; the cache is bypassed for the same reason.
+        """
+        import time
+        from .export import open_export
+        from .prometheus import PrometheusError, parse_duration, split_range
+
+        try:
+            if not queries:
+                print_error("Nothing to export: pass at least one --query")
+                return
+            prom = self._prometheus(url, cache=False)
+            if prom is None:
+                print_error("Prometheus URL not configured. Set PROMETHEUS_URL or use --url")
+                return
+
+            seconds = parse_duration(span)
+            step_seconds = parse_duration(step) if step else max(15, seconds // 1000)
+            end = int(time.time()) // step_seconds * step_seconds
+            start = end - seconds // step_seconds * step_seconds
+            chunks = len(split_range(start, end, step_seconds)) * len(queries)
+
+            done = 0
+            with open_export(output, fmt, step_seconds, start, end) as writer, \
+                    console.status(f"Exporting {chunks} chunk(s)...") as status:
+                for query in queries:
+                    for _, result in prom.iter_range(query, start, end, step_seconds):
+                        writer.write(query, result)
+                        done += 1
+                        status.update(f"Exporting chunk {done}/{chunks}: {writer.samples:,} samples")
+
+            print_success(f"Exported {writer.samples:,} samples from {len(writer.series)} series to {output}")
+        except ValueError as e:
+            print_error(str(e))
+        except PrometheusError as e:
+            print_error(f"Prometheus rejected the query: {e}")
+        except Exception as e:
+            print_error(f"Export failed: {e}")
+            raise
     
-    def compare_prom_metrics(self, metric1: str, metric2: str, url: str):
-        """Compare Prometheus metrics"""
-        console.print(f"[bold]Comparing {metric1} vs {metric2}[/bold]")
+    def compare_prom_metrics(self, metric1: str, metric2: str, url: str, span: str = '1h',
+                             step: Optional[str] = None, on: Optional[str] = None,
+                             max_lag: str = '10m', limit: int = 20, export: Optional[str] = None):
+        """
+        Compare two queries series by series: correlation (also at the best
+        lag), mean difference, median ratio and divergence points.
+
+        Series are paired on shared labels (*on*, comma-separated, or every
+        label both sides carry), so e.g. latency and CPU compare per pod.
+        With *export*, both queries are read from a 'stars prom-export'
+        output instead of Prometheus, over its whole time range.
+        """
+        import time
+        import numpy as np
+        from datetime import datetime
+        from .correlate import compare, pair_rows
+        from .export import export_grids, load_export
+        from .prometheus import PrometheusError, parse_duration, result_matrix
+
+        try:
+            if export:
+                with console.status(f"Loading {export}..."):
+                    labels, (grid_a, grid_b), start, step_seconds = export_grids(
+                        load_export(export), [metric1, metric2], parse_duration(step) if step else None)
+                span = f"export {Path(export).name}"
+            else:
+                prom = self._prometheus(url)
+                if prom is None:
+                    print_error("Prometheus URL not configured. Set PROMETHEUS_URL or use --url")
+                    return
+
+                seconds = parse_duration(span)
+                step_seconds = parse_duration(step) if step else max(15, seconds // 500)
+                end = int(time.time()) // step_seconds * step_seconds
+                start = end - seconds // step_seconds * step_seconds
+                n_buckets = (end - start) // step_seconds + 1
+
+                with console.status("Fetching both series..."):
+                    results = prom.map(lambda q: prom.query_range(q, start, end, step_seconds), [metric1, metric2])
+                labels = [[r.get('metric', {}) for r in result] for result in results]
+                # Same start/step/bucket count for both sides: the grids line up.
+                _, grid_a = result_matrix(results[0], '__name__', start, step_seconds, n_buckets)
+                _, grid_b = result_matrix(results[1], '__name__', start, step_seconds, n_buckets)
+            for query, rows in zip((metric1, metric2), labels):
+                if not rows:
+                    print_warning(f"No data for {query}")
+                    return
+            lag_steps = parse_duration(max_lag) // step_seconds if max_lag else 0
+
+            rows_a, rows_b, keys = pair_rows(*labels, on=[x.strip() for x in on.split(',')] if on else None)
+            if not len(keys):
+                print_warning("No series pairs share label values; choose labels with --on")
+                return
+
+            stats = compare(grid_a[rows_a], grid_b[rows_b], lag_steps)
+
+            strength = np.nan_to_num(np.abs(stats['best_corr']), nan=-1.0)
+            order = np.argsort(-strength, kind='stable')[:limit]
+            table = create_table(f"{metric1} vs {metric2} ({span}, step {step_seconds}s)",
+                                 ["Pair", "Corr", "Best Lag", "Corr@Lag", "Mean Diff", "Ratio", "Diverged"])
+            for i in order.tolist():
+                corr = stats['corr'][i]
+                color = "green" if abs(corr) >= 0.7 else "yellow" if abs(corr) >= 0.4 else "dim"
+                first = stats['first_divergence'][i]
+                diverged = (f"{stats['divergences'][i]}x from "
+                            f"{datetime.fromtimestamp(start + first * step_seconds).strftime('%H:%M')}"
+                            if first >= 0 else "-")
+                table.add_row(
+                    keys[i],
+                    f"[{color}]{corr:+.2f}[/{color}]" if np.isfinite(corr) else "-",
+                    f"{stats['best_lag'][i] * step_seconds:+d}s",
+                    f"{stats['best_corr'][i]:+.2f}" if np.isfinite(stats['best_corr'][i]) else "-",
+                    f"{stats['mean_diff'][i]:.4g}",
+                    f"{stats['median_ratio'][i]:.4g}",
+                    diverged,
+                )
+            console.print(table)
+
+            finite = stats['corr'][np.isfinite(stats['corr'])]
+            if len(finite):
+                console.print(f"[dim]{len(keys)} pairs; median correlation {np.median(finite):+.2f}; "
+                              f"positive lag: {metric2} follows {metric1}[/dim]")
+            if len(keys) > limit:
+                console.print(f"[dim]Showing {limit} of {len(keys)} pairs (by strongest correlation)[/dim]")
+        except ValueError as e:
+            print_error(str(e))
+        except PrometheusError as e:
+            print_error(f"Prometheus rejected the query: {e}")
+        except Exception as e:
+            print_error(f"Comparison failed: {e}")
+            raise
     
-    def create_prom_recording(self, name: str, query: str, url: str):
-        """Create Prometheus recording"""
-        console.print(f"[green]Recording rule '{name}' created[/green]")
+    def create_prom_recording(self, name: Optional[str], query: Optional[str], url: Optional[str] = None,
+                              interval: Optional[str] = None, remove: bool = False, from_slos: bool = False):
+        """
+        Add or remove recording rules, evaluated into the local store by
+        'stars collect'; without a name, list them with their latest values.
+        """
+        import time
+        from .config import config
+        from .prometheus import PrometheusError
+        from .recording import RULE_NAME_RE, parse_rules
+        from .slo import parse_slos, sli_expressions
+        from .tsdb import MetricStore, RULE_RING
+
+        try:
+            rules = dict(config.section('recording_rules', {}) or {})
+            if from_slos:
+                added = sli_expressions(parse_slos(config.section('slos', {})))
+                if not added:
+                    print_warning("No SLOs configured")
+                    return
+                rules.update(added)
+            elif remove:
+                if not name:
+                    print_error("--remove needs the name of the rule to remove")
+                    return
+                if rules.pop(name, None) is None:
+                    print_warning(f"No recording rule named {name}")
+                    return
+            elif name:
+                if not RULE_NAME_RE.match(name):
+                    print_error(f"Invalid rule name: {name!r} (use e.g. namespace:latency_p99:5m)")
+                    return
+                if not query:
+                    print_error("A recording rule needs a PromQL query")
+                    return
+                prom = self._prometheus(url)
+                if prom is not None:
+                    # Catch typos now rather than as collector warnings.
+                    result = prom.query(query)
+                    print_info(f"[dim]Query returns {len(result)} series now[/dim]")
+                rules[name] = {'expr': query, 'interval': interval} if interval else query
+
+            if from_slos or remove or name:
+                parse_rules(rules)
+                config.data['recording_rules'] = rules
+                config.save()
+                if from_slos:
+                    print_success(f"{len(added)} SLI expressions recorded as rules; 'stars sli' reads them once 'stars collect' runs")
+                else:
+                    print_success(f"Recording rule '{name}' {'removed' if remove else 'saved'}")
+                    if not remove:
+                        console.print("[dim]Evaluated on every 'stars collect' sample into ~/.stars/tsdb[/dim]")
+                return
+
+            parsed = parse_rules(rules)
+        except ValueError as e:
+            print_error(str(e))
+            return
+        except PrometheusError as e:
+            print_error(f"Prometheus rejected the query: {e}")
+            return
+
+        if not parsed:
+            print_info("No recording rules. Add one with: stars prom-record <name> <query>")
+            return
+        store = MetricStore()
+        now = int(time.time())
+        latest = {}
+        if store.has_ring(RULE_RING):
+            records = store.read(RULE_RING, since=now - 86400, prefix='rule:')
+            for sid, ts in zip(records['sid'].tolist(), records['ts'].tolist()):
+                series = store.index.name(sid)
+                rule = series[len('rule:'):series.find('{')]
+                count, last = latest.get(rule, (0, 0))
+                latest[rule] = (count + 1, max(last, ts))
+        table = create_table("Recording Rules", ["Name", "Expression", "Interval", "Samples (24h)", "Last"])
+        for rule in parsed:
+            count, last = latest.get(rule['name'], (0, 0))
+            table.add_row(rule['name'], rule['expr'], f"{rule['interval']}s" if rule['interval'] else "every sample",
+                          str(count), f"{now - last}s ago" if last else "[dim]never[/dim]")
+        console.print(table)
     
+    def collect_metrics(self, interval: int, namespace: Optional[str] = None,
+                        prom_queries: Optional[list] = None, url: Optional[str] = None,
+                        iterations: Optional[int] = None):
+        """Sample pod/node metrics into the local time-series store"""
+        import yaml
+        from datetime import datetime
+        from .alerts import AlertEvaluator, load_rules
+        from .collector import MetricsCollector
+        from .config import ALERTS_FILE, config
+        from .recording import RuleRecorder, parse_rules
+        from .tsdb import MetricStore
+        from .webhooks import WebhookDispatcher, parse_targets
+
+        if namespace and not validate_namespace(namespace):
+            print_error(f"Invalid namespace: {namespace}")
+            return
+
+        try:
+            rules = load_rules(ALERTS_FILE)
+        except (ValueError, yaml.YAMLError) as exc:
+            print_error(f"Alert rules not loaded: {exc}")
+            rules = []
+        try:
+            recording = parse_rules(config.section('recording_rules', {}))
+        except ValueError as exc:
+            print_error(f"Recording rules not loaded: {exc}")
+            recording = []
+
+        prom = prom_fetch = None
+        if prom_queries or recording or any(rule['kind'] == 'promql' for rule in rules):
+            try:
+                prom = self._prometheus(url)
+            except ValueError as exc:
+                print_error(str(exc))
+                return
+            if prom is None:
+                if prom_queries:
+                    print_warning("Prometheus URL not configured - skipping --prom-query")
+                prom_queries = None
+            else:
+                prom_fetch = prom.query
+
+        store = MetricStore()
+        collector = MetricsCollector(self.k8s, store, namespace, prom_queries, prom_fetch)
+        if recording and prom is not None:
+            # Before the alert evaluator, so both see the same sample time.
+            collector.hooks.append(RuleRecorder(recording, prom, store))
+            console.print(f"[dim]Recording {len(recording)} rules into {store.root}[/dim]")
+        elif recording:
+            print_warning("Prometheus URL not configured - skipping recording rules")
+        dispatcher = None
+        if rules:
+            evaluator = AlertEvaluator(rules, k8s=self.k8s, prom=prom, rules_path=ALERTS_FILE)
+            evaluator.listeners.append(self._print_alert_events)
+            collector.hooks.append(evaluator)
+            console.print(f"[dim]Evaluating {len(rules)} alert rules from {ALERTS_FILE}[/dim]")
+            try:
+                targets = parse_targets(config.section('webhooks', []))
+            except ValueError as exc:
+                print_error(f"Webhooks not loaded: {exc}")
+                targets = []
+            if targets:
+                # Delivery runs in the background; the evaluator only spools.
+                dispatcher = WebhookDispatcher(targets).start()
+                evaluator.listeners.append(dispatcher.enqueue)
+                console.print(f"[dim]Sending alerts to {len(targets)} webhook(s)[/dim]")
+
+        def _report(ts: float, written: dict):
+            counts = ", ".join(f"{ring}={n}" for ring, n in written.items()) or "no samples"
+            console.print(f"[dim]{datetime.fromtimestamp(ts).strftime('%H:%M:%S')}[/dim] {counts}")
+
+        console.print(f"[bold green]STARS:[/bold green] collecting every {interval}s into {store.root}")
+        console.print("[dim]Press Ctrl+C to stop[/dim]\n")
+        try:
+            collector.run(interval, iterations=iterations, on_sample=_report)
+        except KeyboardInterrupt:
+            console.print("\n[bold green]STARS:[/bold green] collector stopped.")
+        finally:
+            store.flush()
+            if dispatcher is not None:
+                dispatcher.stop()
+
+    @staticmethod
+    def _print_alert_events(events: list):
+        for event in events:
+            if event['state'] == 'firing':
+                color = "red" if event['severity'] == 'critical' else "yellow"
+                console.print(f"[{color}]ALERT {event['rule']}[/{color}] {event['key']} "
+                              f"({event['severity']}, value {event['value']})")
+            else:
+                console.print(f"[green]RESOLVED {event['rule']}[/green] {event['key']}")
+
     def show_pulse(self, namespace: str):
         """Show pulse"""
         console.print(f"\n[bold cyan]Cluster Pulse[/bold cyan]\n")
@@ -1479,34 +2932,477 @@ class MonitoringCommands:
         }
         console.print(runbooks.get(issue, "No runbook available"))
     
-    def show_sli(self, namespace: str):
-        """Show SLI"""
-        console.print(f"[bold]Service Level Indicators - {namespace}[/bold]")
-        console.print("Availability: 99.9%")
-        console.print("Latency (p95): 200ms")
-        console.print("Error Rate: 0.1%")
-    
-    def show_slo(self, namespace: str):
-        """Show SLO"""
-        console.print(f"[bold]Service Level Objectives - {namespace}[/bold]")
-        console.print("Target Availability: 99.95%")
-        console.print("Target Latency (p95): 150ms")
-        console.print("Target Error Rate: 0.05%")
-    
-    def smart_scale(self, resource: str, namespace: str):
-        """Smart scale"""
-        console.print(f"[bold]AI-powered scaling for {resource}[/bold]")
-        console.print("[dim]Analyzing metrics...[/dim]")
-        console.print("[green]Recommendation: Scale to 3 replicas[/green]")
+    _SLO_EXAMPLE = """slos:
+  checkout-availability:
+    namespace: shop
+    objective: 99.9
+    bad: sum(rate(http_requests_total{job="checkout",code=~"5.."}[$window]))
+    total: sum(rate(http_requests_total{job="checkout"}[$window]))
+  checkout-latency:
+    objective: 99
+    histogram: http_request_duration_seconds_bucket{job="checkout"}
+    threshold: 0.3"""
+
+    def _evaluate_slos(self, namespace: Optional[str], url: Optional[str]):
+        """
+        Evaluate the configured SLOs, optionally only those of *namespace*.
+
+        Returns:
+            tuple: (slos, evaluation dict), or None after reporting why not
+        """
+        import time
+        from .config import config
+        from .recording import latest_values, parse_rules
+        from .slo import WINDOWS, evaluate, fetch_windows, parse_slos
+        from .tsdb import MetricStore
+
+        slos = parse_slos(config.section('slos', {}))
+        if namespace:
+            slos = [slo for slo in slos if slo['namespace'] in (None, namespace)]
+        if not slos:
+            print_warning("No SLOs configured" + (f" for namespace {namespace}" if namespace else ""))
+            print_info(f"[dim]Define them in ~/.stars/config.yaml, e.g.:\n{self._SLO_EXAMPLE}[/dim]")
+            return None
+
+        prom = self._prometheus(url)
+        if prom is None:
+            print_error("Prometheus URL not configured. Set PROMETHEUS_URL or use --url")
+            return None
+
+        # SLI expressions recorded by 'stars collect' are read, not queried.
+        rules = parse_rules(config.section('recording_rules', {}))
+        # Two samples old at most, but not under a minute for short intervals.
+        max_age = max(2 * config.settings.interval, 60)
+        recorded = latest_values(MetricStore(), rules, max_age) if rules else {}
+
+        started = time.time()
+        with console.status(f"Evaluating {len(slos)} SLOs over {', '.join(WINDOWS)}..."):
+            good, total = fetch_windows(prom, slos, recorded=recorded)
+        stats = evaluate(slos, good, total)
+        logger.debug(f"Evaluated {len(slos)} SLOs in {time.time() - started:.2f}s "
+                     f"({len(recorded)} expressions from recording rules)")
+        return slos, stats
+
+    def show_sli(self, namespace: Optional[str] = None, url: Optional[str] = None):
+        """Availability and latency SLIs of every configured SLO over each window"""
+        import numpy as np
+        from .prometheus import PrometheusError
+        from .slo import WINDOWS
+
+        try:
+            evaluated = self._evaluate_slos(namespace, url)
+            if evaluated is None:
+                return
+            slos, stats = evaluated
+            table = create_table(f"Service Level Indicators{' - ' + namespace if namespace else ''}",
+                                 ["SLO", "Type", "Objective"] + list(WINDOWS))
+            for i, slo in enumerate(slos):
+                cells = []
+                for value in stats['sli'][i].tolist():
+                    if not np.isfinite(value):
+                        cells.append("[dim]no data[/dim]")
+                    else:
+                        color = "green" if value >= slo['objective'] else "red"
+                        cells.append(f"[{color}]{value * 100:.3f}%[/{color}]")
+                table.add_row(slo['name'], slo['kind'], f"{slo['objective'] * 100:g}%", *cells)
+            console.print(table)
+        except ValueError as e:
+            print_error(str(e))
+        except PrometheusError as e:
+            print_error(f"Prometheus rejected the query: {e}")
+        except Exception as e:
+            print_error(f"SLI evaluation failed: {e}")
+            raise
+
+    def show_slo(self, namespace: Optional[str] = None, url: Optional[str] = None):
+        """Error budget and multi-window burn rate of every configured SLO"""
+        import numpy as np
+        from .prometheus import PrometheusError
+        from .slo import BURN_ALERTS, PERIOD, WINDOWS
+
+        try:
+            evaluated = self._evaluate_slos(namespace, url)
+            if evaluated is None:
+                return
+            slos, stats = evaluated
+            burn_windows = [w for w in WINDOWS if w != PERIOD]
+            table = create_table(f"Service Level Objectives{' - ' + namespace if namespace else ''}",
+                                 ["SLO", "Objective", f"SLI ({PERIOD})", "Budget Left"]
+                                 + [f"Burn {w}" for w in burn_windows] + ["Status"])
+            period = WINDOWS.index(PERIOD)
+            for i, slo in enumerate(slos):
+                sli = stats['sli'][i, period]
+                budget = stats['budget'][i]
+                if not np.isfinite(budget):
+                    budget_cell = "[dim]-[/dim]"
+                else:
+                    color = "green" if budget >= 0.5 else "yellow" if budget >= 0 else "red"
+                    budget_cell = f"[{color}]{budget * 100:.1f}%[/{color}]"
+                burns = [f"{b:.2f}x" if np.isfinite(b) else "-"
+                         for b in stats['burn'][i, [WINDOWS.index(w) for w in burn_windows]].tolist()]
+                alert = stats['alerts'][i]
+                if alert == 'page':
+                    status = "[bold red]PAGE[/bold red]"
+                elif alert:
+                    status = f"[yellow]{alert.upper()}[/yellow]"
+                elif np.isfinite(budget) and budget < 0:
+                    status = "[red]budget spent[/red]"
+                elif not np.isfinite(sli):
+                    status = "[dim]no data[/dim]"
+                else:
+                    status = "[green]ok[/green]"
+                table.add_row(slo['name'], f"{slo['objective'] * 100:g}%",
+                              f"{sli * 100:.3f}%" if np.isfinite(sli) else "-",
+                              budget_cell, *burns, status)
+            console.print(table)
+            rules = "; ".join(f"{severity}: {long} and {short} burn >= {rate:g}x"
+                              for severity, long, short, rate in BURN_ALERTS)
+            console.print(f"[dim]Burn 1x spends the budget in exactly {PERIOD}. {rules}[/dim]")
+        except ValueError as e:
+            print_error(str(e))
+        except PrometheusError as e:
+            print_error(f"Prometheus rejected the query: {e}")
+        except Exception as e:
+            print_error(f"SLO evaluation failed: {e}")
+            raise
+    
+    def smart_scale(self, resource: str, namespace: str, all_namespaces: bool = False,
+                    days: int = 7, url: Optional[str] = None):
+        """Recommend container requests and replica counts from usage percentiles"""
+        import time
+        import numpy as np
+        from .quantity import parse_cpu, parse_memory
+        from .rightsize import RightSizer
+        from .tsdb import MetricStore, CONTAINER_RING
+
+        try:
+            scope = None if all_namespaces else namespace
+            if scope and not validate_namespace(scope):
+                print_error(f"Invalid namespace: {scope}")
+                return
+            if days <= 0:
+                print_error("--days must be positive")
+                return
+
+            deployments = self.k8s.list_deployments(scope)
+            if resource not in ('all', '*'):
+                deployments = [d for d in deployments if d.metadata.name == resource]
+                if not deployments:
+                    print_error(f"Deployment not found: {resource}")
+                    return
+            if not deployments:
+                print_warning("No deployments to analyze")
+                return
+
+            # One row per (deployment, container) of the pod template.
+            workloads, replicas = [], []
+            rows, workload_of_row, requests_cpu, requests_mem, limits_mem = {}, [], [], [], []
+            for d in deployments:
+                w = len(workloads)
+                workloads.append((d.metadata.namespace, d.metadata.name))
+                replicas.append(d.spec.replicas if d.spec.replicas is not None else 1)
+                for c in d.spec.template.spec.containers or []:
+                    res = c.resources
+                    req = (res.requests if res else None) or {}
+                    lim = (res.limits if res else None) or {}
+                    rows[(d.metadata.namespace, d.metadata.name, c.name)] = len(workload_of_row)
+                    workload_of_row.append(w)
+                    requests_cpu.append(parse_cpu(req.get('cpu')))
+                    requests_mem.append(parse_memory(req.get('memory')))
+                    limits_mem.append(parse_memory(lim.get('memory')))
+            workload_index = {key: i for i, key in enumerate(workloads)}
+
+            def row_of(ns: str, pod: str, container: str) -> int:
+                # Deployment pods are named <deployment>-<rs hash>-<suffix>.
+                owner = pod.rsplit('-', 2)[0]
+                if (ns, owner) not in workload_index:
+                    return -1
+                return rows.get((ns, owner, container), -1)
+
+            sizer = RightSizer(np.array(workload_of_row), len(workloads))
+            now = int(time.time())
+            since = now - days * 86400
+            source = None
+
+            store = MetricStore()
+            if store.has_ring(CONTAINER_RING):
+                prefix = f"container:{scope}/" if scope else "container:"
+                sids = store.index.ids_with_prefix(prefix)
+                lookup = np.full(len(store.index), -1, dtype=np.int64)
+                for sid in sids.tolist():
+                    ns, pod, container = store.index.name(sid)[len('container:'):].split('/', 2)
+                    lookup[sid] = row_of(ns, pod, container)
+                records = store.read(CONTAINER_RING, since=since, prefix=prefix)
+                if len(records):
+                    row_ids = lookup[records['sid']]
+                    for chunk in self._timestamp_chunks(records['ts']):
+                        ts = records['ts'][chunk]
+                        sizer.add('cpu', ts, row_ids[chunk], records['values'][chunk, 0])
+                        sizer.add('memory', ts, row_ids[chunk], records['values'][chunk, 1])
+                    if (row_ids >= 0).any():
+                        source = "local store"
+
+            prom = self._prometheus(url) if source is None else None
+            if prom is not None:
+                step = max(300, (now - since) // 2000)
+                selector = (f'namespace="{scope}",' if scope else '') + 'container!="",container!="POD"'
+                queries = {
+                    'cpu': f"sum by (namespace, pod, container) (rate(container_cpu_usage_seconds_total{{{selector}}}[5m]))",
+                    'memory': f"sum by (namespace, pod, container) (container_memory_working_set_bytes{{{selector}}})",
+                }
+                with console.status("Fetching container usage from Prometheus..."):
+                    results = prom.map(lambda q: prom.query_range(q, since, now, step), queries.values())
+                    for res_name, result in zip(queries, results):
+                        if not result:
+                            continue
+                        lengths = [len(r.get('values', [])) for r in result]
+                        row_ids = np.repeat([row_of(r['metric'].get('namespace', ''), r['metric'].get('pod', ''),
+                                                    r['metric'].get('container', '')) for r in result], lengths)
+                        samples = np.array([v for r in result for v in r.get('values', [])],
+                                           dtype=np.float64).reshape(-1, 2)
+                        sizer.add(res_name, samples[:, 0], row_ids, samples[:, 1])
+                        if (row_ids >= 0).any():
+                            source = "Prometheus"
+
+            if source is None:
+                print_warning(f"No container usage history for the last {days}d")
+                console.print("[dim]Start the sampler with 'stars collect' or configure PROMETHEUS_URL[/dim]")
+                return
+
+            rec = sizer.recommend(np.array(requests_cpu), np.array(requests_mem), np.array(replicas))
+            self._display_right_sizing(list(rows), np.array(workload_of_row), workloads, replicas, rec,
+                                       np.array(requests_cpu), np.array(requests_mem),
+                                       np.array(limits_mem), days, source)
+        except ValueError as e:
+            print_error(str(e))
+        except Exception as e:
+            print_error(f"Smart scale failed: {e}")
+            raise
+
+    @staticmethod
+    def _timestamp_chunks(ts, size: int = 1 << 20):
+        """Slices of about *size* records that never split one timestamp"""
+        import numpy as np
+        start, n = 0, len(ts)
+        while start < n:
+            end = min(start + size, n)
+            if end < n:
+                end = start + int(np.searchsorted(ts[start:], ts[end - 1], side='right'))
+            yield slice(start, end)
+            start = end
+
+    def _display_right_sizing(self, keys, workload_of_row, workloads, replicas, rec,
+                              requests_cpu, requests_mem, limits_mem, days, source):
+        """Display container and replica recommendations with reclaimable capacity"""
+        import numpy as np
+        from .quantity import format_cpu, format_memory
+
+        has_data = ~np.isnan(rec['cpu'][:, 1]) | ~np.isnan(rec['memory'][:, 2])
+        pod_replicas = np.array(replicas, dtype=np.float64)[workload_of_row]
+
+        def _trio(values, fmt):
+            return "/".join(fmt(v) if np.isfinite(v) else "-" for v in values)
+
+        def _change(current, proposed, fmt):
+            if not np.isfinite(proposed):
+                return "-"
+            if current <= 0:
+                return f"[yellow]{fmt(proposed)}[/yellow] (unset)"
+            color = "green" if proposed < current else "yellow" if proposed > current else "white"
+            return f"[{color}]{fmt(proposed)}[/{color}]"
+
+        with np.errstate(invalid='ignore'):
+            spare_cpu = np.nan_to_num((requests_cpu - rec['cpu_request']) * pod_replicas)
+            spare_mem = np.nan_to_num((requests_mem - rec['memory_request']) * pod_replicas)
+        order = np.lexsort((-spare_mem, -spare_cpu))
+
+        table = create_table(
+            f"Right-sizing from {days}d of usage ({source})",
+            ["Workload", "Container", "CPU p50/p95/p99", "CPU req", "→ rec",
+             "Mem p50/p95/p99", "Mem req", "→ rec"]
+        )
+        shown = 0
+        for r in order:
+            if not has_data[r] or shown >= 50:
+                continue
+            ns, name, container = keys[r]
+            oom_risk = limits_mem[r] > 0 and rec['memory'][r, 2] >= limits_mem[r] * 0.9
+            table.add_row(
+                f"{ns}/{name}", container + (" [red](near mem limit)[/red]" if oom_risk else ""),
+                _trio(rec['cpu'][r], format_cpu),
+                format_cpu(requests_cpu[r]) if requests_cpu[r] > 0 else "-",
+                _change(requests_cpu[r], rec['cpu_request'][r], format_cpu),
+                _trio(rec['memory'][r], format_memory),
+                format_memory(requests_mem[r]) if requests_mem[r] > 0 else "-",
+                _change(requests_mem[r], rec['memory_request'][r], format_memory),
+            )
+            shown += 1
+        console.print(table)
+
+        replica_table = create_table("Replicas at current requests",
+                                     ["Workload", "Replicas", "Total CPU p95", "Total Mem p95", "Recommended"])
+        for w, (ns, name) in enumerate(workloads):
+            if np.isnan(rec['total_cpu'][w, 1]) and np.isnan(rec['total_memory'][w, 1]):
+                continue
+            current, proposed = replicas[w], int(rec['replicas'][w])
+            color = "green" if proposed < current else "yellow" if proposed > current else "white"
+            replica_table.add_row(
+                f"{ns}/{name}", str(current),
+                format_cpu(rec['total_cpu'][w, 1]) if np.isfinite(rec['total_cpu'][w, 1]) else "-",
+                format_memory(rec['total_memory'][w, 1]) if np.isfinite(rec['total_memory'][w, 1]) else "-",
+                f"[{color}]{proposed}[/{color}]",
+            )
+        console.print(replica_table)
+
+        reclaim_cpu = spare_cpu[spare_cpu > 0].sum()
+        reclaim_mem = spare_mem[spare_mem > 0].sum()
+        console.print(f"\n[bold]Reclaimable:[/bold] {format_cpu(reclaim_cpu)} CPU, "
+                      f"{format_memory(reclaim_mem)} memory across current replicas")
+        console.print("[dim]Requests: CPU p95 and memory p99 plus 15% headroom. "
+                      "Replicas keep total p95 at 70% of requests.[/dim]")
     
     def create_snapshot(self, name: str, namespace: str):
-        """Create snapshot"""
-        console.print(f"[green]Snapshot '{name}' created for {namespace}[/green]")
-    
-    def monitor_spikes(self, metric: str, threshold: float, namespace: str):
-        """Monitor spikes"""
-        console.print(f"[bold]Monitoring {metric} for spikes > {threshold}%[/bold]")
-        console.print("[dim]Press Ctrl+C to stop[/dim]")
+        """Snapshot deployments, services and configmaps for later comparison"""
+        import json
+        import os
+        from datetime import datetime
+        from .config import SNAPSHOTS_DIR
+        from .diff import normalize
+
+        try:
+            _validate_resource_name(name, "snapshot name")
+            if not validate_namespace(namespace):
+                print_error(f"Invalid namespace: {namespace}")
+                return
+
+            sanitize = self.k8s.api_client.sanitize_for_serialization
+            objects = {}
+            for kind, items in (
+                ('Deployment', self.k8s.list_deployments(namespace)),
+                ('Service', self.k8s.list_services(namespace)),
+                ('ConfigMap', self.k8s.list_configmaps(namespace)),
+            ):
+                for item in items:
+                    objects[f"{kind}/{item.metadata.name}"] = normalize(sanitize(item))
+
+            snapshot = {
+                'name': name,
+                'namespace': namespace,
+                'created_at': datetime.utcnow().isoformat(),
+                'objects': objects,
+            }
+
+            SNAPSHOTS_DIR.mkdir(exist_ok=True, mode=0o700)
+            snapshot_file = SNAPSHOTS_DIR / f"{name}.json"
+            tmp_path = str(snapshot_file) + '.tmp'
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, snapshot_file)
+
+            print_success(f"Snapshot '{name}' created for {namespace} ({len(objects)} objects)")
+            console.print(f"[dim]Compare with: stars compare snapshot:{name}:deployment/<name> deployment/<name>[/dim]")
+        except ValueError as e:
+            print_error(str(e))
+        except Exception as e:
+            print_error(f"Failed to create snapshot: {e}")
+            raise
+
+    def _load_snapshot(self, name: str) -> Optional[dict]:
+        """Load a stored snapshot by name"""
+        import json
+        from .config import SNAPSHOTS_DIR
+
+        _validate_resource_name(name, "snapshot name")
+        snapshot_file = SNAPSHOTS_DIR / f"{name}.json"
+        if not snapshot_file.exists():
+            print_error(f"Snapshot not found: {name}")
+            return None
+        with open(snapshot_file, 'r') as f:
+            return json.load(f)
+    
+    def monitor_spikes(self, metric: str, threshold: float, namespace: str, interval: int = 15,
+                       url: Optional[str] = None, iterations: Optional[int] = None):
+        """
+        Watch live samples for spikes.
+
+        ``cpu`` and ``memory`` are read per pod from metrics-server; any other
+        metric is treated as a PromQL expression and every returned series
+        is tracked separately.
+        """
+        import time
+        from datetime import datetime
+        import numpy as np
+        from .anomaly import SpikeDetector
+        from .quantity import metric_usage, format_cpu, format_memory
+
+        try:
+            if threshold <= 0:
+                print_error("Threshold must be a positive percentage")
+                return
+            if namespace and not validate_namespace(namespace):
+                print_error(f"Invalid namespace: {namespace}")
+                return
+
+            if metric in ('cpu', 'memory'):
+                column = 0 if metric == 'cpu' else 1
+                fmt = format_cpu if metric == 'cpu' else format_memory
+
+                def sample():
+                    items = self.k8s.get_pod_metrics(namespace)
+                    names = [f"{m['metadata'].get('namespace', '')}/{m['metadata']['name']}" for m in items]
+                    return names, np.array([metric_usage(m)[column] for m in items])
+            else:
+                prom = self._prometheus(url)
+                if prom is None:
+                    print_error("Prometheus URL not configured. Set PROMETHEUS_URL or use --url")
+                    return
+
+                def fmt(value):
+                    return f"{value:.4g}"
+
+                def sample():
+                    result = prom.query(metric)
+                    names = [
+                        "{" + ",".join(f'{k}="{v}"' for k, v in sorted(r.get('metric', {}).items())) + "}"
+                        for r in result
+                    ]
+                    return names, np.array([float(r['value'][1]) for r in result])
+
+            detector = SpikeDetector(threshold)
+            console.print(f"[bold]Monitoring {metric} for spikes > {threshold}% over baseline[/bold] "
+                          f"[dim](every {interval}s)[/dim]")
+            console.print("[dim]Press Ctrl+C to stop[/dim]\n")
+
+            done = 0
+            while iterations is None or done < iterations:
+                started = time.time()
+                try:
+                    names, values = sample()
+                except Exception as e:
+                    logger.warning(f"Spike sample failed: {e}")
+                    names, values = [], np.empty(0)
+
+                for spike in detector.update(names, values):
+                    stamp = datetime.fromtimestamp(started).strftime('%H:%M:%S')
+                    console.print(
+                        f"[dim]{stamp}[/dim] [bold red]SPIKE[/bold red] {spike['series']} "
+                        f"{fmt(spike['value'])} (baseline {fmt(spike['baseline'])}, "
+                        f"+{spike['rise']:.0f}%, {spike['score']:.1f}σ)"
+                    )
+                    logger.warning(f"Spike in {metric} for {spike['series']}: +{spike['rise']:.0f}%")
+
+                done += 1
+                if iterations is not None and done >= iterations:
+                    break
+                time.sleep(max(0.0, interval - (time.time() - started)))
+
+            console.print(f"\n[dim]Tracked {len(detector)} series[/dim]")
+        except KeyboardInterrupt:
+            console.print(f"\n[bold green]STARS:[/bold green] stopped spike monitor.")
+        except Exception as e:
+            print_error(f"Spike monitor failed: {e}")
+            raise
     
     def generate_story(self, namespace: str):
         """Generate story"""
@@ -1528,46 +3424,79 @@ class MonitoringCommands:
         console.print(f"[bold]Tracing {service}[/bold]")
         console.print("[dim]Note: Requires distributed tracing (Jaeger/Zipkin)[/dim]")
     
-    def show_cardinality(self, url: str):
-        """Show cardinality"""
-        from .config import config
-        prom_url = url or config.settings.prometheus_url
-        
-        if not prom_url:
+    def show_cardinality(self, url: str, limit: int = 10):
+        """
+        Show the heaviest metrics, labels and label pairs.
+
+        Reads ``/api/v1/status/tsdb``, which Prometheus answers from the
+        head block index without touching samples.
+        """
+        import requests
+        from .prometheus import PrometheusError
+        from .quantity import format_memory
+
+        try:
+            prom = self._prometheus(url)
+        except ValueError as exc:
+            print_error(str(exc))
+            return
+
+        if prom is None:
             console.print("[yellow]Prometheus URL not configured[/yellow]")
             console.print("Set with: export PROMETHEUS_URL='http://prometheus:9090'")
             return
         
         console.print("\n[bold cyan]Checking High Cardinality Metrics...[/bold cyan]\n")
-        console.print(f"[dim]Prometheus: {prom_url}[/dim]\n")
+        console.print(f"[dim]Prometheus: {prom.url}[/dim]\n")
         
         try:
-            import requests
-            response = requests.get(f"{prom_url}/api/v1/label/__name__/values", timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                metrics = data.get('data', [])
-                
-                console.print(f"[green]Found {len(metrics)} metrics[/green]")
-                console.print("\n[bold]Top metrics by name:[/bold]")
-                
-                table = create_table("Metrics Sample", ["Metric Name"])
-                for metric in metrics[:20]:
-                    table.add_row(metric)
-                
-                console.print(table)
-                console.print(f"\n[dim]Showing 20 of {len(metrics)} metrics[/dim]")
-                console.print("\n[bold yellow]💡 Tip:[/bold yellow] Use 'tars cardinality-labels <metric>' to analyze specific metric")
-            else:
-                console.print(f"[red]Failed to connect to Prometheus: {response.status_code}[/red]")
+            try:
+                status = prom.tsdb_status(limit)
+            except (PrometheusError, requests.exceptions.HTTPError) as e:
+                # Pre-2.15 Prometheus or a proxy that hides the status API:
+                # all that is cheap to get is the number of metric names.
+                print_warning(f"TSDB status API unavailable ({e})")
+                count = sum(1 for _ in prom.iter_label_values('__name__'))
+                console.print(f"[green]Found {count} metrics[/green]")
+                return
+
+            head = status.get('headStats', {})
+            total = head.get('numSeries', 0)
+            console.print(f"[green]Head block: {total:,} series, {head.get('numLabelPairs', 0):,} label pairs, "
+                          f"{head.get('chunkCount', 0):,} chunks[/green]\n")
+
+            table = create_table("Metrics by Series Count", ["Metric", "Series", "% of Head"])
+            for item in status.get('seriesCountByMetricName', []):
+                share = item['value'] / total * 100 if total else 0.0
+                table.add_row(item['name'], f"{item['value']:,}", f"{share:.1f}%")
+            console.print(table)
+
+            table = create_table("Labels by Unique Values", ["Label", "Unique Values", "Memory", "Impact"])
+            memory = {item['name']: item['value'] for item in status.get('memoryInBytesByLabelName', [])}
+            for item in status.get('labelValueCountByLabelName', []):
+                impact = "HIGH" if item['value'] > 100 else "MEDIUM" if item['value'] > 10 else "LOW"
+                impact_color = "red" if item['value'] > 100 else "yellow" if item['value'] > 10 else "green"
+                table.add_row(
+                    item['name'],
+                    f"{item['value']:,}",
+                    format_memory(memory[item['name']]) if item['name'] in memory else "-",
+                    f"[{impact_color}]{impact}[/{impact_color}]"
+                )
+            console.print(table)
+
+            table = create_table("Label Pairs by Series Count", ["Label Pair", "Series"])
+            for item in status.get('seriesCountByLabelValuePair', []):
+                table.add_row(item['name'], f"{item['value']:,}")
+            console.print(table)
+
+            console.print("\n[bold yellow]💡 Tip:[/bold yellow] Use 'tars cardinality-labels <metric>' to analyze specific metric")
         except Exception as e:
             console.print(f"[red]Error connecting to Prometheus: {e}[/red]")
             console.print("[dim]Make sure Prometheus is accessible and PROMETHEUS_URL is correct[/dim]")
     
     def show_label_cardinality(self, metric: str, url: str):
         """Show label cardinality"""
-        from .config import config
+        import time
 
         # Validate metric name against PromQL identifier rules (#11).
         if not metric or not _METRIC_NAME_RE.match(metric):
@@ -1576,70 +3505,60 @@ class MonitoringCommands:
                 "Must match ^[a-zA-Z_:][a-zA-Z0-9_:]*$ (max 128 chars)."
             )
 
-        prom_url = url or config.settings.prometheus_url
-
-        if not prom_url:
-            console.print("[yellow]Prometheus URL not configured[/yellow]")
-            console.print("Set with: export PROMETHEUS_URL='http://prometheus:9090'")
-            return
-
-        # Validate the URL at use-time to catch CLI-supplied SSRF vectors (#15).
+        # The client validates the URL at use-time to catch CLI-supplied
+        # SSRF vectors (#15).
         try:
-            prom_url = _validate_prometheus_url(prom_url)
+            prom = self._prometheus(url)
         except ValueError as exc:
             print_error(str(exc))
             return
 
+        if prom is None:
+            console.print("[yellow]Prometheus URL not configured[/yellow]")
+            console.print("Set with: export PROMETHEUS_URL='http://prometheus:9090'")
+            return
+
         console.print(f"\n[bold cyan]Label Cardinality Analysis: {metric}[/bold cyan]\n")
 
         try:
-            import requests
-            response = requests.get(f"{prom_url}/api/v1/query", params={'query': metric}, timeout=10)
-
-            if response.status_code == 200:
-                data = response.json()
-                result = data.get('data', {}).get('result', [])
-
-                if not result:
-                    console.print(f"[yellow]No data found for metric: {metric}[/yellow]")
-                    return
-
-                # Analyze labels
-                label_values = {}
+            # Label names and per-label value counts come from the index
+            # with a series matcher; values are streamed and only counted,
+            # so a metric with millions of series never sits in memory.
+            end = time.time()
+            start = end - 3600
+            names = [name for name in prom.labels(metric, start, end) if name != '__name__']
+            if not names:
+                console.print(f"[yellow]No data found for metric: {metric}[/yellow]")
+                return
 
-                for series in result:
-                    for label, value in series.get('metric', {}).items():
-                        if label == '__name__':
-                            continue
-                        if label not in label_values:
-                            label_values[label] = set()
-                        label_values[label].add(value)
+            def _count(label: Optional[str]) -> int:
+                items = (prom.iter_series(metric, start, end) if label is None
+                         else prom.iter_label_values(label, metric, start, end))
+                return sum(1 for _ in items)
 
-                # Calculate cardinality
-                label_cardinality = [
-                    {'label': label, 'cardinality': len(values)}
-                    for label, values in label_values.items()
-                ]
+            with console.status(f"Counting values of {len(names)} labels..."):
+                total, *counts = prom.map(_count, [None] + names)
 
-                label_cardinality.sort(key=lambda x: x['cardinality'], reverse=True)
+            order = sorted(range(len(names)), key=lambda i: counts[i], reverse=True)
 
-                # Display results
-                table = create_table(f"Label Cardinality for {metric}", ["Label", "Unique Values", "Impact"])
+            # Display results
+            table = create_table(f"Label Cardinality for {metric}",
+                                 ["Label", "Unique Values", "% of Series", "Impact"])
 
-                for item in label_cardinality[:10]:
-                    impact = "HIGH" if item['cardinality'] > 100 else "MEDIUM" if item['cardinality'] > 10 else "LOW"
-                    impact_color = "red" if item['cardinality'] > 100 else "yellow" if item['cardinality'] > 10 else "green"
+            for i in order[:10]:
+                cardinality = counts[i]
+                impact = "HIGH" if cardinality > 100 else "MEDIUM" if cardinality > 10 else "LOW"
+                impact_color = "red" if cardinality > 100 else "yellow" if cardinality > 10 else "green"
 
-                    table.add_row(
-                        item['label'],
-                        str(item['cardinality']),
-                        f"[{impact_color}]{impact}[/{impact_color}]"
-                    )
+                table.add_row(
+                    names[i],
+                    f"{cardinality:,}",
+                    f"{cardinality / total * 100:.1f}%" if total else "-",
+                    f"[{impact_color}]{impact}[/{impact_color}]"
+                )
 
-                console.print(table)
-                console.print(f"\n[dim]Total series: {len(result)}[/dim]")
-            else:
-                console.print(f"[red]Failed to query Prometheus: {response.status_code}[/red]")
+            console.print(table)
+            console.print(f"\n[dim]Total series: {total:,} (last hour)[/dim]")
         except ValueError:
             raise
         except Exception as e:
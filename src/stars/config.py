@@ -1,7 +1,7 @@
 """Configuration management for SSTARS CLI"""
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 from pydantic import BaseModel, Field, validator
 from pydantic_settings import BaseSettings
 import yaml
@@ -17,6 +17,13 @@ AUDIT_LOG = STARS_DIR / "audit.log"
 CONSENT_FILE = STARS_DIR / "ai_consent"
 LOGS_DIR = STARS_DIR / "logs"
 LOGS_DIR.mkdir(exist_ok=True, mode=0o700)
+SNAPSHOTS_DIR = STARS_DIR / "snapshots"
+TSDB_DIR = STARS_DIR / "tsdb"
+PROM_CACHE_DIR = STARS_DIR / "prom_cache"
+ALERTS_FILE = STARS_DIR / "alerts.yaml"
+ALERTS_DIR = STARS_DIR / "alerts"
+WEBHOOKS_DIR = STARS_DIR / "webhooks"
+AI_CACHE_DIR = STARS_DIR / "ai_cache"
 
 # Ensure secure permissions on existing files
 for file_path in [CONFIG_FILE, LOG_FILE, HISTORY_FILE, AUDIT_LOG]:
@@ -38,9 +45,12 @@ def grant_ai_consent():
 
 
 def revoke_ai_consent():
-    """Revoke user consent for AI data sharing"""
+    """Revoke user consent for AI data sharing and drop cached AI answers"""
     if CONSENT_FILE.exists():
         CONSENT_FILE.unlink()
+    if AI_CACHE_DIR.exists():
+        for path in AI_CACHE_DIR.iterdir():
+            path.unlink(missing_ok=True)
 
 
 def audit_log(action: str, resource: str, namespace: str, user: str = None):
@@ -100,6 +110,21 @@ class ThresholdsConfig(BaseModel):
     restarts: int = Field(default=5, ge=0)
 
 
+class NodePrice(BaseModel):
+    """Hourly on-demand price of one node type"""
+    hourly: float = Field(ge=0)
+
+
+class PricingConfig(BaseModel):
+    """Cost model prices; node types without a price use the per-unit rates"""
+    currency: str = "USD"
+    # Per-unit rates, also used to split a node's price between CPU and memory.
+    cpu_core_hour: float = Field(default=0.031611, ge=0)
+    memory_gib_hour: float = Field(default=0.004237, ge=0)
+    node_type_label: str = "node.kubernetes.io/instance-type"
+    node_types: Dict[str, NodePrice] = Field(default_factory=dict)
+
+
 class TarsSettings(BaseSettings):
     """STARS CLI settings from environment and config file"""
     
@@ -115,6 +140,9 @@ class TarsSettings(BaseSettings):
     
     # Monitoring
     interval: int = Field(default=30, ge=1)
+
+    # Cost model
+    pricing: PricingConfig = Field(default_factory=PricingConfig)
     
     class Config:
         env_file = '.env'
@@ -159,6 +187,9 @@ class Config:
     
     def __init__(self):
         self.settings = TarsSettings()
+        # Raw file contents; sections owned by other features (SLOs,
+        # webhooks, ...) are kept here and written back untouched.
+        self.data: Dict[str, Any] = {}
         self._load_from_file()
     
     def _load_from_file(self):
@@ -166,19 +197,32 @@ class Config:
         if CONFIG_FILE.exists():
             with open(CONFIG_FILE, 'r') as f:
                 data = yaml.safe_load(f) or {}
+                self.data = data if isinstance(data, dict) else {}
                 # Merge file config with env settings
                 if 'thresholds' in data:
                     self.settings.thresholds = ThresholdsConfig(**data['thresholds'])
                 if 'interval' in data:
                     self.settings.interval = data['interval']
+                if 'pricing' in data:
+                    self.settings.pricing = PricingConfig(**(data['pricing'] or {}))
     
+    def section(self, name: str, default=None):
+        """Raw config file section (e.g. ``slos``), or *default*"""
+        value = self.data.get(name)
+        return default if value is None else value
+
     def save(self):
         """Save configuration to file with secure atomic permissions."""
         import os
-        data = {
+        data = dict(self.data)
+        data.update({
             'thresholds': self.settings.thresholds.dict(),
             'interval': self.settings.interval,
-        }
+        })
+        # Only persist pricing once it differs from the defaults.
+        if 'pricing' in data or self.settings.pricing != PricingConfig():
+            data['pricing'] = self.settings.pricing.dict()
+        self.data = data
         # Write to a temp file first, then atomically rename so we never have
         # a window where the file exists but is unprotected.
         tmp_path = str(CONFIG_FILE) + '.tmp'
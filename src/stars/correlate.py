@@ -0,0 +1,181 @@
+"""Pairwise comparison of aligned metric grids - vectorized, no output logic"""
+import logging
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Fewer overlapping points than this and a correlation is noise.
+MIN_OVERLAP = 5
+# Robust z-score (median/MAD) of the fit residual that counts as a
+# divergence point.
+DIVERGENCE_Z = 4.0
+_MAD_SCALE = 1.4826
+
+
+def pair_rows(labels_a: List[Dict[str, str]], labels_b: List[Dict[str, str]],
+              on: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Match series of two results on shared label values.
+
+    Args:
+        labels_a: Label sets of the first result
+        labels_b: Label sets of the second result
+        on: Labels to join on; default is every label (except the metric
+            name) carried by all series of both sides. A side with a
+            single series is compared against every series of the other.
+
+    Returns:
+        tuple: (row in a, row in b, display key) per pair
+    """
+    if not labels_a or not labels_b:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), []
+    if on is None:
+        common = set(labels_a[0]).intersection(*labels_a[1:], *labels_b)
+        on = sorted(common - {'__name__'})
+
+    def _key(metric):
+        return tuple(metric.get(label, '') for label in on)
+
+    # Labels with one value across the board say nothing about the pair.
+    shown = [label for label in on if len({m.get(label, '') for m in labels_a}) > 1] or list(on)
+
+    index: Dict[Tuple, List[int]] = {}
+    for j, metric in enumerate(labels_b):
+        index.setdefault(_key(metric), []).append(j)
+    rows_a, rows_b, keys = [], [], []
+    for i, metric in enumerate(labels_a):
+        key = _key(metric)
+        for j in index.get(key, []):
+            rows_a.append(i)
+            rows_b.append(j)
+            keys.append(','.join(f"{label}={metric.get(label, '')}" for label in shown) or '*')
+
+    if not rows_a and (len(labels_a) == 1 or len(labels_b) == 1):
+        single_a = len(labels_a) == 1
+        others = labels_b if single_a else labels_a
+        rows_a = [0] * len(others) if single_a else list(range(len(others)))
+        rows_b = list(range(len(others))) if single_a else [0] * len(others)
+        keys = [','.join(f'{k}={v}' for k, v in sorted(m.items()) if k != '__name__') or '*' for m in others]
+    return np.asarray(rows_a, dtype=np.int64), np.asarray(rows_b, dtype=np.int64), keys
+
+
+def pearson(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Row-wise Pearson correlation over points where both rows are finite"""
+    mask = np.isfinite(x) & np.isfinite(y)
+    n = mask.sum(axis=1)
+    x = np.where(mask, x, 0.0)
+    y = np.where(mask, y, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mx = x.sum(axis=1) / n
+        my = y.sum(axis=1) / n
+        dx = np.where(mask, x - mx[:, None], 0.0)
+        dy = np.where(mask, y - my[:, None], 0.0)
+        corr = (dx * dy).sum(axis=1) / np.sqrt((dx * dx).sum(axis=1) * (dy * dy).sum(axis=1))
+    corr[n < MIN_OVERLAP] = np.nan
+    return corr
+
+
+def lagged_correlation(a: np.ndarray, b: np.ndarray, max_lag: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Correlation of every row pair at every lag in ``[-max_lag, max_lag]``.
+
+    A positive lag means *b* follows *a*: ``a[t]`` is compared with
+    ``b[t + lag]``.
+
+    Returns:
+        tuple: (lags, matrix of shape (pairs, lags))
+    """
+    n_points = a.shape[1]
+    max_lag = max(0, min(max_lag, n_points - MIN_OVERLAP))
+    lags = np.arange(-max_lag, max_lag + 1)
+    out = np.full((a.shape[0], len(lags)), np.nan)
+    for j, lag in enumerate(lags.tolist()):
+        if lag >= 0:
+            out[:, j] = pearson(a[:, :n_points - lag], b[:, lag:])
+        else:
+            out[:, j] = pearson(a[:, -lag:], b[:, :n_points + lag])
+    return lags, out
+
+
+def shift(grid: np.ndarray, lags: np.ndarray) -> np.ndarray:
+    """Per-row shift so that ``out[r, t] = grid[r, t + lags[r]]``, NaN-padded"""
+    out = np.full(grid.shape, np.nan)
+    n_points = grid.shape[1]
+    for lag in np.unique(lags).tolist():
+        rows = lags == lag
+        if lag >= 0:
+            out[rows, :n_points - lag] = grid[rows, lag:]
+        else:
+            out[rows, -lag:] = grid[rows, :n_points + lag]
+    return out
+
+
+def divergence(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Buckets where *b* breaks from its linear relationship with *a*.
+
+    Fits ``b ~ alpha + beta * a`` per row and flags residuals whose robust
+    z-score exceeds ``DIVERGENCE_Z``; the median/MAD scale keeps the
+    divergence itself from hiding in an inflated standard deviation.
+
+    Returns:
+        np.ndarray: Boolean matrix, same shape as the inputs
+    """
+    mask = np.isfinite(a) & np.isfinite(b)
+    n = mask.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)     # all-NaN rows
+        mx = np.where(mask, a, 0.0).sum(axis=1) / n
+        my = np.where(mask, b, 0.0).sum(axis=1) / n
+        dx = np.where(mask, a - mx[:, None], 0.0)
+        dy = np.where(mask, b - my[:, None], 0.0)
+        var = (dx * dx).sum(axis=1)
+        beta = np.where(var > 0, (dx * dy).sum(axis=1) / var, 0.0)
+        resid = np.where(mask, dy - beta[:, None] * dx, np.nan)
+        center = np.nanmedian(resid, axis=1, keepdims=True)
+        spread = np.nanmedian(np.abs(resid - center), axis=1, keepdims=True) * _MAD_SCALE
+        score = np.abs(resid - center) / np.where(spread > 0, spread, np.nan)
+    return np.nan_to_num(score, nan=0.0) > DIVERGENCE_Z
+
+
+def compare(a: np.ndarray, b: np.ndarray, max_lag: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Compare paired rows of two grids on the same time buckets.
+
+    Divergence is judged at each pair's best lag, so a consistent delay
+    between the series is not mistaken for the series drifting apart.
+
+    Returns:
+        dict: Per pair ``corr`` (lag 0), ``best_lag`` and ``best_corr``
+              (strongest absolute correlation), ``mean_diff`` (a - b),
+              ``median_ratio`` (a / b), ``divergences`` (count) and
+              ``first_divergence`` (bucket index, -1 if none)
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    lags, corr = lagged_correlation(a, b, max_lag)
+    zero = int(np.flatnonzero(lags == 0)[0])
+    strength = np.where(np.isnan(corr), -1.0, np.abs(corr))
+    best = strength.argmax(axis=1)
+    rows = np.arange(len(a))
+
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean_diff = np.nanmean(a - b, axis=1)
+        median_ratio = np.nanmedian(np.where(b != 0, a / b, np.nan), axis=1)
+
+    divergent = divergence(a, shift(b, lags[best]))
+    first = np.where(divergent.any(axis=1), divergent.argmax(axis=1), -1)
+
+    return {
+        'corr': corr[:, zero],
+        'best_lag': lags[best],
+        'best_corr': corr[rows, best],
+        'mean_diff': mean_diff,
+        'median_ratio': median_ratio,
+        'divergences': divergent.sum(axis=1),
+        'first_divergence': first,
+    }
@@ -0,0 +1,261 @@
+"""Structural diff for Kubernetes objects - pure data processing, no output logic"""
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Server-managed fields that change on every write and never carry intent.
+# Each entry is a path of keys from the object root.
+IGNORED_PATHS = {
+    ('status',),
+    ('metadata', 'managedFields'),
+    ('metadata', 'resourceVersion'),
+    ('metadata', 'uid'),
+    ('metadata', 'generation'),
+    ('metadata', 'creationTimestamp'),
+    ('metadata', 'selfLink'),
+    ('metadata', 'annotations', 'kubectl.kubernetes.io/last-applied-configuration'),
+    ('metadata', 'annotations', 'deployment.kubernetes.io/revision'),
+}
+
+# Lists that Kubernetes merges by key rather than by position. The list is
+# identified by the name of the field that holds it; the key is a tuple of
+# fields, the first of which every item must carry.
+LIST_MERGE_KEYS = {
+    'containers': ('name',),
+    'initContainers': ('name',),
+    'ephemeralContainers': ('name',),
+    'env': ('name',),
+    'volumes': ('name',),
+    'volumeMounts': ('mountPath',),
+    'volumeDevices': ('devicePath',),
+    'imagePullSecrets': ('name',),
+    'ports': ('containerPort', 'protocol'),
+    'hostAliases': ('ip',),
+    'tolerations': ('key', 'operator', 'effect'),
+}
+
+# API server defaults for optional key fields, so a manifest that omits
+# them matches the live object.
+MERGE_KEY_DEFAULTS = {
+    'protocol': 'TCP',
+    'operator': 'Equal',
+    'effect': '',
+}
+
+
+class _SubtreeHasher:
+    """
+    Memoised content digests for JSON-like trees.
+
+    Each node is hashed once, bottom-up, so comparing two large objects costs
+    O(n) instead of O(n * depth). Digests are cached by ``id()`` which is
+    safe because both trees stay referenced for the lifetime of a diff.
+    """
+
+    def __init__(self):
+        self._cache: Dict[int, bytes] = {}
+
+    def digest(self, node: Any) -> bytes:
+        """Return a 16-byte digest of a dict or list node"""
+        key = id(node)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        h = hashlib.blake2b(digest_size=16)
+        if isinstance(node, dict):
+            # Scalar members are hashed in one C-level repr() of the sorted
+            # items; only nested containers recurse.
+            scalars = []
+            for k, v in sorted(node.items(), key=_key_order):
+                if isinstance(v, (dict, list)):
+                    h.update(str(k).encode())
+                    h.update(self.digest(v))
+                else:
+                    scalars.append((k, v))
+            h.update(b'{')
+            h.update(repr(scalars).encode())
+        else:
+            h.update(b'[')
+            for item in node:
+                h.update(self._child(item))
+                h.update(b'\x00')
+
+        value = h.digest()
+        self._cache[key] = value
+        return value
+
+    def _child(self, value: Any) -> bytes:
+        # Scalars are fed inline; repr() keeps '1' and 1 distinct.
+        if isinstance(value, (dict, list)):
+            return self.digest(value)
+        return repr(value).encode()
+
+
+def normalize(obj: Dict[str, Any], ignored_paths: Optional[set] = None) -> Dict[str, Any]:
+    """
+    Return a copy of *obj* with server-managed fields removed.
+
+    Only the dicts along each ignored path are copied; everything else is
+    shared with *obj*, so normalising a large ConfigMap is effectively free.
+
+    Args:
+        obj: Kubernetes object as a plain dict (camelCase keys)
+        ignored_paths: Key paths to drop (defaults to IGNORED_PATHS)
+
+    Returns:
+        dict: Object without noisy fields and without empty metadata maps
+    """
+    ignored = IGNORED_PATHS if ignored_paths is None else ignored_paths
+    result = dict(obj or {})
+
+    for path in ignored:
+        parent = result
+        for key in path[:-1]:
+            child = parent.get(key)
+            if not isinstance(child, dict):
+                break
+            parent[key] = child = dict(child)
+            parent = child
+        else:
+            parent.pop(path[-1], None)
+
+    metadata = result.get('metadata')
+    if isinstance(metadata, dict):
+        result['metadata'] = {k: v for k, v in metadata.items() if v not in (None, {}, [])}
+    return result
+
+
+def diff_objects(old: Dict[str, Any], new: Dict[str, Any],
+                 declared_only: bool = False,
+                 ignored_paths: Optional[set] = None) -> List[Dict[str, Any]]:
+    """
+    Compute a structural diff between two Kubernetes objects.
+
+    Args:
+        old: Baseline object (live state, first snapshot, ...)
+        new: Object to compare against (manifest, second snapshot, ...)
+        declared_only: Only report fields present in *new*. Use this when
+                       *new* is a local manifest so that server-side
+                       defaults on the live object are not reported.
+        ignored_paths: Key paths to skip (defaults to IGNORED_PATHS)
+
+    Returns:
+        list: Entries of the form ``{'op', 'path', 'old', 'new'}`` where op is
+              one of ``added``, ``removed`` or ``changed``
+    """
+    old = normalize(old, ignored_paths)
+    new = normalize(new, ignored_paths)
+    hasher = _SubtreeHasher()
+    changes: List[Dict[str, Any]] = []
+
+    def _record(op: str, path: str, a: Any, b: Any):
+        if op == 'removed' and declared_only:
+            return
+        changes.append({'op': op, 'path': path, 'old': a, 'new': b})
+
+    def _walk(a: Any, b: Any, path: str, field: str):
+        if type(a) is not type(b) and not (_is_number(a) and _is_number(b)):
+            _record('changed', path, a, b)
+            return
+        if isinstance(a, (dict, list)):
+            # Identical subtrees are skipped without descending into them.
+            if hasher.digest(a) == hasher.digest(b):
+                return
+        elif a == b:
+            return
+
+        if isinstance(a, dict):
+            for k in a.keys() | b.keys():
+                va, vb = a.get(k, _MISSING), b.get(k, _MISSING)
+                if va is vb or (va == vb and not isinstance(va, (dict, list))):
+                    continue
+                child = f"{path}.{k}" if path else str(k)
+                if vb is _MISSING:
+                    _record('removed', child, va, None)
+                elif va is _MISSING:
+                    _record('added', child, None, vb)
+                else:
+                    _walk(va, vb, child, str(k))
+        elif isinstance(a, list):
+            _walk_list(a, b, path, field)
+        else:
+            _record('changed', path, a, b)
+
+    def _walk_list(a: list, b: list, path: str, field: str):
+        merge_key = LIST_MERGE_KEYS.get(field)
+        a_index = _index_by(a, merge_key) if merge_key else None
+        b_index = _index_by(b, merge_key) if merge_key else None
+        if a_index is None or b_index is None:
+            for i in range(max(len(a), len(b))):
+                child = f"{path}[{i}]"
+                if i >= len(b):
+                    _record('removed', child, a[i], None)
+                elif i >= len(a):
+                    _record('added', child, None, b[i])
+                else:
+                    _walk(a[i], b[i], child, field)
+            return
+
+        # Preserve manifest order for readability, then anything only in *a*.
+        ordered = list(b_index) + [k for k in a_index if k not in b_index]
+        for key in ordered:
+            label = ','.join(f"{name}={value}" for name, value in zip(merge_key, key) if value not in ('', None))
+            child = f"{path}[{label}]"
+            if key not in b_index:
+                _record('removed', child, a_index[key], None)
+            elif key not in a_index:
+                _record('added', child, None, b_index[key])
+            else:
+                _walk(a_index[key], b_index[key], child, field)
+
+    _walk(old, new, '', '')
+    changes.sort(key=lambda c: c['path'])
+    return changes
+
+
+_MISSING = object()
+
+
+def _index_by(items: list, merge_key: tuple) -> Optional[Dict[tuple, Any]]:
+    """
+    Items by their merge key, or None when the list cannot be merged by key:
+    an item is not a dict, lacks the first key field, or shares its key
+    with another item. Callers then compare by position.
+    """
+    index = {}
+    for item in items:
+        if not isinstance(item, dict) or merge_key[0] not in item:
+            return None
+        key = tuple(item.get(name, MERGE_KEY_DEFAULTS.get(name)) for name in merge_key)
+        if key in index:
+            return None
+        index[key] = item
+    return index
+
+
+def _key_order(item):
+    # YAML mappings can mix int and str keys, which do not compare.
+    return type(item[0]).__name__, str(item[0])
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def find_manifest(documents: List[Dict[str, Any]], kind: str, name: str) -> Optional[Dict[str, Any]]:
+    """
+    Pick the document matching *kind* and *name* from a multi-document manifest.
+
+    Kind comparison is case-insensitive so that CLI resource types such as
+    ``deployment`` match ``Deployment``.
+    """
+    for doc in documents:
+        if not doc:
+            continue
+        if (doc.get('kind', '').lower() == kind.lower()
+                and doc.get('metadata', {}).get('name') == name):
+            return doc
+    return None
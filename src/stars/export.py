@@ -0,0 +1,305 @@
+"""Columnar export of Prometheus range results - written chunk by chunk"""
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .prometheus import series_label
+from .tsdb import bin_samples
+
+logger = logging.getLogger(__name__)
+
+FORMAT_NAME = 'stars-columnar'
+FORMAT_VERSION = 1
+_META = 'meta.json'
+_VALUES = 'values.f64'
+_RUNS = 'runs.i64'
+# One row per run of consecutive steps: series id, first timestamp,
+# sample count, offset of the first value in values.f64.
+_RUN_FIELDS = 4
+# One label matcher of a ``series_label`` string, as stored in Parquet.
+# Values are not escaped there, so a value ends only where the next label
+# or the closing brace starts.
+_LABEL_RE = re.compile(r'(\w+)="(.*?)"(?=,\w+="|}$)')
+
+
+def parquet_available() -> bool:
+    """True when pyarrow is installed"""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ColumnarWriter:
+    """
+    Streams range results into a STARS columnar directory.
+
+    Samples of a range query sit on the step grid, so timestamps are not
+    stored: each run of consecutive steps is one row in ``runs.i64`` and
+    only values go to ``values.f64``. That halves the size against a
+    timestamp/value pair per sample, and both files are raw little-endian
+    arrays that ``load_export`` memory-maps without copying. Values are
+    deliberately left uncompressed so they can be mapped; Parquet is the
+    compressed format.
+    """
+
+    def __init__(self, path: str, step: int, start: int, end: int):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.step = step
+        self.start = start
+        self.end = end
+        self.queries: List[str] = []
+        self.series: List[Dict[str, Any]] = []
+        self._index: Dict[Tuple, int] = {}
+        self.samples = 0
+        self.runs = 0
+        self._values = open(self.path / _VALUES, 'wb')
+        self._runs = open(self.path / _RUNS, 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _sid(self, query: str, metric: Dict[str, str]) -> int:
+        key = (query, tuple(sorted(metric.items())))
+        sid = self._index.get(key)
+        if sid is None:
+            sid = self._index[key] = len(self.series)
+            self.series.append({'query': query, 'metric': metric})
+        return sid
+
+    def write(self, query: str, result: List[Dict[str, Any]]) -> int:
+        """
+        Append one chunk of a range result.
+
+        Returns:
+            int: Samples written
+        """
+        if query not in self.queries:
+            self.queries.append(query)
+        written = 0
+        for series in result:
+            samples = np.array(series.get('values', []), dtype=np.float64).reshape(-1, 2)
+            if not len(samples):
+                continue
+            ts = samples[:, 0].astype(np.int64)
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(ts) != self.step) + 1))
+            counts = np.diff(np.append(starts, len(ts)))
+            runs = np.empty((len(starts), _RUN_FIELDS), dtype='<i8')
+            runs[:, 0] = self._sid(query, series.get('metric', {}))
+            runs[:, 1] = ts[starts]
+            runs[:, 2] = counts
+            runs[:, 3] = self.samples + written + starts
+            runs.tofile(self._runs)
+            samples[:, 1].astype('<f8').tofile(self._values)
+            written += len(ts)
+            self.runs += len(starts)
+        self.samples += written
+        return written
+
+    def close(self) -> None:
+        """Flush the columns and write ``meta.json``"""
+        if self._values.closed:
+            return
+        self._values.close()
+        self._runs.close()
+        meta = {
+            'format': FORMAT_NAME,
+            'version': FORMAT_VERSION,
+            'start': self.start,
+            'end': self.end,
+            'step': self.step,
+            'queries': self.queries,
+            'series': self.series,
+            'samples': self.samples,
+            'runs': self.runs,
+        }
+        with open(self.path / _META, 'w') as f:
+            json.dump(meta, f)
+
+
+class ParquetWriter:
+    """
+    Streams range results into a ZSTD-compressed Parquet file, one row
+    group per chunk: ``query``, ``series`` (dictionary-encoded), ``timestamp``
+    and ``value`` columns.
+    """
+
+    def __init__(self, path: str, step: int, start: int, end: int):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.path = Path(path)
+        self.step = step
+        self.samples = 0
+        self._series = set()
+        self.schema = pa.schema([
+            ('query', pa.dictionary(pa.int32(), pa.string())),
+            ('series', pa.dictionary(pa.int32(), pa.string())),
+            ('timestamp', pa.timestamp('s', tz='UTC')),
+            ('value', pa.float64()),
+        ], metadata={b'format': FORMAT_NAME.encode(), b'step': str(step).encode(),
+                     b'start': str(start).encode(), b'end': str(end).encode()})
+        self._writer = pq.ParquetWriter(str(self.path), self.schema, compression='zstd')
+
+    @property
+    def series(self) -> List[str]:
+        return sorted(self._series)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, query: str, result: List[Dict[str, Any]]) -> int:
+        """Append one chunk of a range result as a row group; returns samples written"""
+        pa = self._pa
+        names, lengths, parts = [], [], []
+        for series in result:
+            samples = np.array(series.get('values', []), dtype=np.float64).reshape(-1, 2)
+            if len(samples):
+                names.append(series_label(series.get('metric', {})))
+                lengths.append(len(samples))
+                parts.append(samples)
+        if not parts:
+            return 0
+        samples = np.concatenate(parts)
+        codes = np.repeat(np.arange(len(names), dtype=np.int32), lengths)
+        table = pa.Table.from_arrays([
+            pa.DictionaryArray.from_arrays(np.zeros(len(samples), dtype=np.int32), pa.array([query])),
+            pa.DictionaryArray.from_arrays(codes, pa.array(names)),
+            pa.array(samples[:, 0].astype(np.int64), type=pa.timestamp('s', tz='UTC')),
+            pa.array(samples[:, 1]),
+        ], schema=self.schema)
+        self._writer.write_table(table)
+        self._series.update(f"{query}\0{name}" for name in names)
+        self.samples += len(samples)
+        return len(samples)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def open_export(path: str, fmt: Optional[str], step: int, start: int, end: int):
+    """
+    Writer for *path*: Parquet for ``fmt='parquet'`` (or a ``.parquet``
+    suffix when *fmt* is None), otherwise a columnar directory.
+
+    Raises:
+        ValueError: If Parquet is requested but pyarrow is not installed
+    """
+    if fmt is None:
+        fmt = 'parquet' if Path(path).suffix.lower() == '.parquet' else 'columnar'
+    if fmt == 'parquet':
+        if not parquet_available():
+            raise ValueError("Parquet export needs pyarrow: pip install pyarrow")
+        return ParquetWriter(path, step, start, end)
+    return ColumnarWriter(path, step, start, end)
+
+
+def load_export(path: str) -> Dict[str, Any]:
+    """
+    Load an export as flat arrays, one entry per sample.
+
+    Columnar directories are memory-mapped: ``values`` is a view of the
+    file, not a copy.
+
+    Returns:
+        dict: ``series`` (``{'query', 'metric'}`` per series id),
+              ``sid``, ``ts`` and ``values`` arrays, and ``step``
+    """
+    path = Path(path)
+    if path.is_dir():
+        with open(path / _META) as f:
+            meta = json.load(f)
+        if meta.get('format') != FORMAT_NAME:
+            raise ValueError(f"{path} is not a STARS columnar export")
+        values = (np.memmap(path / _VALUES, dtype='<f8', mode='r') if meta['samples']
+                  else np.empty(0))
+        runs = (np.fromfile(path / _RUNS, dtype='<i8').reshape(-1, _RUN_FIELDS) if meta['runs']
+                else np.empty((0, _RUN_FIELDS), dtype=np.int64))
+        # Runs are written in value order, so each run's offset is where
+        # its values start and the value file needs no reindexing.
+        counts = runs[:, 2]
+        position = np.arange(counts.sum()) - np.repeat(runs[:, 3], counts)
+        return {
+            'series': meta['series'],
+            'sid': np.repeat(runs[:, 0], counts),
+            'ts': np.repeat(runs[:, 1], counts) + position * meta['step'],
+            'values': values,
+            'step': meta['step'],
+        }
+
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    table = pq.read_table(str(path), memory_map=True)
+    key = pc.binary_join_element_wise(table.column('query').cast(pa.string()),
+                                      table.column('series').cast(pa.string()), '\0')
+    encoded = key.combine_chunks().dictionary_encode()
+    step = int((table.schema.metadata or {}).get(b'step', b'0'))
+    return {
+        'series': [{'query': name.split('\0', 1)[0], 'metric': _parse_series_label(name.split('\0', 1)[1])}
+                   for name in encoded.dictionary.to_pylist()],
+        'sid': encoded.indices.to_numpy(),
+        'ts': table.column('timestamp').cast('int64').to_numpy(),
+        'values': table.column('value').to_numpy(),
+        'step': step,
+    }
+
+
+def _parse_series_label(label: str) -> Dict[str, str]:
+    """Inverse of ``series_label``"""
+    name, _, rest = label.partition('{')
+    metric = dict(_LABEL_RE.findall(rest))
+    if name:
+        metric['__name__'] = name
+    return metric
+
+
+def export_grids(data: Dict[str, Any], queries: List[str],
+                 step: Optional[int] = None) -> Tuple[List[List[Dict[str, str]]], List[np.ndarray], int, int]:
+    """
+    Bin the series of *queries* in a loaded export onto one shared grid,
+    as ``prometheus.result_matrix`` does for a live range result.
+
+    Args:
+        data: Result of ``load_export``
+        queries: Exported queries to bin, in order
+        step: Bucket width in seconds (default: the export step)
+
+    Returns:
+        tuple: (label sets per query, grid per query, grid start, step)
+
+    Raises:
+        ValueError: If the export is empty or lacks one of *queries*
+    """
+    step = int(step or data['step'])
+    ts = data['ts']
+    if not len(ts):
+        raise ValueError("The export holds no samples")
+    start = int(ts.min()) // step * step
+    n_buckets = (int(ts.max()) - start) // step + 1
+    exported = [series['query'] for series in data['series']]
+    labels, grids = [], []
+    for query in queries:
+        sids = [sid for sid, name in enumerate(exported) if name == query]
+        if not sids:
+            raise ValueError(f"{query!r} is not in the export; it holds: {', '.join(dict.fromkeys(exported))}")
+        row_of = np.full(len(exported), -1, dtype=np.int64)
+        row_of[sids] = np.arange(len(sids))
+        rows = row_of[data['sid']]
+        keep = rows >= 0
+        grids.append(bin_samples(ts[keep], rows[keep], data['values'][keep], len(sids), start, step, n_buckets))
+        labels.append([data['series'][sid]['metric'] for sid in sids])
+    return labels, grids, start, step
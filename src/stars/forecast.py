@@ -0,0 +1,192 @@
+"""Vectorized usage forecasting - every model is fitted to all series at once"""
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Smoothing parameter grid searched per series. Every combination is run in
+# the same pass by broadcasting along an extra axis.
+_ALPHAS = np.array([0.2, 0.5, 0.8])
+_BETAS = np.array([0.01, 0.1])
+_GAMMAS = np.array([0.05, 0.3])
+
+# Upper bound on evaluated points when projecting a forecast path.
+_MAX_PATH_POINTS = 2000
+
+
+def _forward_fill(y: np.ndarray) -> np.ndarray:
+    idx = np.where(~np.isnan(y), np.arange(y.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return y[np.arange(y.shape[0])[:, None], idx]
+
+
+def fill_gaps(y: np.ndarray) -> np.ndarray:
+    """
+    Forward-fill NaNs along time, then back-fill leading NaNs.
+
+    Rows that are entirely NaN stay NaN.
+    """
+    filled = _forward_fill(np.asarray(y, dtype=np.float64))
+    return _forward_fill(filled[:, ::-1])[:, ::-1]
+
+
+def linear_trend(y: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Least-squares line through every row of *y*, ignoring NaNs.
+
+    Returns:
+        dict: ``slope`` and ``intercept`` per row (per time step units) and
+              the in-sample ``sse`` normalised by sample count
+    """
+    n, t = y.shape
+    mask = ~np.isnan(y)
+    x = np.broadcast_to(np.arange(t, dtype=np.float64), y.shape)
+    yz = np.where(mask, y, 0.0)
+    xz = np.where(mask, x, 0.0)
+
+    cnt = mask.sum(axis=1).astype(np.float64)
+    sx, sy = xz.sum(axis=1), yz.sum(axis=1)
+    sxx, sxy = (xz * xz).sum(axis=1), (xz * yz).sum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        denom = cnt * sxx - sx * sx
+        slope = np.where(denom > 0, (cnt * sxy - sx * sy) / denom, 0.0)
+        intercept = np.where(cnt > 0, (sy - slope * sx) / cnt, np.nan)
+        resid = np.where(mask, y - (intercept[:, None] + slope[:, None] * x), 0.0)
+        sse = (resid ** 2).sum(axis=1) / np.maximum(cnt, 1)
+    return {'slope': slope, 'intercept': intercept, 'sse': sse}
+
+
+def holt_winters(y: np.ndarray, season: int) -> Dict[str, np.ndarray]:
+    """
+    Additive Holt-Winters fitted to every row of *y*.
+
+    The smoothing grid is evaluated in a single pass over time, vectorised
+    across (series x parameter combination), and the combination with the
+    lowest one-step-ahead error is kept per series.
+
+    Args:
+        y: Gap-filled matrix of shape (n_series, n_steps); needs at least two
+           full seasons
+        season: Season length in steps
+
+    Returns:
+        dict: Final ``level``, ``trend``, ``seasonal`` state (n, season) per
+              series, the chosen ``params`` index and normalised ``sse``
+    """
+    n, t = y.shape
+    if t < 2 * season:
+        raise ValueError(f"Holt-Winters needs {2 * season} steps, got {t}")
+
+    a, b, g = np.meshgrid(_ALPHAS, _BETAS, _GAMMAS, indexing='ij')
+    a, b, g = a.ravel(), b.ravel(), g.ravel()
+    k = len(a)
+
+    first = y[:, :season].mean(axis=1)
+    second = y[:, season:2 * season].mean(axis=1)
+    level = np.repeat(first[:, None], k, axis=1)
+    trend = np.repeat(((second - first) / season)[:, None], k, axis=1)
+    seasonal = np.repeat((y[:, :season] - first[:, None])[:, :, None], k, axis=2)
+    sse = np.zeros((n, k))
+
+    for i in range(season, t):
+        obs = y[:, i][:, None]
+        s = seasonal[:, i % season, :]
+        err = obs - (level + trend + s)
+        sse += err * err
+        new_level = a * (obs - s) + (1 - a) * (level + trend)
+        trend = b * (new_level - level) + (1 - b) * trend
+        seasonal[:, i % season, :] = g * (obs - new_level) + (1 - g) * s
+        level = new_level
+
+    best = sse.argmin(axis=1)
+    rows = np.arange(n)
+    # Rotate seasonal state so column j is the offset j steps after the last
+    # observation.
+    order = (np.arange(season) + t) % season
+    return {
+        'level': level[rows, best],
+        'trend': trend[rows, best],
+        'seasonal': seasonal[rows][:, order, :][np.arange(n), :, best],
+        'params': best,
+        'sse': sse[rows, best] / (t - season),
+    }
+
+
+def forecast(y: np.ndarray, horizon: int, season: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Forecast every row of *y* for *horizon* steps.
+
+    Holt-Winters is used for series with at least two seasons of history
+    when it beats the linear trend in-sample; everything else uses the
+    linear trend.
+
+    Args:
+        y: Matrix of shape (n_series, n_steps), NaN for missing samples
+        horizon: Steps to project
+        season: Season length in steps (None disables seasonality)
+
+    Returns:
+        dict: ``path`` (n, points) projected values, ``offsets`` (points,)
+              step offsets of each path column, ``slope`` per step,
+              ``current`` last observed value and ``model`` name per series
+    """
+    n, t = y.shape
+    valid_rows = ~np.isnan(y).all(axis=1)
+    lin = linear_trend(y)
+
+    points = min(horizon, _MAX_PATH_POINTS)
+    offsets = np.unique(np.linspace(1, horizon, points).round().astype(np.int64))
+    x_future = (t - 1 + offsets).astype(np.float64)
+    path = lin['intercept'][:, None] + lin['slope'][:, None] * x_future[None, :]
+    current = fill_gaps(y)[:, -1] if t else np.full(n, np.nan)
+    model = np.array(['linear'] * n, dtype=object)
+
+    if season and t >= 2 * season and valid_rows.any():
+        filled = fill_gaps(y[valid_rows])
+        hw = holt_winters(filled, season)
+        hw_path = (hw['level'][:, None] + hw['trend'][:, None] * offsets[None, :]
+                   + hw['seasonal'][:, (offsets - 1) % season])
+        better = hw['sse'] < lin['sse'][valid_rows]
+        idx = np.flatnonzero(valid_rows)[better]
+        path[idx] = hw_path[better]
+        model[idx] = 'holt-winters'
+
+    path[~valid_rows] = np.nan
+    return {
+        'path': path,
+        'offsets': offsets,
+        'slope': lin['slope'],
+        'current': current,
+        'model': model,
+    }
+
+
+def time_to_exhaustion(path: np.ndarray, offsets: np.ndarray, capacity: np.ndarray,
+                       step_seconds: float, current: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Seconds until each forecast path first reaches its capacity.
+
+    Args:
+        path: Forecast values (n, points)
+        offsets: Step offset of each path column
+        capacity: Capacity per series; NaN or <= 0 means unbounded
+        step_seconds: Seconds per step
+        current: Last observed values, used to report series already at capacity
+
+    Returns:
+        np.ndarray: Seconds to exhaustion, ``inf`` when not reached within
+                    the horizon, 0 when already at or over capacity
+    """
+    capacity = np.asarray(capacity, dtype=np.float64)
+    bounded = np.isfinite(capacity) & (capacity > 0)
+    hit = (path >= capacity[:, None]) & bounded[:, None]
+    reached = hit.any(axis=1)
+    first = hit.argmax(axis=1)
+    tte = np.where(reached, offsets[first] * step_seconds, np.inf)
+    if current is not None:
+        with np.errstate(invalid='ignore'):
+            tte[bounded & (current >= capacity)] = 0.0
+    return tte
@@ -0,0 +1,115 @@
+"""Unicode block heatmaps - builds rich markup, no console output"""
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# (glyph, style) per intensity level, coolest first. Missing samples use
+# _EMPTY so gaps stay visible instead of reading as zero.
+HEAT_RAMP: List[Tuple[str, str]] = [
+    ('░', 'grey35'),
+    ('▒', 'green'),
+    ('▒', 'green_yellow'),
+    ('▓', 'yellow'),
+    ('▓', 'dark_orange'),
+    ('█', 'red'),
+    ('█', 'bright_red'),
+]
+_EMPTY = ('·', 'grey23')
+SPARK_RAMP = '▁▂▃▄▅▆▇█'
+
+
+def quantize(grid: np.ndarray, scale: Optional[np.ndarray] = None,
+             levels: int = len(HEAT_RAMP)) -> np.ndarray:
+    """
+    Map a value grid onto ramp levels.
+
+    Args:
+        grid: Matrix of shape (rows, buckets), NaN for missing samples
+        scale: Full-scale value per row (e.g. node allocatable); defaults to
+               the grid maximum so rows are comparable with each other
+        levels: Number of ramp levels
+
+    Returns:
+        np.ndarray: int8 matrix of levels in ``[0, levels)``, -1 where missing
+    """
+    grid = np.asarray(grid, dtype=np.float64)
+    if scale is None:
+        peak = np.nanmax(grid) if np.isfinite(grid).any() else 0.0
+        scale = np.full(grid.shape[0], peak)
+    scale = np.asarray(scale, dtype=np.float64)
+    scale = np.where(np.isfinite(scale) & (scale > 0), scale, np.nan)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        frac = np.clip(grid / scale[:, None], 0.0, 1.0)
+    missing = np.isnan(frac)
+    out = np.minimum((np.where(missing, 0.0, frac) * levels).astype(np.int64), levels - 1)
+    out[missing] = -1
+    return out.astype(np.int8)
+
+
+def render_rows(levels: np.ndarray) -> List[str]:
+    """
+    Render quantized rows as rich markup strings.
+
+    Runs of equal level share one style tag, so markup size grows with the
+    number of colour changes rather than the number of cells.
+    """
+    ramp = HEAT_RAMP + [_EMPTY]          # index -1 picks _EMPTY
+    lines = []
+    for row in levels:
+        if not len(row):
+            lines.append('')
+            continue
+        bounds = np.flatnonzero(np.diff(row)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(row)]))
+        parts = []
+        for s, e in zip(starts.tolist(), ends.tolist()):
+            glyph, style = ramp[row[s]]
+            parts.append(f"[{style}]{glyph * (e - s)}[/{style}]")
+        lines.append(''.join(parts))
+    return lines
+
+
+def sparklines(grid: np.ndarray) -> List[str]:
+    """
+    One sparkline per row, each scaled between its own min and max.
+
+    Flat rows sit on the baseline; missing buckets are blank.
+    """
+    grid = np.asarray(grid, dtype=np.float64)
+    if not grid.size:
+        return [''] * grid.shape[0]
+    missing = ~np.isfinite(grid)
+    low = np.where(missing, np.inf, grid).min(axis=1, keepdims=True)
+    high = np.where(missing, -np.inf, grid).max(axis=1, keepdims=True)
+    span = np.where(high > low, high - low, 1.0)
+    with np.errstate(invalid='ignore'):
+        frac = np.where(missing, 0.0, (grid - low) / span)
+    levels = np.minimum((np.clip(frac, 0.0, 1.0) * len(SPARK_RAMP)).astype(np.int64), len(SPARK_RAMP) - 1)
+    glyphs = np.array(list(SPARK_RAMP) + [' '])
+    levels[missing] = len(SPARK_RAMP)
+    return [''.join(row) for row in glyphs[levels].tolist()]
+
+
+def legend(low: str = "0%", high: str = "100%") -> str:
+    """One-line legend for the ramp"""
+    cells = ''.join(f"[{style}]{glyph}[/{style}]" for glyph, style in HEAT_RAMP)
+    glyph, style = _EMPTY
+    return f"{low} {cells} {high}   [{style}]{glyph}[/{style}] no data"
+
+
+def time_axis(start: int, step: int, n_buckets: int) -> str:
+    """Axis line with start, middle and end bucket times"""
+    if n_buckets <= 0:
+        return ''
+    fmt = '%H:%M' if n_buckets * step <= 86400 else '%m-%d %H:%M'
+    left = datetime.fromtimestamp(start).strftime(fmt)
+    mid = datetime.fromtimestamp(start + step * (n_buckets // 2)).strftime(fmt)
+    right = datetime.fromtimestamp(start + step * n_buckets).strftime(fmt)
+    gap = max(1, (n_buckets - len(left) - len(mid) - len(right)) // 2)
+    return f"{left}{' ' * gap}{mid}{' ' * gap}{right}"
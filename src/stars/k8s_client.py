@@ -249,16 +249,33 @@ class KubernetesClient:
                 return self.apps_v1.read_namespaced_deployment(name, namespace)
             elif resource_type == "service":
                 return self.core_v1.read_namespaced_service(name, namespace)
+            elif resource_type == "configmap":
+                return self.core_v1.read_namespaced_config_map(name, namespace)
+            elif resource_type == "statefulset":
+                return self.apps_v1.read_namespaced_stateful_set(name, namespace)
+            elif resource_type == "daemonset":
+                return self.apps_v1.read_namespaced_daemon_set(name, namespace)
             else:
                 raise ValueError(f"Unsupported resource type: {resource_type}")
         except ApiException as e:
             logger.error(f"Failed to get {resource_type}/{name}: {e}")
             raise
     
+    def get_resource_dict(self, resource_type: str, name: str, namespace: str) -> Dict[str, Any]:
+        """Get a resource as a plain dict with API (camelCase) field names"""
+        resource = self.get_resource(resource_type, name, namespace)
+        return self.api_client.sanitize_for_serialization(resource)
+    
     @retry_on_failure()
-    def get_pod_metrics(self, namespace: str = "default"):
-        """Get pod metrics"""
-        try:
+    def get_pod_metrics(self, namespace: Optional[str] = "default"):
+        """Get pod metrics (all namespaces when namespace is None)"""
+        try:
+            if namespace is None:
+                return self.custom_api.list_cluster_custom_object(
+                    group="metrics.k8s.io",
+                    version="v1beta1",
+                    plural="pods"
+                )['items']
             return self.custom_api.list_namespaced_custom_object(
                 group="metrics.k8s.io",
                 version="v1beta1",
@@ -269,6 +286,19 @@ class KubernetesClient:
             logger.error(f"Failed to get pod metrics: {e}")
             raise
     
+    @retry_on_failure()
+    def get_node_metrics(self):
+        """Get node metrics"""
+        try:
+            return self.custom_api.list_cluster_custom_object(
+                group="metrics.k8s.io",
+                version="v1beta1",
+                plural="nodes"
+            )['items']
+        except ApiException as e:
+            logger.error(f"Failed to get node metrics: {e}")
+            raise
+    
     @retry_on_failure()
     def restart_resource(self, resource_type: str, name: str, namespace: str):
         """Restart a resource by updating annotation"""
@@ -398,11 +428,55 @@ class KubernetesClient:
             logger.error(f"Failed to get quotas: {e}")
             raise
     
-    def get_namespace_usage(self, namespace: str):
-        """Get namespace resource usage"""
-        try:
-            pods = self.list_pods(namespace)
-            usage = {'pods': len(pods), 'cpu': 0, 'memory': 0}
+    def get_namespace_usage(self, namespace: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get namespace resource usage against quota.
+
+        Returns:
+            dict: ``{resource: {'used', 'limit', 'percentage'}}`` with CPU in
+                  cores and memory in bytes. ``limit`` is the tightest quota
+                  hard limit, or None when no quota covers the resource.
+        """
+        from .quantity import PodResourceTable, parse_quantity
+        try:
+            # Terminated pods no longer count against quota.
+            pods = [p for p in self.list_pods(namespace)
+                    if p.status.phase not in ('Succeeded', 'Failed')]
+            try:
+                metrics = self.get_pod_metrics(namespace)
+            except Exception as e:
+                logger.debug(f"Pod metrics unavailable: {e}")
+                metrics = None
+
+            totals = PodResourceTable.from_pods(pods, metrics).totals()
+
+            hard: Dict[str, float] = {}
+            for quota in self.get_resource_quotas(namespace):
+                for resource, value in (quota.spec.hard or {}).items():
+                    # Bare cpu/memory quotas are aliases for requests.*
+                    key = f"requests.{resource}" if resource in ('cpu', 'memory') else resource
+                    parsed = parse_quantity(str(value))
+                    hard[key] = min(hard.get(key, parsed), parsed)
+
+            used = {
+                'requests.cpu': totals['cpu_request'],
+                'limits.cpu': totals['cpu_limit'],
+                'requests.memory': totals['memory_request'],
+                'limits.memory': totals['memory_limit'],
+                'pods': float(len(pods)),
+            }
+            if metrics is not None:
+                used['usage.cpu'] = totals['cpu_usage']
+                used['usage.memory'] = totals['memory_usage']
+
+            usage = {}
+            for resource, value in used.items():
+                limit = hard.get(resource)
+                usage[resource] = {
+                    'used': value,
+                    'limit': limit,
+                    'percentage': (value / limit * 100) if limit else None,
+                }
             return usage
         except Exception as e:
             logger.error(f"Failed to get usage: {e}")
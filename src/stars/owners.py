@@ -0,0 +1,17 @@
+"""Pod ownership helpers shared by cost allocation and failure triage"""
+
+
+def pod_owner(pod) -> str:
+    """Top-level owner as ``Kind/name`` (Deployments resolved through ReplicaSets)"""
+    for ref in pod.metadata.owner_references or []:
+        if ref.kind == 'ReplicaSet' and 'pod-template-hash' in (pod.metadata.labels or {}):
+            return f"Deployment/{ref.name.rsplit('-', 1)[0]}"
+        if ref.kind == 'Job' and ref.name.rsplit('-', 1)[-1].isdigit():
+            return f"CronJob/{ref.name.rsplit('-', 1)[0]}"
+        return f"{ref.kind}/{ref.name}"
+    return f"Pod/{pod.metadata.name}"
+
+
+def pod_key(pod) -> str:
+    """``namespace/name``, unique across the cluster where a name alone is not"""
+    return f"{pod.metadata.namespace}/{pod.metadata.name}"
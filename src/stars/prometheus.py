@@ -0,0 +1,620 @@
+"""Prometheus HTTP API client - pooled, compressed, bounded concurrency"""
+import codecs
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .tsdb import bin_samples
+
+logger = logging.getLogger(__name__)
+
+# Allowed URL schemes when a Prometheus URL is supplied via CLI argument.
+_ALLOWED_URL_SCHEMES = {'http', 'https'}
+
+# Private / link-local IP ranges that must never be reached (SSRF guard).
+_SSRF_BLOCKED_HOSTS = re.compile(
+    r'^(localhost|127\.\d+\.\d+\.\d+|::1'
+    r'|169\.254\.\d+\.\d+'        # AWS/GCP IMDS
+    r'|10\.\d+\.\d+\.\d+'         # RFC-1918
+    r'|192\.168\.\d+\.\d+'        # RFC-1918
+    r'|172\.(1[6-9]|2\d|3[01])\.\d+\.\d+'  # RFC-1918
+    r'|0\.0\.0\.0'
+    r')$',
+    re.IGNORECASE,
+)
+
+DEFAULT_TIMEOUT = 10
+RANGE_TIMEOUT = 30
+MAX_WORKERS = 8
+
+# Prometheus rejects range queries over 11,000 points per series. Long
+# ranges are split well below that so chunks can be fetched in parallel
+# and each stays clear of the server's query.max-samples limit.
+MAX_POINTS = 11000
+CHUNK_POINTS = 1440
+
+_DURATION_RE = re.compile(r'(\d+)(ms|[smhdwy])')
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'y': 31536000}
+# Errors that mean "ask for less at once", not "the query is wrong".
+_TOO_LARGE = ('too many samples', 'exceeded maximum resolution')
+
+# Points newer than this may still change (late scrapes, rate() windows
+# still filling), so they are always refetched and never cached.
+CACHE_FRESHNESS = 600
+CACHE_MAX_BYTES = 256 * 2 ** 20
+CACHE_MAX_CELLS = 4 * 2 ** 20      # per entry: ~36 MB of values + presence
+
+_LABEL_NAME_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
+_ARRAY_START_RE = re.compile(r'"data"\s*:\s*\[')
+STREAM_CHUNK = 64 * 1024
+
+
+class PrometheusError(Exception):
+    """Prometheus answered, but with ``status: error``"""
+    pass
+
+
+def validate_prometheus_url(url: str) -> str:
+    """
+    Validate a Prometheus base URL supplied via CLI argument (#15).
+
+    Raises:
+        ValueError: If the URL scheme is not http/https, or if the host
+                    matches a private/link-local/SSRF-risky pattern.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in _ALLOWED_URL_SCHEMES:
+        raise ValueError(
+            f"Prometheus URL scheme {parsed.scheme!r} is not allowed. "
+            f"Only {sorted(_ALLOWED_URL_SCHEMES)} are permitted."
+        )
+    hostname = parsed.hostname or ''
+    if _SSRF_BLOCKED_HOSTS.match(hostname):
+        raise ValueError(
+            f"Prometheus URL host {hostname!r} resolves to a private or link-local "
+            f"address. This is blocked to prevent SSRF attacks."
+        )
+    return url
+
+
+def parse_duration(text: str) -> int:
+    """
+    Parse a Prometheus duration (``90s``, ``1h30m``, ``30d``) into seconds.
+
+    Raises:
+        ValueError: If *text* is not a positive duration
+    """
+    text = (text or '').strip()
+    if text.isdigit():
+        seconds = float(text)
+    else:
+        parts = _DURATION_RE.findall(text)
+        if not parts or ''.join(n + u for n, u in parts) != text:
+            raise ValueError(f"Invalid duration: {text!r} (expected e.g. 30s, 5m, 1h30m, 7d)")
+        seconds = sum(int(n) * _DURATION_UNITS[u] for n, u in parts)
+    if seconds < 1:
+        raise ValueError(f"Duration must be at least 1s: {text!r}")
+    return int(seconds)
+
+
+def split_range(start: float, end: float, step: int,
+                chunk_points: int = CHUNK_POINTS) -> List[Tuple[int, int]]:
+    """
+    Split ``[start, end]`` into step-aligned sub-ranges of at most
+    *chunk_points* points each.
+
+    Boundaries are multiples of *step*, so every chunk evaluates at the
+    same timestamps the unsplit query would, and consecutive chunks never
+    share a point.
+
+    Returns:
+        list: (chunk start, chunk end) pairs, inclusive, in time order
+    """
+    step = max(1, int(step))
+    chunk_points = max(1, min(chunk_points, MAX_POINTS))
+    first = int(start) // step * step
+    last = int(end) // step * step
+    span = chunk_points * step
+    return [(s, min(s + span - step, last)) for s in range(first, last + 1, span)]
+
+
+def merge_ranges(parts: Iterable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Concatenate chunked range results series by series, in chunk order"""
+    merged: Dict[Tuple, Dict[str, Any]] = {}
+    for result in parts:
+        for series in result:
+            metric = series.get('metric', {})
+            key = tuple(sorted(metric.items()))
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = {'metric': metric, 'values': list(series.get('values', []))}
+            else:
+                entry['values'].extend(series.get('values', []))
+    return list(merged.values())
+
+
+def series_label(metric: Dict[str, str]) -> str:
+    """Series identity in PromQL notation: ``name{label="value",...}``"""
+    labels = ','.join(f'{k}="{v}"' for k, v in sorted(metric.items()) if k != '__name__')
+    name = metric.get('__name__', '')
+    return f"{name}{{{labels}}}" if labels or not name else name
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str = 'data') -> Iterator[Any]:
+    """
+    Yield the elements of the top-level array under *key* as they arrive.
+
+    Only the element being decoded is held in memory, so a series listing
+    of any size streams through in constant space. Assumes, as Prometheus
+    guarantees, that the array elements are objects or strings.
+    """
+    start_re = _ARRAY_START_RE if key == 'data' else re.compile(rf'"{re.escape(key)}"\s*:\s*\[')
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buf, pos, started = '', 0, False
+    chunks = iter(chunks)
+    exhausted = False
+    while True:
+        if not started:
+            match = start_re.search(buf)
+            if match:
+                started, pos = True, match.end()
+        if started:
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                    pos += 1
+                if pos < len(buf) and buf[pos] == ']':
+                    return
+                if pos >= len(buf):
+                    break
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if exhausted:
+                        raise
+                    break           # element continues in the next chunk
+                yield item
+                pos = end
+            buf, pos = buf[pos:], 0
+        if exhausted:
+            raise ValueError(f"Response ended before the {key!r} array closed")
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buf += text.decode(b'', final=True)
+        else:
+            buf += text.decode(chunk)
+
+
+def _series_key(metric: Dict[str, str]) -> Tuple:
+    return tuple(sorted(metric.items()))
+
+
+class CachedRange:
+    """
+    Range results on a step grid: one row per series, one column per step.
+
+    ``present`` tells real samples apart from gaps, so NaN samples that
+    Prometheus returned survive a round trip through the cache.
+    """
+
+    def __init__(self, first: int, step: int, labels: List[Dict[str, str]],
+                 values: np.ndarray, present: np.ndarray):
+        self.first = first
+        self.step = step
+        self.labels = labels
+        self.values = values
+        self.present = present
+
+    @property
+    def last(self) -> int:
+        return self.first + (self.values.shape[1] - 1) * self.step
+
+    @classmethod
+    def combine(cls, base: Optional['CachedRange'], results: List[Dict[str, Any]],
+                start: int, end: int, step: int) -> 'CachedRange':
+        """Lay freshly fetched *results* over *base*, widening the grid to ``[start, end]``"""
+        first = min(start, base.first) if base else start
+        last = max(end, base.last) if base else end
+        labels = list(base.labels) if base else []
+        index = {_series_key(m): i for i, m in enumerate(labels)}
+        rows = []
+        for series in results:
+            metric = series.get('metric', {})
+            row = index.setdefault(_series_key(metric), len(labels))
+            if row == len(labels):
+                labels.append(metric)
+            rows.append(row)
+
+        n_points = (last - first) // step + 1
+        values = np.full((len(labels), n_points), np.nan)
+        present = np.zeros((len(labels), n_points), dtype=bool)
+        if base:
+            offset = (base.first - first) // step
+            width = base.values.shape[1]
+            values[:len(base.labels), offset:offset + width] = base.values
+            present[:len(base.labels), offset:offset + width] = base.present
+        for row, series in zip(rows, results):
+            samples = np.array(series.get('values', []), dtype=np.float64).reshape(-1, 2)
+            cols = (samples[:, 0].astype(np.int64) - first) // step
+            keep = (cols >= 0) & (cols < n_points)
+            values[row, cols[keep]] = samples[keep, 1]
+            present[row, cols[keep]] = True
+        return cls(first, step, labels, values, present)
+
+    def trimmed(self, cutoff: float, max_cells: int = CACHE_MAX_CELLS) -> Optional['CachedRange']:
+        """Columns at or before *cutoff*, newest kept when over *max_cells*"""
+        end = min(self.values.shape[1], int((cutoff - self.first) // self.step) + 1)
+        begin = max(0, end - max(1, max_cells // max(1, len(self.labels))))
+        if end <= begin:
+            return None
+        return CachedRange(self.first + begin * self.step, self.step, self.labels,
+                           self.values[:, begin:end], self.present[:, begin:end])
+
+    def to_result(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Prometheus-shaped matrix for ``[start, end]``"""
+        lo = max(0, (start - self.first) // self.step)
+        hi = min(self.values.shape[1], (end - self.first) // self.step + 1)
+        if hi <= lo:
+            return []
+        ts = (self.first + np.arange(lo, hi) * self.step).tolist()
+        result = []
+        for metric, row, mask in zip(self.labels, self.values[:, lo:hi], self.present[:, lo:hi]):
+            cols = np.flatnonzero(mask)
+            if len(cols):
+                result.append({'metric': metric, 'values': [[ts[c], v] for c, v in
+                                                            zip(cols.tolist(), row[cols].tolist())]})
+        return result
+
+
+class RangeCache:
+    """
+    On-disk cache of range query results keyed by (server, query, step).
+
+    Each entry is one contiguous step-aligned block. A later request that
+    overlaps it fetches only the missing head and tail, in the spirit of a
+    query-frontend results cache; points younger than *freshness* are
+    never stored, so the recent edge is always refetched.
+    """
+
+    def __init__(self, root: Optional[Path] = None, freshness: int = CACHE_FRESHNESS,
+                 max_bytes: int = CACHE_MAX_BYTES):
+        if root is None:
+            from .config import PROM_CACHE_DIR
+            root = PROM_CACHE_DIR
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True, mode=0o700)
+        self.freshness = freshness
+        self.max_bytes = max_bytes
+
+    def _path(self, url: str, expr: str, step: int) -> Path:
+        digest = hashlib.sha256(f"{url}\n{step}\n{expr}".encode()).hexdigest()[:32]
+        return self.root / f"{digest}.npz"
+
+    def get(self, url: str, expr: str, step: int) -> Optional[CachedRange]:
+        """Cached block for the key, or None"""
+        path = self._path(url, expr, step)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data['meta']))
+                if meta.get('url') != url or meta.get('expr') != expr or meta.get('step') != step:
+                    return None
+                entry = CachedRange(meta['first'], step, meta['labels'], data['values'], data['present'])
+            os.utime(path)          # LRU order for pruning
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Dropping unreadable range cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, url: str, expr: str, step: int, entry: Optional[CachedRange]) -> None:
+        """Store *entry* (None is a no-op), then prune to the size budget"""
+        if entry is None:
+            return
+        path = self._path(url, expr, step)
+        meta = {'url': url, 'expr': expr, 'step': step, 'first': entry.first, 'labels': entry.labels}
+        tmp_path = str(path) + '.tmp'
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, meta=np.array(json.dumps(meta)), values=entry.values, present=entry.present)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write range cache entry: {e}")
+            return
+        self.prune()
+
+    def prune(self) -> None:
+        """Delete least recently used entries beyond ``max_bytes``"""
+        entries = []
+        for path in self.root.glob('*.npz'):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> int:
+        """Remove every entry; returns the number removed"""
+        removed = 0
+        for path in self.root.glob('*.npz'):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+
+class PrometheusClient:
+    """
+    Thin client for the Prometheus HTTP API.
+
+    The URL is validated once, here; every request then goes through one
+    keep-alive session whose connection pool is as large as the number of
+    requests allowed in flight, so concurrent callers never open a fresh
+    TCP/TLS connection per query. Responses are negotiated gzip-compressed,
+    which matters for large range and series payloads.
+    """
+
+    def __init__(self, url: str, timeout: float = DEFAULT_TIMEOUT, max_workers: int = MAX_WORKERS,
+                 cache: Optional[RangeCache] = None):
+        """
+        Args:
+            url: Prometheus base URL
+            timeout: Default per-request timeout in seconds
+            max_workers: Requests allowed in flight at once, across threads
+            cache: Range result cache (None = always fetch)
+
+        Raises:
+            ValueError: If the URL fails the SSRF checks
+        """
+        self.url = validate_prometheus_url(url).rstrip('/')
+        self.timeout = timeout
+        self.max_workers = max(1, max_workers)
+        self.cache = cache
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+
+        retry = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset({'GET'}))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Accept': 'application/json', 'Accept-Encoding': 'gzip'})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        """Release pooled connections"""
+        self.session.close()
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None,
+            timeout: Optional[float] = None) -> Any:
+        """
+        GET an API endpoint and return its ``data`` payload.
+
+        Raises:
+            requests.RequestException: On connection, timeout or HTTP errors
+            PrometheusError: If Prometheus reports ``status: error``
+        """
+        with self._slots:
+            response = self.session.get(f"{self.url}{path}", params=params,
+                                        timeout=timeout or self.timeout)
+        return self._payload(response, path)
+
+    @staticmethod
+    def _payload(response, path: str) -> Any:
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        if not isinstance(body, dict) or not body.get('error'):
+            response.raise_for_status()
+        if not isinstance(body, dict):
+            raise PrometheusError(f"Invalid response from {path}")
+        if body.get('status') != 'success':
+            # 4xx with an error body: a bad query, worth showing verbatim.
+            raise PrometheusError(body.get('error', 'unknown error'))
+        return body.get('data')
+
+    def stream(self, path: str, params: Optional[Dict[str, Any]] = None,
+               timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        GET an endpoint whose ``data`` is a list and yield its elements
+        while the response is still downloading.
+
+        The connection (and a concurrency slot) is held until the
+        generator is exhausted or closed.
+        """
+        with self._slots, self.session.get(f"{self.url}{path}", params=params, stream=True,
+                                           timeout=timeout or RANGE_TIMEOUT) as response:
+            if response.status_code != 200:
+                self._payload(response, path)
+                raise PrometheusError(f"Unexpected HTTP {response.status_code} from {path}")
+            yield from iter_json_array(response.iter_content(STREAM_CHUNK))
+
+    def query(self, expr: str, at: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Run a PromQL instant query and return the ``result`` vector"""
+        params = {'query': expr}
+        if at is not None:
+            params['time'] = at
+        data = self.get('/api/v1/query', params) or {}
+        if data.get('resultType') in ('scalar', 'string'):
+            # A bare [time, value] pair; shape it like a one-series vector.
+            return [{'metric': {}, 'value': data['result']}]
+        return data.get('result', [])
+
+    def fetch_range(self, expr: str, start: float, end: float, step: float) -> List[Dict[str, Any]]:
+        """One uncached /api/v1/query_range request; returns the ``result`` matrix"""
+        params = {'query': expr, 'start': start, 'end': end, 'step': step}
+        return (self.get('/api/v1/query_range', params, timeout=RANGE_TIMEOUT) or {}).get('result', [])
+
+    def query_range(self, expr: str, start: float, end: float, step: int,
+                    chunk_points: int = CHUNK_POINTS) -> List[Dict[str, Any]]:
+        """
+        Range query over any span.
+
+        The span is aligned to *step* and split into chunks fetched
+        concurrently; a chunk rejected as too large is halved and retried,
+        so the result does not depend on the server's sample limit. With a
+        cache, only the parts of the span not already cached are fetched.
+
+        Returns:
+            list: Prometheus ``result`` matrix
+        """
+        step = max(1, int(step))
+        start = int(start) // step * step
+        end = int(end) // step * step
+        if self.cache is None:
+            return self._fetch_chunks(expr, split_range(start, end, step, chunk_points), step)
+
+        cached = self.cache.get(self.url, expr, step)
+        if cached is not None and cached.first <= end + step and cached.last >= start - step:
+            gaps = []
+            if start < cached.first:
+                gaps.append((start, cached.first - step))
+            if end > cached.last:
+                gaps.append((cached.last + step, end))
+        else:
+            cached, gaps = None, [(start, end)]
+
+        chunks = [chunk for lo, hi in gaps for chunk in split_range(lo, hi, step, chunk_points)]
+        fetched = self._fetch_chunks(expr, chunks, step) if chunks else []
+        entry = CachedRange.combine(cached, fetched, start, end, step)
+        logger.debug(f"Range cache for {expr!r}: {len(chunks)} chunk(s) fetched, "
+                     f"{'hit' if cached is not None else 'miss'}")
+        self.cache.put(self.url, expr, step, entry.trimmed(time.time() - self.cache.freshness))
+        return entry.to_result(start, end)
+
+    def _fetch_chunk(self, expr: str, chunk: Tuple[int, int], step: int) -> List[Dict[str, Any]]:
+        """One chunk, halved and retried while the server finds it too large"""
+        lo, hi = chunk
+        try:
+            return self.fetch_range(expr, lo, hi, step)
+        except PrometheusError as e:
+            if hi - lo < step or not any(msg in str(e) for msg in _TOO_LARGE):
+                raise
+            mid = lo + (hi - lo) // step // 2 * step
+            logger.debug(f"Splitting chunk {lo}-{hi} at {mid}: {e}")
+            return merge_ranges([self._fetch_chunk(expr, (lo, mid), step),
+                                 self._fetch_chunk(expr, (mid + step, hi), step)])
+
+    def _fetch_chunks(self, expr: str, chunks: List[Tuple[int, int]], step: int) -> List[Dict[str, Any]]:
+        """Fetch step-aligned chunks concurrently and merge them per series"""
+        return merge_ranges(self.map(lambda chunk: self._fetch_chunk(expr, chunk, step), chunks))
+
+    def iter_range(self, expr: str, start: float, end: float, step: int,
+                   chunk_points: int = CHUNK_POINTS) -> Iterator[Tuple[Tuple[int, int], List[Dict[str, Any]]]]:
+        """
+        Stream a range query chunk by chunk, in time order, bypassing the
+        cache.
+
+        Up to ``max_workers`` chunks are in flight ahead of the consumer,
+        so memory stays bounded by that many chunks however long the span.
+
+        Yields:
+            tuple: ((chunk start, chunk end), chunk ``result`` matrix)
+        """
+        chunks = split_range(start, end, max(1, int(step)), chunk_points)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(chunks)))) as pool:
+            pending = []
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(self._fetch_chunk, expr, chunk, step)))
+                if len(pending) >= self.max_workers:
+                    chunk_done, future = pending.pop(0)
+                    yield chunk_done, future.result()
+            for chunk_done, future in pending:
+                yield chunk_done, future.result()
+
+    def label_values(self, label: str = '__name__') -> List[str]:
+        """All values of *label* (metric names by default)"""
+        return list(self.iter_label_values(label))
+
+    def iter_label_values(self, label: str = '__name__', match: Optional[str] = None,
+                          start: Optional[float] = None, end: Optional[float] = None) -> Iterator[str]:
+        """Stream the values of *label*, optionally only on series matching *match*"""
+        if not _LABEL_NAME_RE.match(label):
+            raise ValueError(f"Invalid label name: {label!r}")
+        return self.stream(f'/api/v1/label/{label}/values', self._match_params(match, start, end))
+
+    def labels(self, match: Optional[str] = None, start: Optional[float] = None,
+               end: Optional[float] = None) -> List[str]:
+        """Label names, optionally only those on series matching *match*"""
+        return self.get('/api/v1/labels', self._match_params(match, start, end)) or []
+
+    def iter_series(self, match: str, start: Optional[float] = None,
+                    end: Optional[float] = None) -> Iterator[Dict[str, str]]:
+        """Stream the label sets of every series matching *match*"""
+        return self.stream('/api/v1/series', self._match_params(match, start, end))
+
+    def tsdb_status(self, limit: int = 10) -> Dict[str, Any]:
+        """
+        Head block statistics: series counts per metric name, label value
+        counts per label name, and the heaviest label pairs. Answered from
+        the index, so it is cheap even with millions of series.
+        """
+        return self.get('/api/v1/status/tsdb', {'limit': limit}) or {}
+
+    @staticmethod
+    def _match_params(match: Optional[str], start: Optional[float], end: Optional[float]) -> Dict[str, Any]:
+        params: Dict[str, Any] = {}
+        if match:
+            params['match[]'] = match
+        if start is not None:
+            params['start'] = start
+        if end is not None:
+            params['end'] = end
+        return params
+
+    def map(self, func: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """
+        Apply *func* (typically a bound query method) to every item
+        concurrently, at most ``max_workers`` at a time, preserving order.
+        Exceptions propagate from the first failing item.
+        """
+        items = list(items)
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(func, items))
+
+
+def result_matrix(result: List[Dict[str, Any]], label: str, start: int, step: int,
+                  n_buckets: int) -> Tuple[List[str], np.ndarray]:
+    """
+    Bin a Prometheus range result onto a (series x bucket) grid.
+
+    Returns:
+        tuple: (series names taken from *label*, float64 matrix)
+    """
+    names = [series.get('metric', {}).get(label, '') for series in result]
+    if not result:
+        return names, np.empty((0, n_buckets))
+    lengths = [len(series.get('values', [])) for series in result]
+    rows = np.repeat(np.arange(len(result)), lengths)
+    samples = np.array([v for series in result for v in series.get('values', [])], dtype=np.float64).reshape(-1, 2)
+    grid = bin_samples(samples[:, 0], rows, samples[:, 1], len(result), start, step, n_buckets)
+    return names, grid
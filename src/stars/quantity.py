@@ -0,0 +1,262 @@
+"""Kubernetes resource quantity parsing and vectorized resource arithmetic"""
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Suffix multipliers from k8s.io/apimachinery/pkg/api/resource.
+_BINARY_SUFFIXES = {
+    'Ki': 2 ** 10, 'Mi': 2 ** 20, 'Gi': 2 ** 30,
+    'Ti': 2 ** 40, 'Pi': 2 ** 50, 'Ei': 2 ** 60,
+}
+_DECIMAL_SUFFIXES = {
+    'n': 1e-9, 'u': 1e-6, 'm': 1e-3, '': 1.0,
+    'k': 1e3, 'M': 1e6, 'G': 1e9, 'T': 1e12, 'P': 1e15, 'E': 1e18,
+}
+
+_QUANTITY_RE = re.compile(r'^([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)([a-zA-Z]*)$')
+
+
+@lru_cache(maxsize=65536)
+def parse_quantity(value: str) -> float:
+    """
+    Parse a Kubernetes quantity string into base units.
+
+    Results are memoised: a cluster has only a handful of distinct request
+    and limit strings, so bulk parsing is dominated by cache hits.
+
+    Args:
+        value: Quantity such as ``"250m"``, ``"1.5"``, ``"512Mi"`` or ``"1e3"``
+
+    Returns:
+        float: Value in base units (cores for CPU, bytes for memory)
+
+    Raises:
+        ValueError: If *value* is not a valid quantity
+    """
+    text = str(value).strip()
+    match = _QUANTITY_RE.match(text)
+    if not match:
+        raise ValueError(f"Invalid quantity: {value!r}")
+
+    number, suffix = match.groups()
+    if suffix in _BINARY_SUFFIXES:
+        return float(number) * _BINARY_SUFFIXES[suffix]
+    if suffix in _DECIMAL_SUFFIXES:
+        return float(number) * _DECIMAL_SUFFIXES[suffix]
+    raise ValueError(f"Invalid quantity suffix in {value!r}")
+
+
+def parse_cpu(value: Any) -> float:
+    """Parse a CPU quantity into cores (missing values count as 0)"""
+    if value is None or value == '':
+        return 0.0
+    return parse_quantity(str(value))
+
+
+def parse_memory(value: Any) -> float:
+    """Parse a memory quantity into bytes (missing values count as 0)"""
+    if value is None or value == '':
+        return 0.0
+    return parse_quantity(str(value))
+
+
+def parse_many(values: Iterable[Any]) -> np.ndarray:
+    """
+    Parse many quantities into a float64 array.
+
+    Invalid entries are logged and counted as 0 so that one malformed object
+    does not break a whole cluster view.
+    """
+    def _safe(value):
+        try:
+            return parse_cpu(value)
+        except ValueError:
+            logger.debug(f"Ignoring invalid quantity: {value!r}")
+            return 0.0
+
+    return np.fromiter((_safe(v) for v in values), dtype=np.float64)
+
+
+def format_cpu(cores: float) -> str:
+    """Format cores the way kubectl does (millicores below one core)"""
+    if cores < 1:
+        return f"{cores * 1000:.0f}m"
+    return f"{cores:.2f}".rstrip('0').rstrip('.')
+
+
+def format_memory(num_bytes: float) -> str:
+    """Format bytes using binary suffixes"""
+    for unit in ['', 'Ki', 'Mi', 'Gi', 'Ti']:
+        if abs(num_bytes) < 1024.0:
+            return f"{num_bytes:.0f}{unit}" if unit == '' else f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024.0
+    return f"{num_bytes:.1f}Pi"
+
+
+def _resources(container, field: str) -> Dict[str, str]:
+    resources = getattr(container, 'resources', None)
+    return (getattr(resources, field, None) or {}) if resources else {}
+
+
+def pod_resource_totals(pod) -> Tuple[float, float, float, float]:
+    """
+    Effective (cpu_request, memory_request, cpu_limit, memory_limit) of a pod.
+
+    Mirrors the scheduler: the sum over app containers, or the largest init
+    container if that is bigger, plus pod overhead.
+    """
+    totals = [0.0, 0.0, 0.0, 0.0]
+    for container in pod.spec.containers or []:
+        req = _resources(container, 'requests')
+        lim = _resources(container, 'limits')
+        totals[0] += parse_cpu(req.get('cpu'))
+        totals[1] += parse_memory(req.get('memory'))
+        totals[2] += parse_cpu(lim.get('cpu'))
+        totals[3] += parse_memory(lim.get('memory'))
+
+    for container in pod.spec.init_containers or []:
+        req = _resources(container, 'requests')
+        lim = _resources(container, 'limits')
+        totals[0] = max(totals[0], parse_cpu(req.get('cpu')))
+        totals[1] = max(totals[1], parse_memory(req.get('memory')))
+        totals[2] = max(totals[2], parse_cpu(lim.get('cpu')))
+        totals[3] = max(totals[3], parse_memory(limits.get('memory')))
+
+    overhead = getattr(pod.spec, 'overhead', None) or {}
+    totals[0] += parse_cpu(overhead.get('cpu'))
+    totals[1] += parse_memory(overhead.get('memory'))
+    return tuple(totals)
+
+
+def pod_request(pod, resource: str) -> float:
+    """
+    Effective request of any resource (e.g. ``ephemeral-storage``) for a pod.
+
+    Same rules as pod_resource_totals: app containers summed, init
+    containers maxed in, overhead added.
+    """
+    total = sum(parse_quantity(str(_resources(c, 'requests').get(resource, 0)))
+                for c in pod.spec.containers or [])
+    for container in pod.spec.init_containers or []:
+        total = max(total, parse_quantity(str(_resources(container, 'requests').get(resource, 0))))
+    overhead = getattr(pod.spec, 'overhead', None) or {}
+    return total + parse_quantity(str(overhead.get(resource, 0)))
+
+
+def metric_usage(metric: Dict[str, Any]) -> Tuple[float, float]:
+    """Sum (cpu_cores, memory_bytes) over all containers of a metrics.k8s.io pod item"""
+    cpu = 0.0
+    memory = 0.0
+    for container in metric.get('containers', []):
+        usage = container.get('usage', {})
+        cpu += parse_cpu(usage.get('cpu'))
+        memory += parse_memory(usage.get('memory'))
+    return cpu, memory
+
+
+def _encode(labels: List[str]) -> Tuple[List[str], np.ndarray]:
+    """Dictionary-encode *labels* into (unique labels, int32 codes)"""
+    index: Dict[str, int] = {}
+    codes = np.fromiter(
+        (index.setdefault(label, len(index)) for label in labels),
+        dtype=np.int32, count=len(labels),
+    )
+    return list(index), codes
+
+
+class PodResourceTable:
+    """
+    Columnar view of pod requests, limits and usage.
+
+    One row per pod; namespaces and nodes are dictionary-encoded so that
+    per-namespace and per-node rollups are single ``np.bincount`` calls.
+    """
+
+    COLUMNS = ('cpu_request', 'memory_request', 'cpu_limit', 'memory_limit',
+               'cpu_usage', 'memory_usage')
+
+    def __init__(self, names: List[str], namespaces: List[str], nodes: List[str],
+                 columns: Dict[str, np.ndarray]):
+        self.names = names
+        self.namespace_labels, self.namespace_codes = _encode(namespaces)
+        self.node_labels, self.node_codes = _encode(nodes)
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    @classmethod
+    def from_pods(cls, pods: List[Any], metrics: Optional[List[Dict[str, Any]]] = None) -> 'PodResourceTable':
+        """
+        Build the table from V1Pod objects and optional metrics.k8s.io items.
+
+        Args:
+            pods: Pods as returned by KubernetesClient.list_pods
+            metrics: Pod metrics as returned by KubernetesClient.get_pod_metrics
+
+        Returns:
+            PodResourceTable: Table with usage columns zero-filled when no
+                              metrics were supplied
+        """
+        n = len(pods)
+        totals = np.array([pod_resource_totals(p) for p in pods], dtype=np.float64).reshape(n, 4)
+        names = [p.metadata.name for p in pods]
+        namespaces = [p.metadata.namespace or '' for p in pods]
+        nodes = [p.spec.node_name or '<unscheduled>' for p in pods]
+
+        cpu_usage = np.zeros(n)
+        memory_usage = np.zeros(n)
+        if metrics:
+            row = {(ns, name): i for i, (ns, name) in enumerate(zip(namespaces, names))}
+            for metric in metrics:
+                meta = metric.get('metadata', {})
+                i = row.get((meta.get('namespace', ''), meta.get('name')))
+                if i is not None:
+                    cpu_usage[i], memory_usage[i] = metric_usage(metric)
+
+        columns = {
+            'cpu_request': totals[:, 0],
+            'memory_request': totals[:, 1],
+            'cpu_limit': totals[:, 2],
+            'memory_limit': totals[:, 3],
+            'cpu_usage': cpu_usage,
+            'memory_usage': memory_usage,
+        }
+        return cls(names, namespaces, nodes, columns)
+
+    def rollup(self, by: str) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """
+        Sum every column per namespace or per node.
+
+        Args:
+            by: ``"namespace"`` or ``"node"``
+
+        Returns:
+            tuple: (labels, {column: sums}) plus a ``pods`` count column
+        """
+        if by == 'namespace':
+            labels, codes = self.namespace_labels, self.namespace_codes
+        elif by == 'node':
+            labels, codes = self.node_labels, self.node_codes
+        else:
+            raise ValueError(f"Unsupported rollup: {by!r}. Use 'namespace' or 'node'")
+
+        size = len(labels)
+        sums = {
+            name: np.bincount(codes, weights=values, minlength=size)
+            for name, values in self.columns.items()
+        }
+        sums['pods'] = np.bincount(codes, minlength=size).astype(np.float64)
+        return labels, sums
+
+    def totals(self) -> Dict[str, float]:
+        """Cluster (or namespace) wide totals for every column"""
+        return {name: float(values.sum()) for name, values in self.columns.items()}
@@ -0,0 +1,158 @@
+"""Recording rules - PromQL evaluated by the collector into the local store"""
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .prometheus import parse_duration
+from .tsdb import MetricStore, RULE_RING, group_rows, rule_series
+
+logger = logging.getLogger(__name__)
+
+# Prometheus recording rule naming: level:metric:operations
+RULE_NAME_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]{0,127}$')
+_LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_rules(section: Any) -> List[Dict[str, Any]]:
+    """
+    Normalise the ``recording_rules`` config section: a mapping of rule
+    name to PromQL, or to ``{expr, interval}`` to record less often than
+    the collector samples.
+
+    Raises:
+        ValueError: On a malformed rule
+    """
+    if not section:
+        return []
+    if not isinstance(section, dict):
+        raise ValueError("The recording_rules config section must map names to PromQL")
+    rules = []
+    for name, spec in section.items():
+        spec = spec if isinstance(spec, dict) else {'expr': spec}
+        if not RULE_NAME_RE.match(str(name)):
+            raise ValueError(f"Invalid recording rule name: {name!r} (use e.g. namespace:latency_p99:5m)")
+        if not spec.get('expr'):
+            raise ValueError(f"Recording rule {name} has no expr")
+        interval = spec.get('interval')
+        rules.append({
+            'name': str(name),
+            'expr': str(spec['expr']),
+            'interval': parse_duration(interval) if interval else 0,
+        })
+    return rules
+
+
+def series_labels(series: str) -> Dict[str, str]:
+    """Labels of a stored series name such as ``rule:name{pod="a"}``"""
+    return dict(_LABEL_RE.findall(series[series.find('{'):]))
+
+
+class RuleRecorder:
+    """
+    Collector hook evaluating recording rules into ``RULE_RING``.
+
+    Rules due on a sample run concurrently through the Prometheus client
+    and land in the store as one append, so commands read an expensive
+    expression (per-namespace p99 latency, an SLI ratio) as a local series
+    instead of recomputing it from raw series.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], prom, store: MetricStore):
+        self.rules = rules
+        self.prom = prom
+        self.store = store
+        self._last: Dict[str, float] = {}
+
+    def __call__(self, now: float) -> None:
+        self.record(now)
+
+    def record(self, now: Optional[float] = None) -> int:
+        """
+        Evaluate every due rule.
+
+        Returns:
+            int: Samples written
+        """
+        now = now or time.time()
+        due = [rule for rule in self.rules
+               if now - self._last.get(rule['name'], -np.inf) >= rule['interval']]
+        if not due:
+            return 0
+
+        def _run(rule):
+            try:
+                return self.prom.query(rule['expr'])
+            except Exception as e:
+                logger.warning(f"Recording rule {rule['name']} failed: {e}")
+                return None
+
+        samples = []
+        for rule, result in zip(due, self.prom.map(_run, due)):
+            if result is None:
+                continue
+            self._last[rule['name']] = now
+            for series in result:
+                try:
+                    value = float(series['value'][1])
+                except (KeyError, IndexError, TypeError, ValueError):
+                    continue
+                samples.append((rule_series(rule['name'], series.get('metric', {})), (value,)))
+        written = self.store.append(RULE_RING, now, samples)
+        self.store.ring(RULE_RING).flush()
+        return written
+
+
+def rule_matrix(store: MetricStore, name: str, start: int, step: int, n_buckets: int,
+                by: Optional[str] = None) -> Tuple[List[str], np.ndarray]:
+    """
+    A recorded rule as a (series x bucket) grid.
+
+    Args:
+        by: Sum series sharing this label's value into one row; rows
+            are labelled with the full label set otherwise
+
+    Returns:
+        tuple: (row labels, matrix of shape (rows, n_buckets))
+    """
+    names, grid = store.matrix(RULE_RING, f"rule:{name}{{", start, step, n_buckets)
+    labels = [series_labels(series) for series in names]
+    if by and labels and all(by in series for series in labels):
+        keys, codes = np.unique([series[by] for series in labels], return_inverse=True)
+        return keys.tolist(), group_rows(grid, codes, len(keys))
+    return [','.join(f'{k}={v}' for k, v in sorted(series.items())) or name for series in labels], grid
+
+
+def latest_values(store: MetricStore, rules: List[Dict[str, Any]], max_age: int,
+                  now: Optional[float] = None) -> Dict[str, float]:
+    """
+    Most recent recorded value of every rule no older than *max_age*,
+    keyed by the rule's expression and summed over its series.
+    """
+    if not rules or not store.has_ring(RULE_RING):
+        return {}
+    now = int(now or time.time())
+    records = store.read(RULE_RING, since=now - max_age, prefix='rule:')
+    if not len(records):
+        return {}
+    by_name = {rule['name']: rule['expr'] for rule in rules}
+    # Series of each rule at the rule's newest timestamp only.
+    newest: Dict[str, int] = {}
+    sids = records['sid'].tolist()
+    stamps = records['ts'].tolist()
+    rule_of = {}
+    for sid, ts in zip(sids, stamps):
+        if sid not in rule_of:
+            series = store.index.name(sid)
+            rule_of[sid] = series[len('rule:'):series.find('{')]
+        name = rule_of[sid]
+        if name in by_name and ts > newest.get(name, -1):
+            newest[name] = ts
+    values: Dict[str, float] = {}
+    for sid, ts, value in zip(sids, stamps, records['values'][:, 0].tolist()):
+        name = rule_of[sid]
+        if name in newest and ts == newest[name] and np.isfinite(value):
+            values[by_name[name]] = values.get(by_name[name], 0.0) + value
+    return values
@@ -0,0 +1,129 @@
+"""Request and replica right-sizing from streamed usage percentiles"""
+import logging
+from typing import Dict
+
+import numpy as np
+
+from .sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+# Sketch ranges: 10 microcores .. 10k cores, 10 kB .. 10 TB.
+CPU_RANGE = (1e-5, 1e4)
+MEMORY_RANGE = (1e4, 1e13)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# CPU is compressible, so requests follow p95; memory is not, so it follows
+# p99. Both get headroom on top.
+CPU_HEADROOM = 1.15
+MEMORY_HEADROOM = 1.15
+# Replica counts aim to keep summed p95 usage at this fraction of requests.
+TARGET_UTILIZATION = 0.7
+
+MIN_CPU = 0.01
+MIN_MEMORY = 16 * 2 ** 20
+CPU_GRANULARITY = 0.005
+MEMORY_GRANULARITY = 2 ** 20
+
+
+def _round_up(values: np.ndarray, granularity: float) -> np.ndarray:
+    return np.ceil(values / granularity) * granularity
+
+
+class RightSizer:
+    """
+    Streams container usage into per-container and per-workload sketches.
+
+    Rows are containers of a workload template (e.g. ``web/app``); each row
+    belongs to one workload. Workload sketches track the summed usage of all
+    its pods at each timestamp, which drives the replica recommendation.
+    """
+
+    def __init__(self, workload_of_row: np.ndarray, n_workloads: int):
+        """
+        Args:
+            workload_of_row: Workload index of every container row
+            n_workloads: Number of workloads
+        """
+        self.workload_of_row = np.asarray(workload_of_row, dtype=np.int64)
+        n_rows = len(self.workload_of_row)
+        self.n_workloads = n_workloads
+        self.sketches: Dict[str, QuantileSketch] = {
+            'cpu': QuantileSketch(n_rows, *CPU_RANGE),
+            'memory': QuantileSketch(n_rows, *MEMORY_RANGE),
+        }
+        self.totals: Dict[str, QuantileSketch] = {
+            'cpu': QuantileSketch(n_workloads, *CPU_RANGE),
+            'memory': QuantileSketch(n_workloads, *MEMORY_RANGE),
+        }
+
+    def add(self, resource: str, ts: np.ndarray, rows: np.ndarray, values: np.ndarray) -> None:
+        """
+        Add one batch of container samples.
+
+        A batch must hold every sample of the timestamps it contains, so
+        that workload totals are complete; callers split on timestamp
+        boundaries.
+
+        Args:
+            resource: ``cpu`` or ``memory``
+            ts: Sample timestamps
+            rows: Container row per sample (-1 = not tracked)
+            values: Usage per sample (cores or bytes)
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        keep = (rows >= 0) & ~np.isnan(values)
+        if not keep.any():
+            return
+        ts, rows, values = np.asarray(ts)[keep], rows[keep], values[keep]
+        self.sketches[resource].add(rows, values)
+
+        times, t_idx = np.unique(ts, return_inverse=True)
+        flat = self.workload_of_row[rows] * len(times) + t_idx
+        size = self.n_workloads * len(times)
+        sums = np.bincount(flat, weights=values, minlength=size)
+        present = np.bincount(flat, minlength=size) > 0
+        cells = np.flatnonzero(present)
+        self.totals[resource].add(cells // len(times), sums[cells])
+
+    def percentiles(self) -> Dict[str, np.ndarray]:
+        """p50/p95/p99 per container row and per workload"""
+        return {
+            'cpu': self.sketches['cpu'].quantiles(QUANTILES),
+            'memory': self.sketches['memory'].quantiles(QUANTILES),
+            'total_cpu': self.totals['cpu'].quantiles(QUANTILES),
+            'total_memory': self.totals['memory'].quantiles(QUANTILES),
+        }
+
+    def recommend(self, cpu_request: np.ndarray, memory_request: np.ndarray,
+                  replicas: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Recommend container requests and workload replica counts.
+
+        Args:
+            cpu_request: Current CPU request per container row (cores)
+            memory_request: Current memory request per container row (bytes)
+            replicas: Current replicas per workload
+
+        Returns:
+            dict: The percentiles plus ``cpu_request``/``memory_request``
+                  recommendations per row (NaN without data) and
+                  ``replicas`` per workload at current requests
+        """
+        pct = self.percentiles()
+        cpu_rec = _round_up(np.maximum(pct['cpu'][:, 1] * CPU_HEADROOM, MIN_CPU), CPU_GRANULARITY)
+        mem_rec = _round_up(np.maximum(pct['memory'][:, 2] * MEMORY_HEADROOM, MIN_MEMORY), MEMORY_GRANULARITY)
+
+        # Per-pod requests of each workload, as currently declared.
+        pod_cpu = np.bincount(self.workload_of_row, weights=cpu_request, minlength=self.n_workloads)
+        pod_mem = np.bincount(self.workload_of_row, weights=memory_request, minlength=self.n_workloads)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            need_cpu = np.where(pod_cpu > 0, pct['total_cpu'][:, 1] / (pod_cpu * TARGET_UTILIZATION), np.nan)
+            need_mem = np.where(pod_mem > 0, pct['total_memory'][:, 1] / (pod_mem * TARGET_UTILIZATION), np.nan)
+        need = np.fmax(need_cpu, need_mem)
+        replica_rec = np.where(np.isnan(need), np.asarray(replicas, dtype=np.float64),
+                               np.maximum(1, np.ceil(need)))
+
+        pct.update({'cpu_request': cpu_rec, 'memory_request': mem_rec, 'replicas': replica_rec})
+        return pct
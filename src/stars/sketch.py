@@ -0,0 +1,93 @@
+"""Mergeable streaming quantile sketches for many series at once"""
+import logging
+from typing import Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class QuantileSketch:
+    """
+    Log-bucketed histogram per series with bounded relative error.
+
+    Every series shares one bucket layout, so the whole sketch is a single
+    (n_series x n_buckets) count matrix: adding a batch of samples is one
+    ``np.bincount`` and quantiles for every series come out of one
+    cumulative sum. Memory is independent of the number of samples seen.
+
+    Values at or below *min_value* (including zero) land in bucket 0 and
+    report as 0; values above *max_value* are clamped into the top bucket.
+    """
+
+    def __init__(self, n_series: int, min_value: float, max_value: float,
+                 relative_accuracy: float = 0.02):
+        """
+        Args:
+            n_series: Number of independent series
+            min_value: Smallest value resolved (e.g. 1e-5 cores, 1e4 bytes)
+            max_value: Largest value resolved
+            relative_accuracy: Maximum relative error of reported quantiles
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        if not 0 < min_value < max_value:
+            raise ValueError("Sketch range must satisfy 0 < min_value < max_value")
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.n_buckets = int(np.ceil(np.log(max_value / min_value) / self._log_gamma)) + 1
+        self.counts = np.zeros((n_series, self.n_buckets), dtype=np.uint32)
+
+    @property
+    def n_series(self) -> int:
+        return self.counts.shape[0]
+
+    def _bucket(self, values: np.ndarray) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            idx = np.ceil(np.log(values / self.min_value) / self._log_gamma)
+        idx = np.where(values > self.min_value, idx, 0)
+        return np.clip(idx, 0, self.n_buckets - 1).astype(np.int64)
+
+    def add(self, rows: np.ndarray, values: np.ndarray) -> None:
+        """Add samples; ``rows[i]`` is the series of ``values[i]``. NaNs are skipped."""
+        values = np.asarray(values, dtype=np.float64)
+        rows = np.asarray(rows, dtype=np.int64)
+        keep = ~np.isnan(values) & (rows >= 0)
+        if not keep.any():
+            return
+        flat = rows[keep] * self.n_buckets + self._bucket(values[keep])
+        size = self.counts.size
+        self.counts += np.bincount(flat, minlength=size).reshape(self.counts.shape).astype(np.uint32)
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        """Fold another sketch with the same layout into this one"""
+        if other.counts.shape != self.counts.shape or other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different layouts")
+        self.counts += other.counts
+
+    def count(self) -> np.ndarray:
+        """Samples seen per series"""
+        return self.counts.sum(axis=1, dtype=np.int64)
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """
+        Estimate quantiles for every series.
+
+        Returns:
+            np.ndarray: Matrix of shape (n_series, len(qs)); NaN for series
+                        without samples
+        """
+        cum = np.cumsum(self.counts, axis=1, dtype=np.int64)
+        total = cum[:, -1] if self.n_buckets else np.zeros(self.n_series, dtype=np.int64)
+        # Bucket midpoints in the log domain; bucket 0 stands for "about zero".
+        edges = self.min_value * self.gamma ** np.arange(self.n_buckets)
+        mids = np.where(np.arange(self.n_buckets) > 0, 2 * edges / (self.gamma + 1), 0.0)
+
+        out = np.empty((self.n_series, len(qs)))
+        for j, q in enumerate(qs):
+            rank = np.floor(q * np.maximum(total - 1, 0))
+            idx = (cum <= rank[:, None]).sum(axis=1)
+            out[:, j] = mids[np.minimum(idx, self.n_buckets - 1)]
+        out[total == 0] = np.nan
+        return out
@@ -0,0 +1,283 @@
+"""Service level objectives: multi-window SLIs and error-budget burn - no output logic"""
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .prometheus import PrometheusError, parse_duration, result_matrix
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = ('5m', '1h', '6h', '30d')
+# The error budget is spent over this window.
+PERIOD = '30d'
+# Windows longer than this are summed from an hourly range, which the
+# range cache keeps between runs, instead of one instant query each.
+LONG_WINDOW = 86400
+BUCKET = '1h'
+# Multi-window burn-rate alerts: (severity, long window, short window,
+# burn rate). Both windows must burn at least that fast to fire.
+BURN_ALERTS = (
+    ('page', '1h', '5m', 14.4),
+    ('ticket', '6h', '1h', 6.0),
+)
+# SLI expressions answered by one PromQL request.
+BATCH_SIZE = 16
+_BATCH_LABEL = 'stars_slo'
+_PLACEHOLDER = '$window'
+
+
+def _with_label(selector: str, name: str, value: str) -> str:
+    """Add ``name="value"`` to a metric selector"""
+    selector = selector.strip()
+    matcher = f'{name}="{value}"'
+    if selector.endswith('}') and '{' in selector:
+        head, inner = selector[:-1].split('{', 1)
+        inner = inner.strip().rstrip(',')
+        return f"{head}{{{inner + ',' if inner else ''}{matcher}}}"
+    return f"{selector}{{{matcher}}}"
+
+
+def parse_slos(section: Any) -> List[Dict[str, Any]]:
+    """
+    Normalise the ``slos`` section of ``~/.stars/config.yaml``.
+
+    The section maps names to specs (or is a list of specs with a
+    ``name``). A ratio SLO gives ``total`` and either ``good`` or ``bad``
+    as PromQL rates with a ``$window`` placeholder; a latency SLO gives a
+    ``histogram`` bucket selector and a ``threshold``, the ``le`` bucket
+    that counts as fast. ``objective`` is a percentage (``99.9``) or a
+    fraction (``0.999``); ``namespace`` is optional and only filters.
+
+    Returns:
+        list: ``{'name', 'namespace', 'kind', 'objective', 'good', 'total',
+              'bad'}`` per SLO, ``bad`` True when ``good`` counts failures
+
+    Raises:
+        ValueError: On a malformed spec
+    """
+    if isinstance(section, dict):
+        specs = [dict(spec or {}, name=name) for name, spec in section.items()]
+    elif isinstance(section, list):
+        specs = [dict(spec) for spec in section if isinstance(spec, dict)]
+    else:
+        raise ValueError("The slos config section must be a mapping of name to spec")
+
+    slos = []
+    for spec in specs:
+        name = str(spec.get('name') or '')
+        if not name:
+            raise ValueError("Every SLO needs a name")
+        try:
+            objective = float(spec.get('objective', 99.9))
+        except (TypeError, ValueError):
+            raise ValueError(f"SLO {name}: objective must be a number")
+        if objective > 1:
+            objective /= 100
+        if not 0 < objective < 1:
+            raise ValueError(f"SLO {name}: objective must be between 0 and 100%")
+
+        if spec.get('histogram'):
+            threshold = spec.get('threshold')
+            if threshold is None:
+                raise ValueError(f"SLO {name}: a latency SLO needs a threshold (le bucket)")
+            le = threshold if isinstance(threshold, str) else f"{float(threshold):g}"
+            selector = str(spec['histogram'])
+            kind, bad = 'latency', False
+            good = f"sum(rate({_with_label(selector, 'le', le)}[{_PLACEHOLDER}]))"
+            total = f"sum(rate({_with_label(selector, 'le', '+Inf')}[{_PLACEHOLDER}]))"
+        else:
+            total = spec.get('total')
+            if not total or bool(spec.get('good')) == bool(spec.get('bad')):
+                raise ValueError(f"SLO {name}: give total and one of good or bad, or a histogram")
+            kind, bad = 'ratio', bool(spec.get('bad'))
+            good = spec.get('bad') or spec.get('good')
+            for expr in (good, total):
+                if _PLACEHOLDER not in str(expr):
+                    raise ValueError(f"SLO {name}: {expr!r} has no {_PLACEHOLDER} placeholder")
+
+        slos.append({
+            'name': name,
+            'namespace': spec.get('namespace'),
+            'kind': kind,
+            'objective': objective,
+            'good': str(good),
+            'total': str(total),
+            'bad': bad,
+        })
+    return slos
+
+
+def sli_expressions(slos: List[Dict[str, Any]], windows: Sequence[str] = WINDOWS) -> Dict[str, str]:
+    """
+    Instant-query expressions of every short window, keyed by a name
+    usable as a recording rule (``slo:<name>:<good|total>:<window>``).
+    """
+    exprs = {}
+    for slo in slos:
+        base = re.sub(r'[^a-zA-Z0-9_]', '_', slo['name'])
+        for window in windows:
+            if parse_duration(window) > LONG_WINDOW:
+                continue
+            for side in ('good', 'total'):
+                label = 'bad' if side == 'good' and slo['bad'] else side
+                exprs[f"slo:{base}:{label}:{window}"] = slo[side].replace(_PLACEHOLDER, window)
+    return exprs
+
+
+def _batch_expr(exprs: Sequence[str]) -> str:
+    """One query answering every expression, each tagged with its position"""
+    if len(exprs) == 1:
+        return exprs[0]
+    return ' or '.join(f'label_replace({expr}, "{_BATCH_LABEL}", "{i}", "", "")'
+                       for i, expr in enumerate(exprs))
+
+
+def _tags(result: List[Dict[str, Any]], n: int) -> np.ndarray:
+    """Expression index of every series of a batched result (-1 if unknown)"""
+    if n == 1:
+        return np.zeros(len(result), dtype=np.int64)
+    tags = [series.get('metric', {}).get(_BATCH_LABEL, '') for series in result]
+    return np.array([int(t) if t.isdigit() and int(t) < n else -1 for t in tags], dtype=np.int64)
+
+
+def _sum_rows(tags: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    """Sum rows of *values* per tag; NaN where no row had a value"""
+    keep = tags >= 0
+    tags, values = tags[keep], values[keep]
+    present = np.isfinite(values)
+    sums = np.zeros((n,) + values.shape[1:])
+    seen = np.zeros(sums.shape, dtype=bool)
+    np.add.at(sums, tags, np.where(present, values, 0.0))
+    np.logical_or.at(seen, tags, present)
+    return np.where(seen, sums, np.nan)
+
+
+def fetch_windows(prom, slos: List[Dict[str, Any]], windows: Sequence[str] = WINDOWS,
+                  now: Optional[float] = None, batch_size: int = BATCH_SIZE,
+                  recorded: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Good and total event rate of every SLO over every window.
+
+    Short windows are instant queries. Long windows are summed from one
+    hourly range per expression, so a rerun only fetches the hours the
+    range cache does not hold yet. Expressions are batched ``batch_size``
+    per request and all requests run concurrently; a batch the server
+    rejects is retried one expression at a time, so one broken SLO only
+    loses its own values. Short-window expressions found in *recorded*
+    (see ``recording.latest_values``) are read from there instead.
+
+    Args:
+        prom: PrometheusClient
+        slos: Parsed SLOs (see ``parse_slos``)
+        windows: Window durations
+        now: Evaluation time (default: now)
+        batch_size: Expressions per request
+        recorded: Fresh values of recorded expressions
+
+    Returns:
+        tuple: (good, total), arrays of shape (slos, windows); NaN where
+               there was no data
+    """
+    now = int(time.time() if now is None else now)
+    seconds = [parse_duration(window) for window in windows]
+    bucket = parse_duration(BUCKET)
+    long_windows = [w for w, s in enumerate(seconds) if s > LONG_WINDOW]
+    n_buckets = max([seconds[w] // bucket for w in long_windows], default=0)
+    end = now // bucket * bucket
+    start = end - (n_buckets - 1) * bucket
+
+    # (slo, window or -1 for the hourly range, side) -> expression
+    wanted: Dict[Tuple[int, int, int], str] = {}
+    for s, slo in enumerate(slos):
+        for side, template in enumerate((slo['good'], slo['total'])):
+            for w, window in enumerate(windows):
+                if w not in long_windows:
+                    wanted[(s, w, side)] = template.replace(_PLACEHOLDER, window)
+            if long_windows:
+                wanted[(s, -1, side)] = template.replace(_PLACEHOLDER, BUCKET)
+
+    recorded = recorded or {}
+    instant = sorted({expr for key, expr in wanted.items() if key[1] >= 0 and expr not in recorded})
+    ranged = sorted({expr for key, expr in wanted.items() if key[1] < 0})
+    tasks = ([('instant', instant[i:i + batch_size]) for i in range(0, len(instant), batch_size)]
+             + [('range', ranged[i:i + batch_size]) for i in range(0, len(ranged), batch_size)])
+
+    def _fetch(task) -> np.ndarray:
+        kind, exprs = task
+        try:
+            if kind == 'instant':
+                result = prom.query(_batch_expr(exprs))
+                values = np.array([float(series['value'][1]) for series in result], dtype=np.float64)
+            else:
+                result = prom.query_range(_batch_expr(exprs), start, end, bucket)
+                values = result_matrix(result, _BATCH_LABEL, start, bucket, n_buckets)[1]
+            return _sum_rows(_tags(result, len(exprs)), values, len(exprs))
+        except PrometheusError as e:
+            if len(exprs) > 1:
+                return np.concatenate([_fetch((kind, [expr])) for expr in exprs])
+            logger.warning(f"SLI query failed: {exprs[0]}: {e}")
+            return np.full((1,) if kind == 'instant' else (1, n_buckets), np.nan)
+
+    results = prom.map(_fetch, tasks)
+    instant_values = dict(recorded)
+    range_values = {}
+    for (kind, exprs), values in zip(tasks, results):
+        (instant_values if kind == 'instant' else range_values).update(zip(exprs, values))
+
+    rates = np.full((len(slos), len(windows), 2), np.nan)
+    for (s, w, side), expr in wanted.items():
+        if w >= 0:
+            rates[s, w, side] = instant_values[expr]
+    if long_windows:
+        hourly = np.full((len(slos), 2, n_buckets), np.nan)
+        for (s, w, side), expr in wanted.items():
+            if w < 0:
+                hourly[s, side] = range_values[expr]
+        # Hours missing on either side are left out of both sums.
+        both = np.isfinite(hourly).all(axis=1)
+        for w in long_windows:
+            tail = slice(n_buckets - seconds[w] // bucket, None)
+            mask = both[:, tail]
+            sums = np.where(mask[:, None, :], hourly[:, :, tail], 0.0).sum(axis=2)
+            rates[:, w] = np.where(mask.any(axis=1)[:, None], sums, np.nan)
+
+    good, total = rates[..., 0], rates[..., 1]
+    bad = np.array([slo['bad'] for slo in slos], dtype=bool)
+    good = np.where(bad[:, None], total - good, good)
+    return good, total
+
+
+def evaluate(slos: List[Dict[str, Any]], good: np.ndarray, total: np.ndarray,
+             windows: Sequence[str] = WINDOWS) -> Dict[str, Any]:
+    """
+    SLIs, burn rates and alert state from window rates.
+
+    The burn rate is the error rate of a window divided by the error rate
+    the objective allows: at 1 the budget lasts exactly one ``PERIOD``.
+
+    Returns:
+        dict: ``sli`` and ``burn`` (slos x windows), ``budget`` (fraction of
+              the period's error budget left, negative once overspent) and
+              ``alerts`` (most severe firing ``BURN_ALERTS`` severity per SLO,
+              '' if none)
+    """
+    objective = np.array([slo['objective'] for slo in slos], dtype=np.float64).reshape(-1, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sli = np.where(total > 0, np.clip(good / total, 0.0, 1.0), np.nan)
+        burn = (1.0 - sli) / (1.0 - objective)
+
+    index = {window: w for w, window in enumerate(windows)}
+    budget = 1.0 - burn[:, index[PERIOD]] if PERIOD in index else np.full(len(slos), np.nan)
+    alerts = [''] * len(slos)
+    # Least severe first so the most severe firing alert wins.
+    for severity, long, short, rate in reversed(BURN_ALERTS):
+        if long not in index or short not in index:
+            continue
+        with np.errstate(invalid='ignore'):
+            firing = (burn[:, index[long]] >= rate) & (burn[:, index[short]] >= rate)
+        for i in np.flatnonzero(firing).tolist():
+            alerts[i] = severity
+    return {'sli': sli, 'burn': burn, 'budget': budget, 'alerts': alerts}
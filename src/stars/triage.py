@@ -0,0 +1,167 @@
+"""Failure grouping for batched AI triage - no output logic"""
+import hashlib
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .owners import pod_key, pod_owner
+
+logger = logging.getLogger(__name__)
+
+# Restarts above this count make a running pod a failure.
+RESTART_THRESHOLD = 5
+# Log lines kept per representative for the local rules.
+LOG_LINES = 10
+# Evidence that can quote container output: it feeds the group signature
+# and the local rules but is never sent to the model.
+LOCAL_ONLY = ('log_tail', 'events')
+# Waiting reasons of a container that is simply starting up.
+_STARTING = {'ContainerCreating', 'PodInitializing'}
+_ERROR_RE = re.compile(r'error|exception|fatal|panic|refused|denied|failed|killed|timeout|traceback', re.I)
+# Parts of a log line that differ between replicas of the same failure.
+_VOLATILE = (
+    (re.compile(r'\d{4}-\d{2}-\d{2}[T ][\d:.,]+(Z|[+-]\d{2}:?\d{2})?'), '<ts>'),
+    (re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.I), '<uuid>'),
+    (re.compile(r'\b\d{1,3}(\.\d{1,3}){3}(:\d+)?\b'), '<ip>'),
+    (re.compile(r'\b(0x)?[0-9a-f]{8,}\b', re.I), '<hex>'),
+    (re.compile(r'\d+'), '<n>'),
+)
+
+Signature = Tuple[str, str, str, str]
+
+
+def failure_reason(pod) -> Tuple[str, str]:
+    """(container, reason) of the first failing container, else ('', pod reason or phase)"""
+    for c in (pod.status.container_statuses if pod.status else None) or []:
+        waiting = c.state.waiting if c.state else None
+        if waiting and waiting.reason and waiting.reason not in _STARTING:
+            return c.name, waiting.reason
+        terminated = c.last_state.terminated if c.last_state else None
+        if terminated and terminated.reason and (c.restart_count or 0) > RESTART_THRESHOLD:
+            return c.name, terminated.reason
+    status = pod.status
+    return '', (status.reason if status else None) or (status.phase if status else None) or 'Unknown'
+
+
+def is_failing(pod) -> bool:
+    """Pending, failed or unknown pods, failing containers and frequent restarters"""
+    phase = pod.status.phase if pod.status else None
+    if phase in ('Pending', 'Failed', 'Unknown'):
+        return True
+    return bool(failure_reason(pod)[0])
+
+
+def log_fingerprint(text: Optional[str]) -> str:
+    """
+    Stable hash of the last error-looking log line, with timestamps, ids,
+    addresses and numbers masked so replicas of one failure agree.
+    """
+    lines = [line.strip() for line in (text or '').splitlines() if line.strip()]
+    if not lines:
+        return ''
+    errors = [line for line in lines if _ERROR_RE.search(line)]
+    line = (errors or lines)[-1]
+    for pattern, token in _VOLATILE:
+        line = pattern.sub(token, line)
+    return hashlib.blake2b(line.encode(), digest_size=6).hexdigest()
+
+
+def failure_signature(pod, log_tail: Optional[str] = None) -> Signature:
+    """(namespace/owner, container, reason, log fingerprint) identifying one kind of failure"""
+    container, reason = failure_reason(pod)
+    return f"{pod.metadata.namespace}/{pod_owner(pod)}", container, reason, log_fingerprint(log_tail)
+
+
+def group_failures(pods: List[Any], logs: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """
+    Group failing pods by signature.
+
+    Args:
+        pods: Failing pods
+        logs: Log tail per ``namespace/name`` (see ``owners.pod_key``), where fetched
+
+    Returns:
+        list: ``{'signature', 'members', 'representative'}`` per group,
+              largest first; the representative is the member with the
+              most restarts, so it carries the most evidence
+    """
+    logs = logs or {}
+    groups: Dict[Signature, List[Any]] = {}
+    for pod in pods:
+        groups.setdefault(failure_signature(pod, logs.get(pod_key(pod))), []).append(pod)
+
+    def _restarts(pod):
+        return sum(c.restart_count or 0 for c in (pod.status.container_statuses or []))
+
+    result = [
+        {'signature': signature, 'members': members, 'representative': max(members, key=_restarts)}
+        for signature, members in groups.items()
+    ]
+    result.sort(key=lambda group: -len(group['members']))
+    return result
+
+
+def container_evidence(pod) -> List[Dict[str, Any]]:
+    """Per container: readiness, restarts, why it is waiting and how it last exited"""
+    containers = []
+    for c in (pod.status.container_statuses if pod.status else None) or []:
+        waiting = c.state.waiting if c.state else None
+        terminated = c.last_state.terminated if c.last_state else None
+        containers.append({
+            'name': c.name,
+            'ready': c.ready,
+            'restarts': c.restart_count,
+            'waiting': waiting.reason if waiting else None,
+            'waiting_message': waiting.message if waiting else None,
+            'last_exit': ({'reason': terminated.reason, 'exit_code': terminated.exit_code,
+                           'message': terminated.message} if terminated else None),
+        })
+    return containers
+
+
+def scheduling_message(pod) -> Optional[str]:
+    """The scheduler's message for a pod it could not place, if any"""
+    for condition in (pod.status.conditions if pod.status else None) or []:
+        if condition.type == 'PodScheduled' and condition.status == 'False':
+            return condition.message or condition.reason
+    return None
+
+
+def shareable_evidence(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy of pod or group evidence that may leave the machine: without the
+    log tail, events and container messages, since a termination message
+    is the log tail itself under ``FallbackToLogsOnError``.
+    """
+    shared = {key: value for key, value in data.items() if key not in LOCAL_ONLY}
+    if 'containers' in data:
+        shared['containers'] = [
+            {**{key: value for key, value in c.items() if key != 'waiting_message'},
+             'last_exit': ({key: value for key, value in c['last_exit'].items() if key != 'message'}
+                           if c.get('last_exit') else None)}
+            for c in data['containers']
+        ]
+    return shared
+
+
+def group_evidence(group: Dict[str, Any], logs: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Evidence of a group: its signature and the representative's state and
+    log tail. Pass it through ``shareable_evidence`` before it goes to the
+    model.
+    """
+    owner, container, reason, _ = group['signature']
+    pod = group['representative']
+    tail = ((logs or {}).get(pod_key(pod)) or '').splitlines()[-LOG_LINES:]
+    return {
+        'owner': owner,
+        'container': container,
+        'reason': reason,
+        'pods': len(group['members']),
+        'example': pod_key(pod),
+        'phase': pod.status.phase,
+        'message': pod.status.message,
+        'scheduling': scheduling_message(pod),
+        'containers': container_evidence(pod),
+        'log_tail': tail,
+    }
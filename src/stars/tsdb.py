@@ -0,0 +1,374 @@
+"""Local time-series store - memory-mapped ring buffers of fixed-width samples"""
+import json
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b'STARSRB1'
+# magic, capacity, head (next write slot), count, n_values
+_HEADER = struct.Struct('<8sQQQI')
+_HEADER_SIZE = 64
+
+# 2**19 records of 16 bytes = 8 MiB per ring: about 3.6 days of per-minute
+# CPU and memory samples for 100 pods.
+DEFAULT_CAPACITY = 1 << 19
+
+# Rings used by the collector and the value columns each one stores.
+POD_RING = 'pods'
+NODE_RING = 'nodes'
+CONTAINER_RING = 'containers'
+PROM_RING = 'prom'
+RULE_RING = 'rules'
+RING_VALUES = {
+    POD_RING: ('cpu', 'memory'),
+    NODE_RING: ('cpu', 'memory'),
+    CONTAINER_RING: ('cpu', 'memory'),
+    PROM_RING: ('value',),
+    RULE_RING: ('value',),
+}
+
+
+def pod_series(namespace: str, name: str) -> str:
+    return f"pod:{namespace}/{name}"
+
+
+def container_series(namespace: str, pod: str, container: str) -> str:
+    return f"container:{namespace}/{pod}/{container}"
+
+
+def node_series(name: str) -> str:
+    return f"node:{name}"
+
+
+def prom_series(query: str, labels: Dict[str, str]) -> str:
+    rendered = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return f"prom:{query}{{{rendered}}}"
+
+
+def rule_series(rule: str, labels: Dict[str, str]) -> str:
+    rendered = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()) if k != '__name__')
+    return f"rule:{rule}{{{rendered}}}"
+
+
+def record_dtype(n_values: int) -> np.dtype:
+    """Fixed-width record: uint32 unix time, uint32 series id, float32 values"""
+    return np.dtype([('ts', '<u4'), ('sid', '<u4'), ('values', '<f4', (n_values,))])
+
+
+def _write_json_secure(path: Path, data) -> None:
+    """Atomically write JSON with 0o600 permissions"""
+    tmp_path = str(path) + '.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, str(path))
+
+
+def bin_samples(ts: np.ndarray, rows: np.ndarray, values: np.ndarray, n_rows: int,
+                start: int, step: int, n_buckets: int, agg: str = 'mean') -> np.ndarray:
+    """
+    Bin irregular samples onto a regular (row x time bucket) grid.
+
+    Args:
+        ts: Sample timestamps in seconds
+        rows: Row index of every sample (0 <= row < n_rows)
+        values: Sample values
+        n_rows: Number of output rows
+        start: Timestamp of the left edge of bucket 0
+        step: Bucket width in seconds
+        n_buckets: Number of buckets
+        agg: ``mean``, ``max`` or ``sum``
+
+    Returns:
+        np.ndarray: float64 matrix of shape (n_rows, n_buckets); empty cells are NaN
+    """
+    buckets = (ts.astype(np.int64) - start) // step
+    keep = (buckets >= 0) & (buckets < n_buckets)
+    flat = rows[keep].astype(np.int64) * n_buckets + buckets[keep]
+    vals = values[keep].astype(np.float64)
+    size = n_rows * n_buckets
+
+    counts = np.bincount(flat, minlength=size)
+    if agg == 'max':
+        out = np.full(size, -np.inf)
+        np.maximum.at(out, flat, vals)
+    else:
+        out = np.bincount(flat, weights=vals, minlength=size)
+        if agg == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                out = out / counts
+    out[counts == 0] = np.nan
+    return out.reshape(n_rows, n_buckets)
+
+
+def group_rows(grid: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Sum grid rows into groups (e.g. pods into namespaces).
+
+    A cell is NaN only when no member of the group has a sample there.
+    """
+    present = ~np.isnan(grid)
+    sums = np.zeros((n_groups, grid.shape[1]))
+    np.add.at(sums, codes, np.where(present, grid, 0.0))
+    seen = np.zeros((n_groups, grid.shape[1]), dtype=np.int64)
+    np.add.at(seen, codes, present)
+    sums[seen == 0] = np.nan
+    return sums
+
+
+class SeriesIndex:
+    """
+    Interns series names (e.g. ``pod:default/web-1``) into dense integer ids.
+
+    Ids are stable for the life of the store and index directly into NumPy
+    arrays, so every analysis works on integers instead of strings.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._dirty = False
+        if path.exists():
+            with open(path, 'r') as f:
+                self._names = json.load(f)
+            self._ids = {name: i for i, name in enumerate(self._names)}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def intern(self, name: str) -> int:
+        """Return the id for *name*, allocating a new one if needed"""
+        sid = self._ids.get(name)
+        if sid is None:
+            sid = len(self._names)
+            self._ids[name] = sid
+            self._names.append(name)
+            self._dirty = True
+        return sid
+
+    def get(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def name(self, sid: int) -> str:
+        return self._names[sid]
+
+    def ids_with_prefix(self, prefix: str) -> np.ndarray:
+        """Ids of every series whose name starts with *prefix*"""
+        return np.array([i for i, n in enumerate(self._names) if n.startswith(prefix)], dtype=np.uint32)
+
+    def flush(self) -> None:
+        if self._dirty:
+            _write_json_secure(self.path, self._names)
+            self._dirty = False
+
+
+class RingBuffer:
+    """
+    Fixed-capacity ring of samples in a memory-mapped file.
+
+    Writes append vectorised batches and wrap around once the ring is full.
+    Reads return zero-copy ``np.memmap`` views in chronological order.
+    """
+
+    def __init__(self, path: Path, n_values: Optional[int] = None, capacity: int = DEFAULT_CAPACITY):
+        """
+        Open or create a ring.
+
+        Args:
+            path: Ring file
+            n_values: Values per sample; may be omitted for an existing ring
+            capacity: Number of records when creating a new ring
+        """
+        self.path = path
+
+        if not path.exists():
+            if n_values is None:
+                raise FileNotFoundError(f"Ring not found: {path}")
+            fd = os.open(str(path), os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, capacity, 0, 0, n_values).ljust(_HEADER_SIZE, b'\0'))
+                f.truncate(_HEADER_SIZE + capacity * record_dtype(n_values).itemsize)
+
+        with open(path, 'rb') as f:
+            magic, capacity, _, _, stored_values = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError(f"Not a STARS ring buffer: {path}")
+        if n_values is not None and stored_values != n_values:
+            raise ValueError(f"Ring {path} stores {stored_values} values per sample, expected {n_values}")
+
+        self.n_values = stored_values
+        self.dtype = record_dtype(stored_values)
+        self.capacity = capacity
+        # head and count, right after magic and capacity
+        self._header = np.memmap(path, dtype=np.uint64, mode='r+', offset=16, shape=(2,))
+        self._records = np.memmap(path, dtype=self.dtype, mode='r+',
+                                  offset=_HEADER_SIZE, shape=(capacity,))
+
+    @property
+    def head(self) -> int:
+        return int(self._header[0])
+
+    @property
+    def count(self) -> int:
+        return int(self._header[1])
+
+    def append(self, ts: np.ndarray, sids: np.ndarray, values: np.ndarray) -> None:
+        """
+        Append a batch of samples.
+
+        Args:
+            ts: Unix timestamps in seconds, shape (n,)
+            sids: Series ids, shape (n,)
+            values: Sample values, shape (n, n_values)
+        """
+        n = len(sids)
+        if n == 0:
+            return
+        if n > self.capacity:
+            ts, sids, values = ts[-self.capacity:], sids[-self.capacity:], values[-self.capacity:]
+            n = self.capacity
+
+        head = self.head
+        first = min(n, self.capacity - head)
+        for dst, src in ((slice(head, head + first), slice(0, first)),
+                         (slice(0, n - first), slice(first, n))):
+            if dst.stop > dst.start:
+                self._records['ts'][dst] = ts[src]
+                self._records['sid'][dst] = sids[src]
+                self._records['values'][dst] = values[src]
+
+        # Header is updated after the data so readers never see a slot
+        # counted before it is written.
+        self._header[0] = (head + n) % self.capacity
+        self._header[1] = min(self.count + n, self.capacity)
+
+    def segments(self) -> List[np.ndarray]:
+        """Zero-copy views of stored records, oldest first"""
+        count, head = self.count, self.head
+        if count < self.capacity:
+            return [self._records[:count]]
+        return [self._records[head:], self._records[:head]]
+
+    def read(self, since: Optional[int] = None, sids: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Return records in chronological order, optionally filtered.
+
+        Samples are appended in time order, so *since* is a binary search
+        and a slice. Reads without a series filter from a ring that has not
+        wrapped (or whose wrapped tail is older than *since*) are zero-copy.
+        """
+        parts = []
+        for seg in self.segments():
+            if since is not None:
+                seg = seg[np.searchsorted(seg['ts'], since, side='left'):]
+            if sids is not None:
+                seg = seg[np.isin(seg['sid'], sids)]
+            if len(seg):
+                parts.append(seg)
+
+        if not parts:
+            return np.empty(0, dtype=self.dtype)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
+
+    def flush(self) -> None:
+        self._records.flush()
+        self._header.flush()
+
+
+class MetricStore:
+    """Collection of ring buffers sharing one series index"""
+
+    def __init__(self, root: Optional[Path] = None, capacity: int = DEFAULT_CAPACITY):
+        if root is None:
+            from .config import TSDB_DIR
+            root = TSDB_DIR
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True, mode=0o700)
+        self.capacity = capacity
+        self.index = SeriesIndex(self.root / 'series.json')
+        self._rings: Dict[str, RingBuffer] = {}
+
+    def ring(self, name: str, n_values: Optional[int] = None) -> RingBuffer:
+        """Open (creating if needed) the ring called *name*"""
+        ring = self._rings.get(name)
+        if ring is None:
+            if n_values is None and name in RING_VALUES:
+                n_values = len(RING_VALUES[name])
+            ring = RingBuffer(self.root / f"{name}.ring", n_values, self.capacity)
+            self._rings[name] = ring
+        return ring
+
+    def has_ring(self, name: str) -> bool:
+        return name in self._rings or (self.root / f"{name}.ring").exists()
+
+    def append(self, ring: str, timestamp: float, samples: Iterable[Tuple[str, Tuple[float, ...]]]) -> int:
+        """
+        Append one scrape worth of samples taken at *timestamp*.
+
+        Args:
+            ring: Ring name
+            timestamp: Unix time of the scrape
+            samples: (series name, values) pairs
+
+        Returns:
+            int: Number of samples written
+        """
+        samples = list(samples)
+        if not samples:
+            return 0
+        sids = np.fromiter((self.index.intern(name) for name, _ in samples),
+                           dtype=np.uint32, count=len(samples))
+        values = np.asarray([v for _, v in samples], dtype=np.float32)
+        values = values.reshape(len(samples), -1)
+        ts = np.full(len(samples), int(timestamp), dtype=np.uint32)
+
+        self.ring(ring, values.shape[1]).append(ts, sids, values)
+        self.index.flush()
+        return len(samples)
+
+    def read(self, ring: str, since: Optional[int] = None,
+             prefix: Optional[str] = None) -> np.ndarray:
+        """Read records from *ring*, optionally limited to a series name prefix"""
+        if not self.has_ring(ring):
+            return np.empty(0, dtype=record_dtype(len(RING_VALUES.get(ring, ('value',)))))
+        sids = self.index.ids_with_prefix(prefix) if prefix else None
+        return self.ring(ring).read(since=since, sids=sids)
+
+    def time_range(self, ring: str) -> Optional[Tuple[int, int]]:
+        """(oldest, newest) sample timestamp in *ring*, or None when empty"""
+        if not self.has_ring(ring):
+            return None
+        segments = [seg for seg in self.ring(ring).segments() if len(seg)]
+        if not segments:
+            return None
+        return int(segments[0]['ts'][0]), int(segments[-1]['ts'][-1])
+
+    def matrix(self, ring: str, prefix: str, start: int, step: int, n_buckets: int,
+               column: int = 0, agg: str = 'mean') -> Tuple[List[str], np.ndarray]:
+        """
+        Read one value column of every series under *prefix* as a dense grid.
+
+        Returns:
+            tuple: (series names, matrix of shape (n_series, n_buckets))
+        """
+        records = self.read(ring, since=start, prefix=prefix)
+        if len(records) == 0:
+            return [], np.empty((0, n_buckets))
+        sids, rows = np.unique(records['sid'], return_inverse=True)
+        grid = bin_samples(records['ts'], rows, records['values'][:, column], len(sids),
+                           start, step, n_buckets, agg)
+        return [self.index.name(int(sid)) for sid in sids], grid
+
+    def flush(self) -> None:
+        for ring in self._rings.values():
+            ring.flush()
+        self.index.flush()
@@ -0,0 +1,304 @@
+"""Alert webhooks - durable on-disk queue, batched delivery, retries and dead letters"""
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH = 100
+MAX_WORKERS = 4
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+POST_TIMEOUT = 10
+POLL_INTERVAL = 1.0
+# Client errors that will not succeed on retry go straight to dead letters.
+_RETRY_STATUS = {408, 425, 429}
+_NAME_RE = re.compile(r'^[a-zA-Z0-9][a-zA-Z0-9_.-]{0,62}$')
+_seq = itertools.count()
+
+
+def parse_targets(section: Any) -> List[Dict[str, Any]]:
+    """
+    Normalise the ``webhooks`` config section: a list of
+    ``{name, url, batch_size, headers}``.
+
+    Raises:
+        ValueError: On a malformed target
+    """
+    if not section:
+        return []
+    if not isinstance(section, list):
+        raise ValueError("The webhooks config section must be a list of targets")
+    targets = []
+    for spec in section:
+        name = str((spec or {}).get('name') or '')
+        url = str((spec or {}).get('url') or '')
+        if not _NAME_RE.match(name):
+            raise ValueError(f"Invalid webhook name: {name!r}")
+        if urlparse(url).scheme not in ('http', 'https') or not urlparse(url).hostname:
+            raise ValueError(f"Webhook {name}: URL must be http:// or https://")
+        targets.append({
+            'name': name,
+            'url': url,
+            'batch_size': max(1, int(spec.get('batch_size') or DEFAULT_BATCH)),
+            'headers': dict(spec.get('headers') or {}),
+        })
+    return targets
+
+
+def backoff(attempt: int) -> float:
+    """Delay before retry *attempt* (1-based): exponential, capped, with jitter"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _entry_name(attempt: int = 0, due: Optional[float] = None, origin: Optional[str] = None) -> str:
+    """
+    ``<created>-<pid>-<seq>-<attempt>-<due>.json``: the creation part
+    comes first, so a directory listing sorts in delivery order and a
+    retried entry keeps its place.
+    """
+    now = time.time()
+    if origin is None:
+        origin = f"{int(now * 1000):013d}-{os.getpid()}-{next(_seq):08d}"
+    return f"{origin}-{attempt}-{int((now if due is None else due) * 1000):013d}.json"
+
+
+def _parse_name(name: str) -> Tuple[str, int, float]:
+    """(origin, attempts so far, due time) of an entry file name"""
+    created, pid, seq, attempt, due = name[:-len('.json')].split('-')
+    return f"{created}-{pid}-{seq}", int(attempt), int(due) / 1000
+
+
+class WebhookQueue:
+    """
+    Per-target spool directories of pending and dead-lettered batches.
+
+    Each entry is one JSON file holding at most ``batch_size`` events,
+    written atomically with 0o600 permissions; its name carries the time
+    it was queued, the attempts made so far and when it is next due.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        if root is None:
+            from .config import WEBHOOKS_DIR
+            root = WEBHOOKS_DIR
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True, mode=0o700)
+
+    def _dir(self, target: str, kind: str = 'queue') -> Path:
+        path = self.root / target / kind
+        path.mkdir(parents=True, exist_ok=True, mode=0o700)
+        return path
+
+    def put(self, target: Dict[str, Any], events: List[Dict[str, Any]]) -> int:
+        """Spool *events* for *target* in batch-sized entries; returns entries written"""
+        queue = self._dir(target['name'])
+        size = target['batch_size']
+        written = 0
+        for i in range(0, len(events), size):
+            path = queue / _entry_name()
+            tmp_path = str(path) + '.tmp'
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(events[i:i + size], f)
+            os.replace(tmp_path, path)
+            written += 1
+        return written
+
+    def due(self, target: str, now: Optional[float] = None) -> List[Path]:
+        """
+        Entries due for delivery, oldest first. An entry waiting for a
+        retry holds back everything queued after it, to keep order.
+        """
+        now = time.time() if now is None else now
+        entries = []
+        for path in sorted(self._dir(target).glob('*.json')):
+            if _parse_name(path.name)[2] > now:
+                break
+            entries.append(path)
+        return entries
+
+    def read(self, path: Path) -> List[Dict[str, Any]]:
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def retry(self, path: Path, attempt: int, dead: bool = False) -> Path:
+        """Reschedule an entry after a failed attempt, or dead-letter it"""
+        if dead:
+            target = self._dir(path.parent.parent.name, 'dead') / path.name
+        else:
+            origin = _parse_name(path.name)[0]
+            target = path.with_name(_entry_name(attempt, time.time() + backoff(attempt), origin))
+        os.replace(path, target)
+        return target
+
+    def requeue_dead(self, target: str) -> int:
+        """Move every dead-lettered entry of *target* back onto its queue"""
+        moved = 0
+        for path in sorted(self._dir(target, 'dead').glob('*.json')):
+            os.replace(path, self._dir(target) / _entry_name(0, None, _parse_name(path.name)[0]))
+            moved += 1
+        return moved
+
+    def stats(self, target: str) -> Dict[str, int]:
+        """Pending and dead-lettered entry counts"""
+        return {kind: sum(1 for _ in self._dir(target, kind).glob('*.json')) for kind in ('queue', 'dead')}
+
+
+class WebhookDispatcher:
+    """
+    Delivers queued alert batches in the background.
+
+    ``enqueue`` only writes to the spool, so the alert evaluator and the
+    CLI never wait on a webhook. A dispatcher thread hands due entries to
+    a bounded worker pool, at most one POST in flight per target so
+    batches arrive in order. A POST merges queued entries up to the
+    target's batch size. Failures retry with exponential backoff; after
+    ``MAX_ATTEMPTS``, or on a client error that will not succeed on
+    retry, the entry is dead-lettered. The queue is on disk, so
+    undelivered alerts survive a restart and go out on the next run.
+    """
+
+    def __init__(self, targets: List[Dict[str, Any]], queue: Optional[WebhookQueue] = None,
+                 max_workers: int = MAX_WORKERS, max_attempts: int = MAX_ATTEMPTS):
+        self.targets = {t['name']: t for t in targets}
+        self.queue = queue or WebhookQueue()
+        self.max_attempts = max_attempts
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': 'application/json', 'User-Agent': 'stars-cli'})
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets) or 1)))
+        self._busy = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.delivered = 0
+        self.failed = 0
+
+    def __call__(self, events: List[Dict[str, Any]]) -> None:
+        self.enqueue(events)
+
+    def enqueue(self, events: List[Dict[str, Any]]) -> None:
+        """Spool *events* for every target and wake the dispatcher"""
+        for target in self.targets.values():
+            self.queue.put(target, events)
+        self._wake.set()
+
+    def start(self) -> 'WebhookDispatcher':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='stars-webhooks', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop after delivering what is due within *timeout*; the rest stays queued"""
+        self.drain(timeout)
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self._pool.shutdown(wait=True)
+        self.session.close()
+
+    def drain(self, timeout: float) -> bool:
+        """
+        Deliver, retries included, until nothing falls due before
+        *timeout* passes.
+
+        Returns:
+            bool: True if nothing due is left
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            self._dispatch()
+            with self._lock:
+                busy = bool(self._busy)
+            if not busy and not any(self.queue.due(name, deadline) for name in self.targets):
+                return True
+            time.sleep(0.05)
+        return False
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            self._dispatch()
+            self._wake.wait(POLL_INTERVAL)
+
+    def _dispatch(self) -> None:
+        for name in self.targets:
+            with self._lock:
+                if name in self._busy or self._stop.is_set():
+                    continue
+                if not self.queue.due(name):
+                    continue
+                self._busy.add(name)
+            self._pool.submit(self._deliver_target, name)
+
+    def _deliver_target(self, name: str) -> None:
+        try:
+            while not self._stop.is_set() and self._deliver_batch(self.targets[name]):
+                pass
+        except Exception as e:
+            logger.warning(f"Webhook {name} delivery failed: {e}")
+        finally:
+            with self._lock:
+                self._busy.discard(name)
+            # Entries queued while this target was busy get picked up now.
+            self._wake.set()
+
+    def _deliver_batch(self, target: Dict[str, Any]) -> bool:
+        """POST one merged batch; True if it went out and more may be due"""
+        entries, events = [], []
+        for path in self.queue.due(target['name']):
+            try:
+                batch = self.queue.read(path)
+            except (OSError, ValueError):
+                logger.warning(f"Dead-lettering unreadable webhook entry {path}")
+                self.queue.retry(path, 0, dead=True)
+                continue
+            if events and len(events) + len(batch) > target['batch_size']:
+                break
+            entries.append(path)
+            events.extend(batch)
+        if not entries:
+            return False
+
+        payload = {'source': 'stars', 'sent_at': int(time.time()), 'count': len(events), 'alerts': events}
+        try:
+            response = self.session.post(target['url'], data=json.dumps(payload),
+                                         headers=target['headers'], timeout=POST_TIMEOUT)
+            status = response.status_code
+            error = None if 200 <= status < 300 else f"HTTP {status}"
+        except requests.RequestException as e:
+            status, error = None, str(e)
+
+        if error is None:
+            for path in entries:
+                path.unlink(missing_ok=True)
+            self.delivered += len(events)
+            return True
+
+        permanent = status is not None and 400 <= status < 500 and status not in _RETRY_STATUS
+        retried = 0
+        for path in entries:
+            attempt = _parse_name(path.name)[1] + 1
+            dead = permanent or attempt >= self.max_attempts
+            self.queue.retry(path, attempt, dead=dead)
+            retried += not dead
+        self.failed += len(events)
+        logger.warning(f"Webhook {target['name']} failed ({error}); {len(events)} alerts "
+                       + ("will be retried" if retried else "dead-lettered"))
+        return False
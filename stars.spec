@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=['stars.cli', 'stars.commands', 'stars.k8s_client', 'stars.ai', 'stars.incident', 'stars.sre_tools', 'stars.config', 'stars.utils', 'stars.security'],
+    hiddenimports=['stars.cli', 'stars.commands', 'stars.k8s_client', 'stars.ai', 'stars.incident', 'stars.sre_tools', 'stars.config', 'stars.utils', 'stars.security', 'stars.diff', 'stars.quantity', 'stars.tsdb', 'stars.collector', 'stars.forecast', 'stars.heatmap', 'stars.anomaly', 'stars.sketch', 'stars.rightsize', 'stars.binpack', 'stars.bottlenecks', 'stars.cost', 'stars.prometheus', 'stars.export', 'stars.correlate', 'stars.slo', 'stars.alerts', 'stars.webhooks', 'stars.recording', 'stars.triage', 'stars.owners'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],